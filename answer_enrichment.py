@@ -0,0 +1,66 @@
+"""
+Offline answer enrichment for indexed FAQ rows
+
+Runs after documents are processed and before the index is saved. Every CSV row gets
+its chat-ready short answer and long ("Tell me more") answer stored in its metadata.
+Rows whose details are empty or just repeat the concise answer get their long answer
+generated once here with Titan Text Lite, so /chat never has to generate it per query.
+"""
+
+import logging
+
+from bedrock_search import invoke_generation
+from context_builder import build_context
+from text_utils import trim_to_tokens, trim_short_answer, needs_generation
+
+
+def enrich_documents(indexer, generate: bool = True, force: bool = False) -> dict:
+    """
+    Store short_answer and long_answer on the CSV documents of an indexer
+
+    Args:
+        indexer: BedrockFAISSIndexer whose documents are enriched in place
+        generate: Generate long answers with Titan for rows that have no usable details
+        force: Recompute rows that were already enriched
+
+    Returns:
+        Counts of enriched, generated, failed and skipped rows
+    """
+    stats = {"enriched": 0, "generated": 0, "failed": 0, "skipped": 0}
+
+    for doc in indexer.documents:
+        if doc.get('source') != 'csv':
+            continue
+        if doc.get('long_answer') and not force:
+            stats["skipped"] += 1
+            continue
+
+        short_ans = doc.get('answer') or doc.get('text') or ""
+        long_ans = doc.get('details') or doc.get('text') or ""
+        trimmed_short = trim_short_answer(short_ans)
+        trimmed_long = trim_to_tokens(long_ans, 200)
+
+        generated = False
+        if needs_generation(trimmed_short, trimmed_long):
+            if not generate:
+                continue
+            context = build_context([doc.get('details') or doc.get('answer') or doc.get('text') or ""])
+            try:
+                indexer._rate_limited_request()
+                trimmed_long = trim_to_tokens(invoke_generation(doc.get('question') or short_ans, context), 300)
+                generated = True
+            except Exception as e:
+                # Left unenriched: /chat/more falls back to generating at query time
+                logging.warning(f"⚠️ Could not generate long answer for '{doc.get('question', '')}': {e}")
+                stats["failed"] += 1
+                continue
+
+        doc['short_answer'] = trimmed_short
+        doc['long_answer'] = trimmed_long
+        doc['long_answer_generated'] = generated
+        stats["enriched"] += 1
+        stats["generated"] += int(generated)
+
+    logging.info(f"✅ Enriched {stats['enriched']} FAQ rows "
+                 f"({stats['generated']} long answers generated, {stats['failed']} failed)")
+    return stats
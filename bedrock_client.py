@@ -0,0 +1,331 @@
+"""
+Shared AWS Bedrock runtime client factory
+
+Every module that talks to bedrock-runtime goes through get_bedrock_runtime_client()
+so the endpoint can be redirected (e.g. to the local stub in bedrock_stub.py) with
+the BEDROCK_ENDPOINT_URL environment variable.
+
+The returned client is wrapped in ResilientBedrockClient, which keeps per-model
+latency histograms, sends a hedged duplicate of invoke_model calls that run past the
+model's p95 latency, and opens a circuit breaker after repeated throttling so callers
+can fall back instead of queueing behind a throttled service.
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+import boto3
+from botocore.exceptions import ClientError
+
+DEFAULT_REGION = "ap-south-1"
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v2:0"
+TEXT_MODEL_ID = "amazon.titan-text-lite-v1"
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+THROTTLING_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException"}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Bedrock while the circuit breaker is open"""
+
+
+class LatencyHistogram:
+    # Log-spaced bucket upper bounds in ms: 1ms * 1.25^i, up to ~70s
+    BOUNDS = [1.25 ** i for i in range(51)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, ms: float) -> None:
+        with self.lock:
+            self.counts[bisect.bisect_left(self.BOUNDS, ms)] += 1
+            self.total += 1
+            self.sum_ms += ms
+
+    def quantile(self, q: float) -> float:
+        """Upper bound (ms) of the bucket holding the q-quantile; 0.0 when empty"""
+        with self.lock:
+            if not self.total:
+                return 0.0
+            rank = q * self.total
+            seen = 0
+            for i, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    return self.BOUNDS[min(i, len(self.BOUNDS) - 1)]
+            return self.BOUNDS[-1]
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            buckets = {f"le_{bound:.1f}ms": count for bound, count in zip(self.BOUNDS, self.counts) if count}
+            if self.counts[-1]:
+                buckets["le_inf"] = self.counts[-1]
+            total, sum_ms = self.total, self.sum_ms
+        return {
+            "count": total,
+            "mean_ms": round(sum_ms / total, 3) if total else None,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, cooldown_s: float = 30.0):
+        """
+        Open after failure_threshold consecutive throttled calls; after cooldown_s let a
+        single trial call through (half-open), close again if it succeeds and reopen if
+        it fails in any way
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown_s:
+                self.state = "half_open"
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.consecutive_failures = 0
+            self.state = "closed"
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self._fail()
+
+    def record_error(self, throttled: bool) -> None:
+        """
+        A failed call: throttling counts towards opening, any failed half-open trial
+        reopens, and any other error ends the run of consecutive throttled calls
+        """
+        with self.lock:
+            if throttled or self.state == "half_open":
+                self._fail()
+            else:
+                self.consecutive_failures = 0
+
+    def _fail(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+                logging.warning("⚠️ Bedrock circuit opened after repeated throttling")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected,
+            }
+
+
+class ResilientBedrockClient:
+    def __init__(self, client, hedging: bool = True, hedge_quantile: float = 0.95,
+                 hedge_min_delay_ms: float = 50.0, hedge_min_samples: int = 20,
+                 hedge_max_fraction: float = 0.1, breaker: CircuitBreaker = None):
+        """
+        Wrap a boto3 bedrock-runtime client with hedging, a circuit breaker and histograms
+
+        Args:
+            client: boto3 bedrock-runtime client
+            hedging: Send a duplicate invoke_model call when the first one runs long
+            hedge_quantile: Latency quantile (per model) after which the duplicate is sent
+            hedge_min_delay_ms: Never hedge earlier than this
+            hedge_min_samples: Calls observed for a model before hedging it
+            hedge_max_fraction: Upper bound on hedged calls as a fraction of all calls
+            breaker: Circuit breaker shared by all models of this client
+        """
+        self.client = client
+        self.hedging = hedging
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay_ms = hedge_min_delay_ms
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_max_fraction = hedge_max_fraction
+        self.breaker = breaker or CircuitBreaker()
+        self.histograms = {}
+        self.calls = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="bedrock-hedge")
+
+    def __getattr__(self, name):
+        # Everything except the invoke calls goes straight to the boto3 client
+        return getattr(self.client, name)
+
+    def _histogram(self, model_id: str) -> LatencyHistogram:
+        with self.lock:
+            histogram = self.histograms.get(model_id)
+            if histogram is None:
+                histogram = self.histograms[model_id] = LatencyHistogram()
+            self.calls += 1
+            return histogram
+
+    def _hedge_delay_ms(self, histogram: LatencyHistogram):
+        """Delay before hedging this call, or None to not hedge it"""
+        if not self.hedging or histogram.total < self.hedge_min_samples:
+            return None
+        with self.lock:
+            if self.hedges_sent >= self.hedge_max_fraction * self.calls:
+                return None
+        return max(self.hedge_min_delay_ms, histogram.quantile(self.hedge_quantile))
+
+    def _attempt(self, operation, kwargs: dict, histogram: LatencyHistogram):
+        start = time.perf_counter()
+        response = operation(**kwargs)
+        histogram.observe((time.perf_counter() - start) * 1000.0)
+        return response
+
+    def _hedged(self, operation, kwargs: dict, histogram: LatencyHistogram, delay_ms: float):
+        primary = self._executor.submit(self._attempt, operation, kwargs, histogram)
+        done, _ = wait([primary], timeout=delay_ms / 1000.0)
+        if done:
+            return primary.result()
+
+        with self.lock:
+            self.hedges_sent += 1
+        backup = self._executor.submit(self._attempt, operation, kwargs, histogram)
+        error = None
+        for future in as_completed([primary, backup]):
+            try:
+                response = future.result()
+            except Exception as e:
+                error = error or e
+                continue
+            if future is backup:
+                with self.lock:
+                    self.hedges_won += 1
+            loser = primary if future is backup else backup
+            loser.add_done_callback(_close_response)
+            return response
+        raise error
+
+    def _guarded(self, operation, kwargs: dict, hedge: bool):
+        if not self.breaker.allow():
+            raise CircuitOpenError("Bedrock circuit is open after repeated throttling")
+        histogram = self._histogram(kwargs.get("modelId", ""))
+        delay_ms = self._hedge_delay_ms(histogram) if hedge else None
+        try:
+            if delay_ms is None:
+                response = self._attempt(operation, kwargs, histogram)
+            else:
+                response = self._hedged(operation, kwargs, histogram, delay_ms)
+        except BaseException as e:
+            # Timeouts and other errors do not open the circuit, but must end a half-open
+            # trial, or the breaker would reject every call from then on
+            self.breaker.record_error(isinstance(e, ClientError) and
+                                      e.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES)
+            raise
+        self.breaker.record_success()
+        return response
+
+    def invoke_model(self, **kwargs):
+        return self._guarded(self.client.invoke_model, kwargs, hedge=True)
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        # A stream cannot be raced, so only the breaker and the time-to-response histogram apply
+        return self._guarded(self.client.invoke_model_with_response_stream, kwargs, hedge=False)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            histograms = dict(self.histograms)
+            stats = {
+                "calls": self.calls,
+                "hedges_sent": self.hedges_sent,
+                "hedges_won": self.hedges_won,
+            }
+        stats["circuit"] = self.breaker.snapshot()
+        stats["latency_ms"] = {model: h.snapshot() for model, h in histograms.items()}
+        return stats
+
+
+def _close_response(future) -> None:
+    """Release the connection held by the response of a hedge that lost the race"""
+    try:
+        body = future.result().get("body")
+        if body is not None:
+            body.close()
+    except Exception:
+        pass
+
+
+def get_bedrock_endpoint_url() -> str:
+    """Return the bedrock-runtime endpoint override, or None for the real AWS endpoint"""
+    return os.environ.get("BEDROCK_ENDPOINT_URL") or None
+
+
+def get_bedrock_runtime_client(region_name: str = DEFAULT_REGION):
+    """
+    Get a (cached) bedrock-runtime client
+
+    boto3 clients are thread-safe, so one client per region/endpoint is shared by the
+    indexer and the text generation helpers instead of building a new one per call.
+    Hedging and the circuit breaker are configured with BEDROCK_HEDGING,
+    BEDROCK_HEDGE_MIN_DELAY_MS, BEDROCK_CIRCUIT_THRESHOLD and BEDROCK_CIRCUIT_COOLDOWN_S.
+
+    Args:
+        region_name: AWS region for Bedrock (ap-south-1 for Mumbai)
+
+    Returns:
+        ResilientBedrockClient around a boto3 bedrock-runtime client
+    """
+    endpoint_url = get_bedrock_endpoint_url()
+    key = (region_name, endpoint_url)
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            kwargs = {"service_name": "bedrock-runtime", "region_name": region_name}
+            if endpoint_url:
+                kwargs["endpoint_url"] = endpoint_url
+                # The local stub ignores signatures, but botocore still needs credentials to sign
+                if not os.environ.get("AWS_ACCESS_KEY_ID"):
+                    kwargs["aws_access_key_id"] = "stub"
+                    kwargs["aws_secret_access_key"] = "stub"
+            client = ResilientBedrockClient(
+                boto3.client(**kwargs),
+                hedging=os.environ.get("BEDROCK_HEDGING", "1") == "1",
+                hedge_min_delay_ms=float(os.environ.get("BEDROCK_HEDGE_MIN_DELAY_MS", "50")),
+                breaker=CircuitBreaker(
+                    failure_threshold=int(os.environ.get("BEDROCK_CIRCUIT_THRESHOLD", "5")),
+                    cooldown_s=float(os.environ.get("BEDROCK_CIRCUIT_COOLDOWN_S", "30")),
+                ),
+            )
+            _clients[key] = client
+
+    return client
+
+
+def get_resilience_stats() -> dict:
+    """Hedging, circuit breaker and latency histogram stats of every shared client"""
+    with _clients_lock:
+        clients = dict(_clients)
+    return {
+        f"{region}|{endpoint or 'aws'}": client.get_stats()
+        for (region, endpoint), client in clients.items()
+    }
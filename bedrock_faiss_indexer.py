@@ -3,13 +3,18 @@ import numpy as np
 import pandas as pd
 import pickle
 import os
-import boto3
 import json
 from typing import List, Tuple, Optional
 import logging
 import re
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from bedrock_client import get_bedrock_runtime_client, EMBEDDING_MODEL_ID
+from perf_stages import stage
+from bm25_index import BM25Index
+from near_dedup import NearDuplicateFilter
+from text_utils import FAQ_STOPWORDS, normalize_question
+from single_flight import SingleFlight
 
 # For PDF processing
 try:
@@ -18,21 +23,43 @@ try:
 except ImportError:
     PDF_AVAILABLE = False
 
+# Concurrent requests for the same embedding (e.g. many users asking the same
+# question at once) are merged into one Bedrock call
+embedding_flight = SingleFlight("embedding")
+
+# Similarity thresholds. Cosine thresholds are calibrated per document source from the
+# index itself when it is saved (see source_thresholds). The cap is the lowest fixed
+# threshold the chat endpoints used before, so calibration never rejects a hit they
+# accepted; DEFAULT_THRESHOLD applies to sources with too few vectors to calibrate.
+DEFAULT_THRESHOLD = 0.15
+MIN_CALIBRATED_THRESHOLD = 0.05
+MAX_CALIBRATED_THRESHOLD = 0.15
+CALIBRATION_PERCENTILE = 50
+CALIBRATION_SAMPLE = 512
+# Normalized BM25 scores live on a different scale than cosine similarities
+LEXICAL_MIN_SCORE = 0.15
+# Most candidates a range search hands to fusion / MMR
+RANGE_SEARCH_CAP = 256
+
 class BedrockFAISSIndexer:
-    def __init__(self, region_name: str = "ap-south-1", max_requests_per_second: int = 8):
+    def __init__(self, region_name: str = "ap-south-1", max_requests_per_second: int = 8,
+                 dedup: bool = True):
         """
         Initialize FAISS indexer with AWS Bedrock embeddings (Mumbai region)
         
         Args:
             region_name: AWS region for Bedrock (ap-south-1 for Mumbai)
             max_requests_per_second: Rate limit for Bedrock API calls (default: 8 to be safe)
+            dedup: Skip near-duplicate texts (SimHash) before embedding them
         """
-        self.bedrock = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=region_name
-        )
+        self.bedrock = get_bedrock_runtime_client(region_name)
         self.index = None
         self.documents = []
+        self.faq_lookup = {}  # normalize_question(question) -> document id
+        self.bm25 = None  # BM25Index over document texts, built at save/load time
+        self.dedup = NearDuplicateFilter() if dedup else None
+        self._metadata = None  # per-document metadata as NumPy columns, for filtered search
+        self._thresholds = None  # calibrated per-source thresholds, see source_thresholds
         self.max_requests_per_second = max_requests_per_second
         self.last_request_time = 0
         
@@ -59,29 +86,34 @@ class BedrockFAISSIndexer:
             List of floats representing the embedding
         """
         try:
-            # Rate limiting
-            self._rate_limited_request()
-            
-            # Using Amazon Titan Embeddings V2
-            body = json.dumps({
-                "inputText": text
-            })
-            
-            response = self.bedrock.invoke_model(
-                body=body,
-                modelId="amazon.titan-embed-text-v2:0",
-                accept="application/json",
-                contentType="application/json"
-            )
-            
-            response_body = json.loads(response.get('body').read())
-            embedding = response_body['embedding']
-            return embedding
+            # Identical texts requested concurrently share one Bedrock call
+            with stage("embedding"):
+                return embedding_flight.do((EMBEDDING_MODEL_ID, text), lambda: self._invoke_embedding(text))
             
         except Exception as e:
             logging.error(f"❌ Error getting embedding from Bedrock: {e}")
             raise
     
+    def _invoke_embedding(self, text: str) -> List[float]:
+        """One Titan Embeddings V2 call (rate limited), without coalescing"""
+        # Rate limiting
+        self._rate_limited_request()
+        
+        # Using Amazon Titan Embeddings V2
+        body = json.dumps({
+            "inputText": text
+        })
+        
+        response = self.bedrock.invoke_model(
+            body=body,
+            modelId=EMBEDDING_MODEL_ID,
+            accept="application/json",
+            contentType="application/json"
+        )
+        
+        response_body = json.loads(response.get('body').read())
+        return response_body['embedding']
+    
     def get_embeddings_batch_parallel(self, texts: List[str], max_workers: int = 4) -> np.ndarray:
         """
         Get embeddings for a batch of texts using parallel processing with rate limiting
@@ -150,6 +182,7 @@ class BedrockFAISSIndexer:
         try:
             df = pd.read_csv(csv_path)
             texts = []
+            documents = []
             for _, row in df.iterrows():
                 question = str(row.get(text_column, ""))
                 answer = str(row.get(answer_column, ""))
@@ -180,15 +213,16 @@ class BedrockFAISSIndexer:
                 combined_text = f"{question} {cleaned_answer} {details}".strip()
                 if combined_text:
                     texts.append(combined_text)
-                    self.documents.append({
+                    documents.append({
                         'question': question,
                         'answer': cleaned_answer,
                         'details': details,
                         'text': combined_text,
                         'source': 'csv',
-                        'chunk': 1,
-                        'row_index': len(self.documents)
+                        'file_name': os.path.basename(csv_path),
+                        'chunk': 1
                     })
+            texts = self._keep_unique(texts, documents)
             if texts:
                 embeddings = self.get_embeddings_batch(texts)
                 if self.index is None:
@@ -202,6 +236,47 @@ class BedrockFAISSIndexer:
             logging.error(f"❌ Error processing CSV: {str(e)}")
             raise
     
+    def _keep_unique(self, texts: List[str], documents: List[dict]) -> List[str]:
+        """
+        Drop near-duplicates of already indexed texts before they are embedded
+        
+        Kept documents are appended to self.documents (with their row_index); each
+        dropped one is recorded under 'duplicates' on the document it duplicates.
+        
+        Args:
+            texts: Texts about to be embedded
+            documents: Document metadata, parallel to texts
+            
+        Returns:
+            The texts that still need embeddings
+        """
+        if self.dedup is None:
+            for doc in documents:
+                doc['row_index'] = len(self.documents)
+                self.documents.append(doc)
+            return texts
+        
+        # Indexes loaded from disk: fingerprint what is already there first
+        for doc in self.documents[len(self.dedup):]:
+            self.dedup.add(doc.get('text', ''), doc)
+        
+        kept = []
+        for text, doc in zip(texts, documents):
+            original = self.dedup.find(text)
+            if original is not None:
+                location = {key: doc[key] for key in ('source', 'page', 'chunk', 'question') if key in doc}
+                original.setdefault('duplicates', []).append(location)
+                continue
+            doc['row_index'] = len(self.documents)
+            self.documents.append(doc)
+            self.dedup.add(text, doc)
+            kept.append(text)
+        
+        skipped = len(texts) - len(kept)
+        if skipped:
+            logging.info(f"♻️ Skipped {skipped} near-duplicate texts ({skipped} embedding calls saved)")
+        return kept
+    
     def process_large_dataset(self, texts: List[str], chunk_size: int = 100, use_parallel: bool = True) -> None:
         """
         Process large datasets in chunks to handle memory and rate limit constraints
@@ -295,14 +370,14 @@ class BedrockFAISSIndexer:
                         'details': details,
                         'text': combined_text,
                         'source': 'csv',
-                        'chunk': 1,
-                        'row_index': len(documents)
+                        'file_name': os.path.basename(csv_path),
+                        'chunk': 1
                     })
             
+            texts = self._keep_unique(texts, documents)
             if texts:
                 # Process in chunks
                 self.process_large_dataset(texts, chunk_size=chunk_size)
-                self.documents.extend(documents)
                 logging.info(f"✅ Successfully indexed {len(texts)} CSV rows in chunks")
         except Exception as e:
             logging.error(f"❌ Error processing CSV: {str(e)}")
@@ -423,6 +498,7 @@ class BedrockFAISSIndexer:
             raise ImportError("PyPDF2 is required for PDF processing. Install with: pip install PyPDF2")
         try:
             texts = []
+            documents = []
             with open(pdf_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 for page_num, page in enumerate(pdf_reader.pages):
@@ -438,14 +514,15 @@ class BedrockFAISSIndexer:
                             for chunk_idx, chunk in enumerate(chunks):
                                 if chunk.strip() and len(chunk) > 20:
                                     texts.append(chunk)
-                                    self.documents.append({
+                                    documents.append({
                                         'text': chunk,
                                         'source': 'pdf',
                                         'page': page_num + 1,
                                         'chunk': chunk_idx + 1,
-                                        'row_index': len(self.documents),
-                                        'is_table': is_table
+                                        'is_table': is_table,
+                                        'file_name': os.path.basename(pdf_path)
                                     })
+            texts = self._keep_unique(texts, documents)
             if texts:
                 embeddings = self.get_embeddings_batch(texts)
                 if self.index is None:
@@ -459,14 +536,26 @@ class BedrockFAISSIndexer:
             logging.error(f"❌ Error processing PDF: {str(e)}")
             raise
     
-    def search(self, query: str, k: int = 5, threshold: float = 0.3) -> List[Tuple[dict, float]]:
+    def search(self, query: str, k: int = 5, threshold: Optional[float] = None,
+               query_embedding: Optional[np.ndarray] = None, mmr: bool = False,
+               mmr_lambda: float = 0.5, filters: Optional[dict] = None,
+               range_search: bool = False) -> List[Tuple[dict, float]]:
         """
         Search for similar documents using Bedrock embeddings
         
         Args:
             query: Search query
-            k: Number of results to return
-            threshold: Minimum similarity score
+            k: Number of results to return (the cap on results with range_search)
+            threshold: Minimum similarity score; None uses the calibrated per-source
+                thresholds (see source_thresholds)
+            query_embedding: Precomputed embed_query(query), to skip the Bedrock call
+            mmr: Pick diverse results with maximal marginal relevance instead of the
+                k most similar (overlapping PDF chunks otherwise fill the top slots)
+            mmr_lambda: MMR trade-off, 1.0 = pure relevance, 0.0 = pure diversity
+            filters: Only search documents matching these (see filter_ids); applied
+                inside FAISS with an IDSelector, so k is never over-fetched
+            range_search: Return every document above the threshold (up to k) with a
+                FAISS range search, instead of fetching a fixed number and filtering
             
         Returns:
             List of tuples (document, score)
@@ -474,21 +563,308 @@ class BedrockFAISSIndexer:
         if self.index is None:
             raise ValueError("No index available. Please process documents first.")
         
+        allowed = self.filter_ids(filters)
+        if allowed is not None and not len(allowed):
+            return []
+        
         # Encode query using Bedrock
-        query_embedding = self.get_embedding(query)
-        query_embedding = np.array([query_embedding], dtype=np.float32)
-        faiss.normalize_L2(query_embedding)
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
         
         # Search
-        scores, indices = self.index.search(query_embedding, k)
+        fetch_k = min(max(k * 4, 20), self.index.ntotal) if mmr else k
+        with stage("faiss_search"):
+            ids, scores = self._vector_candidates(query_embedding, fetch_k, threshold, allowed, range_search)
+            keep = scores >= self._min_scores(ids, threshold)
+            ids, scores = ids[keep], scores[keep]
+            order = self._mmr_order(ids, scores, k, mmr_lambda) if mmr else range(min(k, len(ids)))
+            results = [(self.documents[ids[pos]], float(scores[pos])) for pos in order]
+        
+        return results
+    
+    def _vector_candidates(self, query_embedding: np.ndarray, fetch_k: int, threshold: Optional[float],
+                           allowed: Optional[np.ndarray], range_search: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        FAISS candidates as (ids, cosine scores), best first
+        
+        A range search returns everything above the lowest applicable threshold (at
+        most RANGE_SEARCH_CAP); otherwise the fetch_k nearest documents are returned.
+        """
+        params = self._search_params(allowed)
+        if range_search:
+            radius = threshold if threshold is not None else float(self._min_scores(None, None).min())
+            # FAISS keeps inner products strictly above the radius
+            _, scores, indices = self.index.range_search(query_embedding, np.nextafter(radius, -np.inf),
+                                                         params=params)
+            order = np.argsort(-scores, kind="stable")[:max(fetch_k, RANGE_SEARCH_CAP)]
+            ids, scores = indices[order].astype(np.int64), scores[order]
+        else:
+            scores, indices = self.index.search(query_embedding, fetch_k, params=params)
+            ids, scores = indices[0], scores[0]
+        keep = (ids >= 0) & (ids < len(self.documents))
+        return ids[keep], scores[keep]
+    
+    def source_thresholds(self) -> dict:
+        """
+        Calibrated minimum cosine similarity per document source
+        
+        For each source, the pairwise similarities of (a sample of) its documents show
+        how close two unrelated documents of that source typically are; a hit has to
+        beat the CALIBRATION_PERCENTILE of them, clamped to
+        [MIN_CALIBRATED_THRESHOLD, MAX_CALIBRATED_THRESHOLD]. Computed from the stored
+        vectors when the index is saved and loaded with it; recomputed only when
+        documents were added since (or for indexes saved before thresholds were).
+        """
+        return self._calibration()["by_source"]
+    
+    def _calibration(self) -> dict:
+        count = min(len(self.documents), self.index.ntotal if self.index is not None else 0)
+        if self._thresholds is None or self._thresholds["count"] != count:
+            self._set_thresholds(count, self._calibrate(count))
+        return self._thresholds
+    
+    def _calibrate(self, count: int) -> dict:
+        """Per-source thresholds computed from the first count stored vectors"""
+        sources = self._metadata_columns()["source"][:count]
+        rng = np.random.default_rng(0)
+        by_source = {}
+        for source in np.unique(sources):
+            ids = np.flatnonzero(sources == source)
+            threshold = DEFAULT_THRESHOLD
+            if len(ids) > 2:
+                sample = np.sort(rng.choice(ids, CALIBRATION_SAMPLE, replace=False)) \
+                    if len(ids) > CALIBRATION_SAMPLE else ids
+                vectors = self.index.reconstruct_batch(sample.astype(np.int64))
+                similarity = vectors @ vectors.T
+                unrelated = similarity[~np.eye(len(sample), dtype=bool)]
+                threshold = float(np.clip(np.percentile(unrelated, CALIBRATION_PERCENTILE),
+                                          MIN_CALIBRATED_THRESHOLD, MAX_CALIBRATED_THRESHOLD))
+            by_source[str(source)] = round(threshold, 4)
+        return by_source
+    
+    def _set_thresholds(self, count: int, by_source: dict) -> None:
+        sources = self._metadata_columns()["source"][:count]
+        per_doc = np.full(count, DEFAULT_THRESHOLD, dtype=np.float32)
+        for source, threshold in by_source.items():
+            per_doc[sources == source] = threshold
+        self._thresholds = {"count": count, "by_source": by_source, "per_doc": per_doc}
+    
+    def _min_scores(self, ids: Optional[np.ndarray], threshold: Optional[float]) -> np.ndarray:
+        """Minimum score for each of ids (all documents if None): threshold, or calibrated"""
+        if threshold is not None:
+            return np.full(len(self.documents) if ids is None else len(ids), threshold, dtype=np.float32)
+        per_doc = self._calibration()["per_doc"]
+        if ids is None:
+            return per_doc if len(per_doc) else np.array([DEFAULT_THRESHOLD], dtype=np.float32)
+        return per_doc[ids]
+    
+    def _mmr_order(self, ids: np.ndarray, relevance: np.ndarray, k: int,
+                   mmr_lambda: float) -> List[int]:
+        """
+        Positions (into ids) of up to k candidates chosen by maximal marginal relevance
+        
+        Each step picks the candidate maximizing
+        mmr_lambda * relevance - (1 - mmr_lambda) * max cosine to the already chosen ones,
+        using the vectors stored in the FAISS index (no Bedrock calls).
+        """
+        if len(ids) <= 1:
+            return list(range(len(ids)))
+        vectors = self.index.reconstruct_batch(np.asarray(ids, dtype=np.int64))
+        similarity = vectors @ vectors.T
+        relevance = np.asarray(relevance, dtype=np.float32)
+        
+        chosen = [int(np.argmax(relevance))]
+        available = np.ones(len(ids), dtype=bool)
+        available[chosen[0]] = False
+        max_similarity = similarity[chosen[0]].copy()
+        while len(chosen) < min(k, len(ids)):
+            marginal = mmr_lambda * relevance - (1.0 - mmr_lambda) * max_similarity
+            marginal[~available] = -np.inf
+            pick = int(np.argmax(marginal))
+            chosen.append(pick)
+            available[pick] = False
+            np.maximum(max_similarity, similarity[pick], out=max_similarity)
+        return chosen
+    
+    def _metadata_columns(self) -> dict:
+        """Document metadata as NumPy arrays (rebuilt when documents were added)"""
+        if self._metadata is None or self._metadata["count"] != len(self.documents):
+            self._metadata = {
+                "count": len(self.documents),
+                "source": np.array([doc.get('source') or "" for doc in self.documents], dtype=object),
+                "file_name": np.array([doc.get('file_name') or "" for doc in self.documents], dtype=object),
+                "is_table": np.array([bool(doc.get('is_table')) for doc in self.documents], dtype=bool),
+                "page": np.array([doc.get('page') or 0 for doc in self.documents], dtype=np.int32),
+            }
+        return self._metadata
+    
+    def filter_ids(self, filters: Optional[dict]) -> Optional[np.ndarray]:
+        """
+        Ids of the documents matching filters, or None when filters is empty
+        
+        Args:
+            filters: Any of source ('csv'/'pdf'), file_name, is_table (bool) and
+                pages ((first, last) page range, inclusive; PDF only)
+        """
+        if not filters:
+            return None
+        unknown = set(filters) - {"source", "file_name", "is_table", "pages"}
+        if unknown:
+            raise ValueError(f"Unknown search filters: {sorted(unknown)}")
+        
+        columns = self._metadata_columns()
+        mask = np.ones(columns["count"], dtype=bool)
+        if filters.get("source") is not None:
+            mask &= columns["source"] == filters["source"]
+        if filters.get("file_name") is not None:
+            mask &= columns["file_name"] == filters["file_name"]
+        if filters.get("is_table") is not None:
+            mask &= columns["is_table"] == bool(filters["is_table"])
+        if filters.get("pages") is not None:
+            first, last = filters["pages"]
+            mask &= (columns["page"] >= first) & (columns["page"] <= last)
+        return np.flatnonzero(mask).astype(np.int64)
+    
+    @staticmethod
+    def _search_params(ids: Optional[np.ndarray]):
+        """FAISS search parameters restricting the search to ids (None = everything)"""
+        if ids is None:
+            return None
+        return faiss.SearchParameters(sel=faiss.IDSelectorBatch(ids))
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed a query with Bedrock as a normalized (1, d) float32 array"""
+        query_embedding = np.array([self.get_embedding(query)], dtype=np.float32)
+        faiss.normalize_L2(query_embedding)
+        return query_embedding
+    
+    def lexical_search(self, query: str, k: int = 5,
+                       threshold: float = LEXICAL_MIN_SCORE) -> List[Tuple[dict, float]]:
+        """
+        BM25-only search, for when Bedrock embeddings are unavailable
+        
+        Returns:
+            List of tuples (document, normalized BM25 score)
+        """
+        bm25 = self._ensure_bm25()
+        with stage("lexical_search"):
+            hits = bm25.search(query, k)
+        return [(self.documents[i], score) for i, score in hits if score >= threshold and i < len(self.documents)]
+    
+    def lexical_shortcut(self, query: str, k: int = 5, threshold: float = LEXICAL_MIN_SCORE,
+                         lexical_confidence: float = 0.6,
+                         lexical_margin: float = 0.15) -> Optional[List[Tuple[dict, float]]]:
+        """
+        BM25 results when they are confident enough to skip embeddings, else None
         
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if score >= threshold and idx < len(self.documents):
-                results.append((self.documents[idx], float(score)))
+        Same rule and arguments as hybrid_search, which applies it first; callers that
+        need the query embedding for something else can check this before embedding.
+        """
+        bm25 = self._ensure_bm25()
+        with stage("lexical_search"):
+            lexical = bm25.score(query)
+            ranked = np.argsort(-lexical)
+        return self._confident_lexical(lexical, ranked, k, threshold, lexical_confidence, lexical_margin)
+    
+    def _confident_lexical(self, lexical: np.ndarray, ranked: np.ndarray, k: int, threshold: float,
+                           lexical_confidence: float,
+                           lexical_margin: float) -> Optional[List[Tuple[dict, float]]]:
+        best = float(lexical[ranked[0]]) if ranked.size else 0.0
+        runner_up = float(lexical[ranked[1]]) if ranked.size > 1 else 0.0
+        if best >= lexical_confidence and best - runner_up >= lexical_margin:
+            return [
+                (self.documents[i], float(lexical[i]))
+                for i in ranked[:k]
+                if lexical[i] >= threshold and i < len(self.documents)
+            ]
+        return None
+    
+    def hybrid_search(self, query: str, k: int = 5, threshold: Optional[float] = None,
+                      alpha: float = 0.7, lexical_confidence: float = 0.6,
+                      lexical_margin: float = 0.15,
+                      query_embedding: Optional[np.ndarray] = None, mmr: bool = False,
+                      mmr_lambda: float = 0.5, filters: Optional[dict] = None,
+                      range_search: bool = False) -> List[Tuple[dict, float]]:
+        """
+        Search with BM25 first and Bedrock embeddings only when needed
+        
+        A confident lexical hit (best BM25 score >= lexical_confidence and ahead of the
+        runner-up by lexical_margin) is returned without any embedding call. Otherwise
+        FAISS candidates are re-scored as max(cosine, alpha * cosine + (1 - alpha) * bm25),
+        so lexical evidence can lift a candidate but never sinks a good vector match.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            threshold: Minimum (fused) score; None uses the calibrated per-source
+                thresholds, and LEXICAL_MIN_SCORE for confident lexical hits
+            alpha: Weight of the cosine score in the fusion
+            lexical_confidence: Normalized BM25 score that counts as a confident hit
+            lexical_margin: Required lead of the best BM25 score over the second best
+            query_embedding: Precomputed embed_query(query), to skip the Bedrock call
+            mmr: Diversify the fused candidates with maximal marginal relevance (see search)
+            mmr_lambda: MMR trade-off, 1.0 = pure relevance, 0.0 = pure diversity
+            filters: Only search documents matching these (see filter_ids)
+            range_search: Take every FAISS candidate above the threshold (see search)
+                instead of a fixed number of nearest ones
+            
+        Returns:
+            List of tuples (document, score)
+        """
+        if self.index is None:
+            raise ValueError("No index available. Please process documents first.")
+        
+        allowed = self.filter_ids(filters)
+        if allowed is not None and not len(allowed):
+            return []
+        
+        bm25 = self._ensure_bm25()
+        with stage("lexical_search"):
+            lexical = bm25.score(query)
+            if allowed is not None:
+                restricted = np.zeros_like(lexical)
+                restricted[allowed] = lexical[allowed]
+                lexical = restricted
+            ranked = np.argsort(-lexical)
+        
+        lexical_threshold = LEXICAL_MIN_SCORE if threshold is None else threshold
+        confident = self._confident_lexical(lexical, ranked, k, lexical_threshold,
+                                            lexical_confidence, lexical_margin)
+        if confident is not None:
+            return confident
+        
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
+        fetch_k = min(max(k * 4, 20), self.index.ntotal)
+        with stage("faiss_search"):
+            ids, scores = self._vector_candidates(query_embedding, fetch_k, threshold, allowed, range_search)
+            cosine = dict(zip(ids.tolist(), scores.tolist()))
+            
+            # Strong lexical candidates FAISS did not return get their exact cosine
+            for i in ranked[:fetch_k]:
+                if lexical[i] <= 0:
+                    break
+                if int(i) not in cosine:
+                    cosine[int(i)] = float(self.index.reconstruct(int(i)) @ query_embedding[0])
+            
+            ids = np.fromiter(cosine.keys(), dtype=np.int64, count=len(cosine))
+            cos = np.fromiter(cosine.values(), dtype=np.float32, count=len(cosine))
+            fused = np.maximum(cos, alpha * cos + (1.0 - alpha) * lexical[ids])
+            keep = ids < len(self.documents)
+            ids, fused = ids[keep], fused[keep]
+            keep = fused >= self._min_scores(ids, threshold)
+            ids, fused = ids[keep], fused[keep]
+            order = self._mmr_order(ids, fused, k, mmr_lambda) if mmr else np.argsort(-fused)[:k]
+            results = [(self.documents[ids[pos]], float(fused[pos])) for pos in order]
         
         return results
     
+    def _ensure_bm25(self) -> BM25Index:
+        """Return the BM25 index, rebuilding it if documents changed since it was built"""
+        if self.bm25 is None or self.bm25.num_docs != len(self.documents):
+            self.bm25 = BM25Index.build([doc.get('text', '') for doc in self.documents])
+        return self.bm25
+    
     def save_index(self, index_path: str = "bedrock_faiss_index") -> None:
         """
         Save FAISS index and documents to disk
@@ -506,6 +882,20 @@ class BedrockFAISSIndexer:
         with open(f"{index_path}_documents.pkl", 'wb') as f:
             pickle.dump(self.documents, f)
         
+        # Save exact-match FAQ lookup
+        self._build_faq_lookup()
+        with open(f"{index_path}_faq_lookup.pkl", 'wb') as f:
+            pickle.dump(self.faq_lookup, f)
+        
+        # Save BM25 inverted index
+        with open(f"{index_path}_bm25.pkl", 'wb') as f:
+            pickle.dump(self._ensure_bm25().to_dict(), f)
+        
+        # Save calibrated similarity thresholds
+        calibration = self._calibration()
+        with open(f"{index_path}_thresholds.pkl", 'wb') as f:
+            pickle.dump({"count": calibration["count"], "by_source": calibration["by_source"]}, f)
+        
         logging.info(f"✅ Index saved to {index_path}")
     
     def load_index(self, index_path: str = "bedrock_faiss_index") -> None:
@@ -522,8 +912,79 @@ class BedrockFAISSIndexer:
         with open(f"{index_path}_documents.pkl", 'rb') as f:
             self.documents = pickle.load(f)
         
+        # Load exact-match FAQ lookup (rebuilt for indexes saved before it existed)
+        faq_lookup_file = f"{index_path}_faq_lookup.pkl"
+        if os.path.exists(faq_lookup_file):
+            with open(faq_lookup_file, 'rb') as f:
+                self.faq_lookup = pickle.load(f)
+        else:
+            self._build_faq_lookup()
+        
+        # Load BM25 inverted index (rebuilt for indexes saved before it existed)
+        bm25_file = f"{index_path}_bm25.pkl"
+        self.bm25 = None
+        if os.path.exists(bm25_file):
+            with open(bm25_file, 'rb') as f:
+                self.bm25 = BM25Index.from_dict(pickle.load(f))
+        self._ensure_bm25()
+        
+        # Load calibrated thresholds (calibrated on first use for indexes saved before them)
+        thresholds_file = f"{index_path}_thresholds.pkl"
+        self._thresholds = None
+        if os.path.exists(thresholds_file):
+            with open(thresholds_file, 'rb') as f:
+                thresholds = pickle.load(f)
+            self._set_thresholds(thresholds["count"], thresholds["by_source"])
+        
         logging.info(f"✅ Index loaded from {index_path}")
     
+    def _build_faq_lookup(self) -> None:
+        """
+        Map normalized CSV questions to document ids (first occurrence wins)
+
+        Questions of FAQ rows dropped as near-duplicates map to the row that was kept,
+        unless an indexed row has the same question.
+        """
+        self.faq_lookup = {}
+        duplicates = []
+        for doc_id, doc in enumerate(self.documents):
+            if doc.get('source') != 'csv':
+                continue
+            self._add_faq_question(doc.get('question'), doc_id)
+            duplicates.extend((location.get('question'), doc_id) for location in doc.get('duplicates', [])
+                              if location.get('source') == 'csv')
+        for question, doc_id in duplicates:
+            self._add_faq_question(question, doc_id)
+
+    def _add_faq_question(self, question: Optional[str], doc_id: int) -> None:
+        if not question or question == 'nan':
+            return
+        key = normalize_question(question)
+        if key and key not in self.faq_lookup:
+            self.faq_lookup[key] = doc_id
+    
+    def exact_match_id(self, query: str) -> Optional[int]:
+        """Id of the FAQ document whose normalized question equals the normalized query, or None"""
+        doc_id = self.faq_lookup.get(normalize_question(query))
+        if doc_id is None or doc_id >= len(self.documents):
+            return None
+        return doc_id
+    
+    def lookup_exact(self, query: str) -> Optional[Tuple[dict, float]]:
+        """
+        Exact-match FAQ lookup that needs no embedding call
+        
+        Args:
+            query: User query
+            
+        Returns:
+            (document, 1.0) when the normalized query equals a normalized FAQ question, else None
+        """
+        doc_id = self.exact_match_id(query)
+        if doc_id is None:
+            return None
+        return self.documents[doc_id], 1.0
+    
     def get_stats(self) -> dict:
         """
         Get index statistics
@@ -538,7 +999,29 @@ class BedrockFAISSIndexer:
             "total_documents": len(self.documents),
             "index_size": self.index.ntotal,
             "dimension": self.index.d,
-            "sources": list(set(doc.get('source', 'unknown') for doc in self.documents))
+            "sources": list(set(doc.get('source', 'unknown') for doc in self.documents)),
+            "faq_lookup_entries": len(self.faq_lookup),
+            "thresholds": self.source_thresholds(),
+            "dedup": self.get_dedup_stats()
+        }
+    
+    def get_dedup_stats(self) -> dict:
+        """
+        Savings from near-duplicate elimination in this indexer's lifetime
+        
+        Returns:
+            Dictionary with texts checked, duplicates skipped and the embedding calls
+            and FAISS index bytes that were not spent on them
+        """
+        if self.dedup is None:
+            return {"enabled": False}
+        dimension = self.index.d if self.index is not None else 0
+        return {
+            "enabled": True,
+            "texts_checked": self.dedup.checked,
+            "near_duplicates_skipped": self.dedup.duplicates,
+            "embedding_calls_saved": self.dedup.duplicates,
+            "index_bytes_saved": self.dedup.duplicates * dimension * 4
         }
     
     def _chunk_text(self, text: str, max_chunk_size: int = 600, overlap: int = 100) -> List[str]:
@@ -595,6 +1078,10 @@ class BedrockFAISSIndexer:
             if chunk and len(chunk) > 20:  # Only meaningful chunks (reduced threshold for tables)
                 chunks.append(chunk)
             
+            # The last chunk reached the end; stepping back by `overlap` would only
+            # emit a suffix of it (an exact duplicate that still costs an embedding)
+            if end >= len(text):
+                break
             start = end - overlap
             if start >= len(text):
                 break
@@ -1,13 +1,18 @@
 from bedrock_faiss_indexer import BedrockFAISSIndexer
-import boto3
+from bedrock_client import get_bedrock_runtime_client, TEXT_MODEL_ID
+from perf_stages import stage
+from single_flight import SingleFlight
 import json
 import logging
 import os
-from typing import Tuple, Optional
+from typing import Iterator, Tuple, Optional
 
 # Global FAISS indexer instance
 bedrock_indexer = None
 
+# Concurrent generations for the same question and context share one Titan call
+generation_flight = SingleFlight("generation")
+
 def initialize_bedrock_index(csv_path: str = "data/Faq.csv", 
                            index_path: str = "bedrock_faiss_index",
                            force_rebuild: bool = False) -> BedrockFAISSIndexer:
@@ -43,13 +48,29 @@ def initialize_bedrock_index(csv_path: str = "data/Faq.csv",
     
     return bedrock_indexer
 
-def get_answer_bedrock(user_query: str, threshold: float = 0.35) -> Tuple[Optional[str], Optional[str]]:
+def index_generation(index_path: str = "bedrock_faiss_index") -> int:
+    """
+    Identifier of the index currently on disk (its modification time in ns)
+
+    Changes whenever the index is rebuilt or extended, so document ids handed out
+    against one generation can be recognized as stale later. 0 if there is no index.
+    """
+    try:
+        return os.stat(f"{index_path}.faiss").st_mtime_ns
+    except OSError:
+        return 0
+
+def get_answer_bedrock(user_query: str, threshold: Optional[float] = None,
+                       filters: Optional[dict] = None) -> Tuple[Optional[str], Optional[str]]:
     """
     Get answer using Bedrock FAISS search
     
     Args:
         user_query: User's question
-        threshold: Minimum similarity score
+        threshold: Minimum similarity score; None uses the index's calibrated
+            per-source thresholds (see BedrockFAISSIndexer.source_thresholds)
+        filters: Restrict the search, e.g. {"source": "csv"} or {"file_name": "manual.pdf"}
+            (see BedrockFAISSIndexer.filter_ids)
         
     Returns:
         Tuple of (concise_answer, detailed_answer) or (None, None)
@@ -60,15 +81,22 @@ def get_answer_bedrock(user_query: str, threshold: float = 0.35) -> Tuple[Option
         bedrock_indexer = initialize_bedrock_index()
     
     try:
-        # Search for similar documents
-        results = bedrock_indexer.search(user_query, k=3, threshold=threshold)
+        # Exact FAQ matches skip the embedding call entirely
+        doc_id = bedrock_indexer.exact_match_id(user_query)
+        if doc_id is not None and filters and doc_id not in bedrock_indexer.filter_ids(filters):
+            doc_id = None
+        if doc_id is not None:
+            results = [(bedrock_indexer.documents[doc_id], 1.0)]
+        else:
+            # Search for similar documents
+            results = bedrock_indexer.hybrid_search(user_query, k=3, threshold=threshold, filters=filters)
         
         if results:
             # Get best match
             best_doc, best_score = results[0]
             
             if best_doc['source'] == 'csv':
-                return best_doc['answer'], best_doc['details']
+                return best_doc['answer'], best_doc.get('long_answer') or best_doc['details']
             else:
                 # For PDF documents, return the text
                 return best_doc['text'], best_doc['text']
@@ -79,6 +107,56 @@ def get_answer_bedrock(user_query: str, threshold: float = 0.35) -> Tuple[Option
         logging.error(f"❌ Error in Bedrock search: {e}")
         return None, None
 
+def _build_generation_body(user_query: str, context: str) -> str:
+    """Titan Text Lite request body for answering user_query from context"""
+    # Create prompt with context
+    prompt = f"""Based on the following context about Nibav Lifts, answer the user's question.
+
+Context: {context}
+
+User Question: {user_query}
+
+Please provide a helpful and accurate answer based on the context provided. If the context doesn't contain enough information to answer the question, please say so.
+
+Answer:"""
+    
+    return json.dumps({
+        "inputText": prompt,
+        "textGenerationConfig": {
+            "maxTokenCount": 512,
+            "stopSequences": [],
+            "temperature": 0.7,
+            "topP": 0.9
+        }
+    })
+
+def invoke_generation(user_query: str, context: str) -> str:
+    """
+    Titan Text Lite answer for user_query from context, raising on Bedrock errors
+    
+    Identical concurrent requests share one call. Use generate_answer_with_bedrock
+    when an apology text is an acceptable answer.
+    """
+    with stage("generation"):
+        return generation_flight.do((TEXT_MODEL_ID, user_query, context),
+                                    lambda: _invoke_generation(user_query, context))
+
+def _invoke_generation(user_query: str, context: str) -> str:
+    bedrock = get_bedrock_runtime_client()
+    body = _build_generation_body(user_query, context)
+    
+    response = bedrock.invoke_model(
+        body=body,
+        modelId=TEXT_MODEL_ID,
+        accept="application/json",
+        contentType="application/json"
+    )
+    
+    response_body = json.loads(response.get('body').read())
+    generated_text = response_body['results'][0]['outputText']
+    
+    return generated_text.strip()
+
 def generate_answer_with_bedrock(user_query: str, context: str) -> str:
     """
     Generate answer using Bedrock Titan Text Lite model
@@ -91,48 +169,45 @@ def generate_answer_with_bedrock(user_query: str, context: str) -> str:
         Generated answer
     """
     try:
-        bedrock = boto3.client(
-            service_name='bedrock-runtime',
-            region_name='ap-south-1'
-        )
-        
-        # Create prompt with context
-        prompt = f"""Based on the following context about Nibav Lifts, answer the user's question.
-
-Context: {context}
-
-User Question: {user_query}
-
-Please provide a helpful and accurate answer based on the context provided. If the context doesn't contain enough information to answer the question, please say so.
-
-Answer:"""
-        
-        body = json.dumps({
-            "inputText": prompt,
-            "textGenerationConfig": {
-                "maxTokenCount": 512,
-                "stopSequences": [],
-                "temperature": 0.7,
-                "topP": 0.9
-            }
-        })
-        
-        response = bedrock.invoke_model(
-            body=body,
-            modelId="amazon.titan-text-lite-v1",
-            accept="application/json",
-            contentType="application/json"
-        )
-        
-        response_body = json.loads(response.get('body').read())
-        generated_text = response_body['results'][0]['outputText']
-        
-        return generated_text.strip()
+        return invoke_generation(user_query, context)
         
     except Exception as e:
         logging.error(f"❌ Error generating answer with Bedrock: {e}")
         return "I apologize, but I'm unable to generate an answer at the moment."
 
+def stream_answer_with_bedrock(user_query: str, context: str) -> Iterator[str]:
+    """
+    Generate answer with Bedrock Titan Text Lite, yielding text as it is produced
+    
+    Uses invoke_model_with_response_stream, so the first words arrive after the
+    model's time-to-first-token instead of after the whole completion.
+    
+    Args:
+        user_query: User's question
+        context: Context information from FAISS search
+        
+    Yields:
+        Pieces of the generated answer, in order
+        
+    Raises:
+        Exception from Bedrock; callers decide how to end their own stream
+    """
+    bedrock = get_bedrock_runtime_client()
+    response = bedrock.invoke_model_with_response_stream(
+        body=_build_generation_body(user_query, context),
+        modelId=TEXT_MODEL_ID,
+        accept="application/json",
+        contentType="application/json"
+    )
+    
+    for event in response.get('body'):
+        chunk = event.get('chunk')
+        if not chunk:
+            continue
+        text = json.loads(chunk['bytes']).get('outputText')
+        if text:
+            yield text
+
 def add_pdf_to_bedrock_index(pdf_path: str, index_path: str = "bedrock_faiss_index") -> bool:
     """
     Add PDF file to existing Bedrock FAISS index
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Local AWS Bedrock stand-in for offline development and benchmarking
+
+Serves the bedrock-runtime InvokeModel and InvokeModelWithResponseStream REST APIs
+with deterministic responses:
+- amazon.titan-embed-text-*: hash-derived (feature hashing) embeddings, so identical
+  texts always get identical vectors and texts sharing words stay close
+- amazon.titan-text-*: text assembled from the prompt's context section
+
+Latency, jitter and throttling are configurable so throughput work can be measured
+reproducibly without AWS.
+
+Usage:
+    python bedrock_stub.py --port 8089 --latency-ms 40 --throttle-rate 0.05
+    export BEDROCK_ENDPOINT_URL=http://127.0.0.1:8089
+"""
+
+import argparse
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import random
+import re
+import struct
+import threading
+import time
+import urllib.parse
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+DEFAULT_DIMENSION = 1024  # Titan Embeddings V2 default output size
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class StubConfig:
+    def __init__(self, dimension: int = DEFAULT_DIMENSION, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, token_latency_ms: float = 0.0,
+                 throttle_rate: float = 0.0, max_rps: float = 0.0, seed: int = 0,
+                 slow_rate: float = 0.0, slow_latency_ms: float = 0.0):
+        """
+        Stub behaviour settings
+
+        Args:
+            dimension: Embedding size returned when the request does not ask for one
+            latency_ms: Base latency added to every invocation
+            jitter_ms: Maximum extra random latency (seeded, so runs are reproducible)
+            token_latency_ms: Extra latency per generated token for text models
+            throttle_rate: Fraction of requests rejected with ThrottlingException
+            max_rps: Reject requests above this many per second (0 = unlimited)
+            seed: Seed for jitter and throttling decisions
+            slow_rate: Fraction of requests that get slow_latency_ms extra (a latency tail)
+            slow_latency_ms: Extra latency of the slow requests
+        """
+        self.dimension = dimension
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.token_latency_ms = token_latency_ms
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.seed = seed
+        self.slow_rate = slow_rate
+        self.slow_latency_ms = slow_latency_ms
+
+
+def _tokenize(text: str) -> list:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _hash_bucket(feature: str, dimension: int) -> tuple:
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dimension, 1.0 if (value >> 63) & 1 else -1.0
+
+
+def deterministic_embedding(text: str, dimension: int = DEFAULT_DIMENSION) -> list:
+    """
+    Hash-derived embedding for text
+
+    Words and their character trigrams are hashed into signed buckets (the hashing
+    trick), so the vector is fully determined by the text and lexically similar texts
+    get a high cosine similarity. The result is L2-normalised like Titan V2 output.
+    """
+    vector = np.zeros(dimension, dtype=np.float32)
+    for token in _tokenize(text):
+        bucket, sign = _hash_bucket(f"w:{token}", dimension)
+        vector[bucket] += 2.0 * sign
+        padded = f"#{token}#"
+        for i in range(len(padded) - 2):
+            bucket, sign = _hash_bucket(f"c:{padded[i:i + 3]}", dimension)
+            vector[bucket] += 0.5 * sign
+
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0:
+        # Empty or symbol-only input: fall back to a vector seeded from the raw text
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+        norm = float(np.linalg.norm(vector))
+    return (vector / norm).tolist()
+
+
+def deterministic_completion(prompt: str, max_tokens: int = 512) -> str:
+    """
+    Deterministic Titan Text style completion
+
+    Answers with the leading sentences of the prompt's "Context:" section (the format
+    used by generate_answer_with_bedrock), capped at max_tokens words.
+    """
+    match = re.search(r"Context:\s*(.*?)\s*User Question:", prompt, re.DOTALL)
+    source = match.group(1) if match else prompt
+    words = source.split()
+    if not words:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        words = f"I do not have enough information to answer that ({digest}).".split()
+    return " ".join(words[:max_tokens])
+
+
+def encode_event_stream_message(headers: dict, payload: bytes) -> bytes:
+    """Encode one application/vnd.amazon.eventstream message (string headers only)"""
+    encoded_headers = b""
+    for name, value in headers.items():
+        name_bytes, value_bytes = name.encode("utf-8"), value.encode("utf-8")
+        encoded_headers += struct.pack(">B", len(name_bytes)) + name_bytes
+        encoded_headers += struct.pack(">BH", 7, len(value_bytes)) + value_bytes
+    total_length = 12 + len(encoded_headers) + len(payload) + 4
+    prelude = struct.pack(">II", total_length, len(encoded_headers))
+    prelude += struct.pack(">I", binascii.crc32(prelude) & 0xFFFFFFFF)
+    message = prelude + encoded_headers + payload
+    return message + struct.pack(">I", binascii.crc32(message) & 0xFFFFFFFF)
+
+
+def encode_stream_chunk(chunk: dict) -> bytes:
+    """Wrap a Titan streaming chunk the way InvokeModelWithResponseStream delivers it"""
+    payload = json.dumps({"bytes": base64.b64encode(json.dumps(chunk).encode("utf-8")).decode("ascii")})
+    headers = {":event-type": "chunk", ":content-type": "application/json", ":message-type": "event"}
+    return encode_event_stream_message(headers, payload.encode("utf-8"))
+
+
+class BedrockStubState:
+    """Shared counters, RNG and rate-limit window for one stub server"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.rng = random.Random(config.seed)
+        self.request_times = deque()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {"invocations": 0, "throttled": 0, "by_model": {}}
+
+    def snapshot_stats(self) -> dict:
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+    def admit(self, model_id: str) -> tuple:
+        """Record a request and decide whether to throttle it; returns (throttled, delay_s)"""
+        config = self.config
+        with self.lock:
+            now = time.monotonic()
+            self.stats["invocations"] += 1
+            per_model = self.stats["by_model"].setdefault(model_id, {"invocations": 0, "throttled": 0})
+            per_model["invocations"] += 1
+
+            throttled = config.throttle_rate > 0 and self.rng.random() < config.throttle_rate
+            if config.max_rps > 0:
+                while self.request_times and now - self.request_times[0] >= 1.0:
+                    self.request_times.popleft()
+                if len(self.request_times) >= config.max_rps:
+                    throttled = True
+                else:
+                    self.request_times.append(now)
+
+            if throttled:
+                self.stats["throttled"] += 1
+                per_model["throttled"] += 1
+
+            delay_ms = config.latency_ms
+            if config.jitter_ms > 0:
+                delay_ms += self.rng.random() * config.jitter_ms
+            if config.slow_rate > 0 and self.rng.random() < config.slow_rate:
+                delay_ms += config.slow_latency_ms
+        return throttled, delay_ms / 1000.0
+
+
+class BedrockStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "BedrockStub/1.0"
+    # Headers and body go out in separate writes; without this Nagle + delayed ACK add ~40ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logging.debug("bedrock-stub: " + format, *args)
+
+    @property
+    def state(self) -> BedrockStubState:
+        return self.server.stub_state
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, error_type: str, message: str):
+        self._send_json(status, {"message": message}, {"x-amzn-ErrorType": f"{error_type}:"})
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.state.snapshot_stats())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_error(404, "ResourceNotFoundException", f"Unknown path {self.path}")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+
+        if self.path == "/stats/reset":
+            self.state.reset_stats()
+            self._send_json(200, {"reset": True})
+            return
+
+        match = re.match(r"^/model/([^/]+)/(invoke|invoke-with-response-stream)$", self.path)
+        if not match:
+            self._send_error(404, "ResourceNotFoundException", f"Unknown path {self.path}")
+            return
+
+        model_id = urllib.parse.unquote(match.group(1))
+        streaming = match.group(2) == "invoke-with-response-stream"
+        try:
+            request = json.loads(raw_body or b"{}")
+        except ValueError:
+            self._send_error(400, "ValidationException", "Malformed input request")
+            return
+
+        throttled, delay_s = self.state.admit(model_id)
+        if throttled:
+            self._send_error(429, "ThrottlingException", "Too many requests, please wait before trying again.")
+            return
+
+        if "embed" in model_id and not streaming:
+            self._invoke_embedding(request, delay_s)
+        elif "text" in model_id and streaming:
+            self._invoke_text_stream(request, delay_s)
+        elif "text" in model_id:
+            self._invoke_text(request, delay_s)
+        else:
+            self._send_error(400, "ValidationException", f"The provided model identifier is invalid: {model_id}")
+
+    def _invoke_embedding(self, request: dict, delay_s: float):
+        text = request.get("inputText")
+        if not isinstance(text, str):
+            self._send_error(400, "ValidationException", "inputText is required")
+            return
+        dimension = int(request.get("dimensions") or self.state.config.dimension)
+        time.sleep(delay_s)
+        self._send_json(200, {
+            "embedding": deterministic_embedding(text, dimension),
+            "inputTextTokenCount": len(_tokenize(text)),
+        })
+
+    def _invoke_text(self, request: dict, delay_s: float):
+        prompt = request.get("inputText")
+        if not isinstance(prompt, str):
+            self._send_error(400, "ValidationException", "inputText is required")
+            return
+        config = request.get("textGenerationConfig") or {}
+        output = deterministic_completion(prompt, int(config.get("maxTokenCount", 512)))
+        token_count = len(output.split())
+        time.sleep(delay_s + token_count * self.state.config.token_latency_ms / 1000.0)
+        self._send_json(200, {
+            "inputTextTokenCount": len(_tokenize(prompt)),
+            "results": [{
+                "tokenCount": token_count,
+                "outputText": output,
+                "completionReason": "FINISH",
+            }],
+        })
+
+
+    def _invoke_text_stream(self, request: dict, delay_s: float, words_per_chunk: int = 4):
+        prompt = request.get("inputText")
+        if not isinstance(prompt, str):
+            self._send_error(400, "ValidationException", "inputText is required")
+            return
+        config = request.get("textGenerationConfig") or {}
+        words = deterministic_completion(prompt, int(config.get("maxTokenCount", 512))).split()
+        token_delay_s = self.state.config.token_latency_ms / 1000.0
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.amazon.eventstream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(delay_s)
+
+        for start in range(0, len(words), words_per_chunk):
+            piece = words[start:start + words_per_chunk]
+            time.sleep(len(piece) * token_delay_s)
+            last = start + words_per_chunk >= len(words)
+            message = encode_stream_chunk({
+                "outputText": (" " if start else "") + " ".join(piece),
+                "index": 0,
+                "totalOutputTextTokenCount": start + len(piece),
+                "completionReason": "FINISH" if last else None,
+                "inputTextTokenCount": len(_tokenize(prompt)) if start == 0 else None,
+            })
+            self.wfile.write(f"{len(message):X}\r\n".encode("ascii") + message + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class BedrockStubServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: StubConfig = None):
+        """
+        Threaded HTTP server speaking the bedrock-runtime invoke APIs
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            config: StubConfig with latency/throttling settings
+        """
+        self.httpd = ThreadingHTTPServer((host, port), BedrockStubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub_state = BedrockStubState(config or StubConfig())
+        self._thread = None
+
+    @property
+    def endpoint_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def state(self) -> BedrockStubState:
+        return self.httpd.stub_state
+
+    def start(self) -> "BedrockStubServer":
+        """Serve in a background thread (for in-process tests and benchmarks)"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local AWS Bedrock stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--dimension", type=int, default=DEFAULT_DIMENSION)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--token-latency-ms", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    config = StubConfig(
+        dimension=args.dimension,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        token_latency_ms=args.token_latency_ms,
+        throttle_rate=args.throttle_rate,
+        max_rps=args.max_rps,
+        seed=args.seed,
+        slow_rate=args.slow_rate,
+        slow_latency_ms=args.slow_latency_ms,
+    )
+    server = BedrockStubServer(args.host, args.port, config)
+    print(f"🧪 Bedrock stub listening on {server.endpoint_url}")
+    print(f"   export BEDROCK_ENDPOINT_URL={server.endpoint_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Analytics query benchmark on a large synthetic chat history
+
+Seeds a throwaway PostgreSQL database with --rows chat_history rows (10M by default,
+spread over --days days and --users users), then times each analytics read the old
+way (aggregating chat_history) and through its rollup, checks both give the same
+answer, and measures what the rollup triggers add to a single chat insert.
+
+Seeding is incremental: rows already in the database are kept, so repeated runs
+against the same database skip straight to the measurements.
+
+Usage:
+    python benchmark_analytics.py --database-url postgresql://postgres@localhost/analytics_bench
+    python benchmark_analytics.py --database-url ... --rows 1000000 --repeats 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, REPO_DIR)
+
+from benchmark_chat import summarize, git_revision
+
+SEED_BATCH = 1_000_000
+
+
+def _legacy_daily(cursor):
+    cursor.execute("""
+        SELECT chat_date, COUNT(*) FROM chat_history
+        GROUP BY chat_date ORDER BY chat_date DESC LIMIT 30
+    """)
+    return [(d, int(n)) for d, n in cursor.fetchall()]
+
+
+def _legacy_weekly(cursor):
+    today = datetime.now().date()
+    cursor.execute("SELECT COUNT(*) FROM chat_history WHERE chat_date >= %s AND chat_date <= %s",
+                   (today - timedelta(days=6), today))
+    return int(cursor.fetchone()[0])
+
+
+def _legacy_monthly(cursor):
+    cursor.execute("""
+        SELECT DATE_TRUNC('month', chat_date)::date AS month_start, COUNT(*) FROM chat_history
+        GROUP BY month_start ORDER BY month_start DESC LIMIT 12
+    """)
+    return [(d, int(n)) for d, n in cursor.fetchall()]
+
+
+def _legacy_top_questions(cursor):
+    cursor.execute("""
+        SELECT user_query, COUNT(*) AS count FROM chat_history
+        GROUP BY user_query ORDER BY count DESC, user_query LIMIT 15
+    """)
+    return [(q, int(n)) for q, n in cursor.fetchall()]
+
+
+def _rollup_daily(cursor):
+    from chat_rollups import daily_counts
+    return [(d, int(n)) for d, n in daily_counts(cursor, 30)]
+
+
+def _rollup_weekly(cursor):
+    from chat_rollups import total_between
+    today = datetime.now().date()
+    return total_between(cursor, today - timedelta(days=6), today)
+
+
+def _rollup_monthly(cursor):
+    from chat_rollups import monthly_counts
+    return [(d, int(n)) for d, n in monthly_counts(cursor, 12)]
+
+
+def _rollup_top_questions(cursor):
+    from chat_rollups import top_questions
+    return [(fingerprint, int(n)) for fingerprint, _, n in top_questions(cursor, 15)]
+
+
+# name -> (read over chat_history, read over the rollup); both must return equal results
+QUERY_CASES = {
+    "chat_counts_daily": (_legacy_daily, _rollup_daily),
+    "chat_counts_weekly": (_legacy_weekly, _rollup_weekly),
+    "chat_counts_monthly": (_legacy_monthly, _rollup_monthly),
+    "top_questions": (_legacy_top_questions, _rollup_top_questions),
+}
+
+
+def seed(conn, rows: int, days: int, users: int) -> int:
+    """
+    Insert synthetic chats until chat_history holds `rows` rows; returns rows added
+
+    Question popularity is skewed (question n is asked ~2n+1 times per 250k chats) so
+    top-N has no ties; the texts are already normalized, so each is its own fingerprint.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM chat_history")
+    existing = cursor.fetchone()[0]
+    added = 0
+    while existing + added < rows:
+        batch = min(SEED_BATCH, rows - existing - added)
+        first = existing + added + 1
+        cursor.execute("""
+            INSERT INTO chat_history (email, user_query, query_fingerprint, bot_response,
+                                      timestamp, chat_date, chat_time)
+            SELECT 'user' || (g %% %(users)s) || '@example.com',
+                   'question ' || FLOOR(SQRT(g %% 250000))::int,
+                   'question ' || FLOOR(SQRT(g %% 250000))::int,
+                   'answer',
+                   NOW() - (g %% %(days)s) * INTERVAL '1 day',
+                   CURRENT_DATE - (g %% %(days)s),
+                   LOCALTIME
+            FROM generate_series(%(first)s, %(last)s) AS g
+        """, {"users": users, "days": days, "first": first, "last": first + batch - 1})
+        conn.commit()
+        added += batch
+        print(f"🌱 Seeded {existing + added:,} / {rows:,} chat rows")
+    if added:
+        conn.autocommit = True
+        cursor.execute("VACUUM ANALYZE chat_history")
+        conn.autocommit = False
+    return added
+
+
+def time_reads(conn, fn, repeats: int) -> tuple:
+    cursor = conn.cursor()
+    result = fn(cursor)  # warm-up, and the value compared between implementations
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(cursor)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    conn.rollback()
+    return result, summarize(timings)
+
+
+def time_inserts(conn, count: int) -> dict:
+    """Latency of single-row chat inserts, committed one by one like save_interaction"""
+    cursor = conn.cursor()
+    timings = []
+    for i in range(count):
+        start = time.perf_counter()
+        cursor.execute("""
+            INSERT INTO chat_history (email, user_query, query_fingerprint, bot_response)
+            VALUES (%s, %s, %s, %s)
+        """, (f"bench{i % 10}@example.com", "benchmark insert", "benchmark insert", "answer"))
+        conn.commit()
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return summarize(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics query benchmark on a large chat history")
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL"),
+                        help="Throwaway PostgreSQL database (libpq DSN/URI); rows are added to it")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--days", type=int, default=730, help="Days of history the rows are spread over")
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--repeats", type=int, default=10, help="Timed runs per query")
+    parser.add_argument("--inserts", type=int, default=200, help="Single-row inserts timed")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url (or BENCH_DATABASE_URL) is required")
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from db import setup_database, create_connection
+
+    setup_database()
+    conn = create_connection()
+    try:
+        start = time.perf_counter()
+        added = seed(conn, args.rows, args.days, args.users)
+        seed_seconds = time.perf_counter() - start
+
+        queries = {}
+        print(f"\n📊 Analytics reads over {args.rows:,} chat rows (ms)")
+        print(f"{'query':<24}{'legacy p50':>12}{'rollup p50':>12}{'speedup':>10}  match")
+        for name, (legacy, rollup) in QUERY_CASES.items():
+            legacy_result, legacy_stats = time_reads(conn, legacy, args.repeats)
+            rollup_result, rollup_stats = time_reads(conn, rollup, args.repeats)
+            speedup = legacy_stats["p50"] / rollup_stats["p50"] if rollup_stats["p50"] else None
+            match = legacy_result == rollup_result
+            queries[name] = {"legacy_ms": legacy_stats, "rollup_ms": rollup_stats,
+                             "speedup": round(speedup, 1) if speedup else None, "results_match": match}
+            print(f"{name:<24}{legacy_stats['p50']:>12.2f}{rollup_stats['p50']:>12.3f}"
+                  f"{speedup or 0:>9.0f}x  {'✅' if match else '❌'}")
+
+        inserts = time_inserts(conn, args.inserts)
+        print(f"\n✍️ Single chat insert with rollup triggers: p50 {inserts['p50']:.2f} ms, "
+              f"p95 {inserts['p95']:.2f} ms")
+        if added:
+            print(f"🌱 Seeding {added:,} rows took {seed_seconds:.1f}s")
+    finally:
+        conn.close()
+
+    report = {
+        "benchmark": "analytics",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "config": {"rows": args.rows, "days": args.days, "users": args.users, "repeats": args.repeats},
+        "queries": queries,
+        "insert_ms": inserts,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"💾 Results saved to {args.output}")
+    return 0 if all(q["results_match"] for q in queries.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
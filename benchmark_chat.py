@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+End-to-end /chat latency benchmark with per-stage breakdown
+
+Drives the FastAPI app in-process (Starlette TestClient) against the local Bedrock stub
+(bedrock_stub.py) and a throwaway PostgreSQL database, replays a query corpus and reports
+throughput plus p50/p95/p99 for every pipeline stage. Stage timings come from the
+Server-Timing header emitted when ENABLE_SERVER_TIMING=1 (see perf_stages.py).
+
+Results are written as JSON (benchmarks/results/ by default) so runs can be compared
+across commits with --baseline.
+
+Usage:
+    python benchmark_chat.py --database-url postgresql://postgres@localhost/chat_bench
+    python benchmark_chat.py --database-url ... --baseline benchmarks/results/<previous>.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, REPO_DIR)
+
+from bedrock_stub import BedrockStubServer, StubConfig
+from perf_stages import parse_server_timing
+
+DEFAULT_QUERIES = os.path.join(REPO_DIR, "benchmarks", "chat_queries.txt")
+DEFAULT_RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+
+def load_queries(path: str) -> list:
+    """Read one query per line, skipping blanks and '#' comments"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def summarize(values: list) -> dict:
+    """Count, mean and p50/p95/p99/max of a list of milliseconds"""
+    if not values:
+        return {"count": 0}
+    arr = np.asarray(values, dtype=np.float64)
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {
+        "count": int(arr.size),
+        "mean": round(float(arr.mean()), 3),
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(arr.max()), 3),
+    }
+
+
+def git_revision() -> dict:
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"],
+                                             cwd=REPO_DIR, text=True).strip())
+        return {"commit": commit, "dirty": dirty}
+    except Exception:
+        return {"commit": None, "dirty": None}
+
+
+def build_index(workdir: str) -> None:
+    """Index every CSV/PDF in workdir/data through the stub, like reprocess_and_reload_index"""
+    from bedrock_faiss_indexer import BedrockFAISSIndexer
+    from answer_enrichment import enrich_documents
+
+    indexer = BedrockFAISSIndexer(max_requests_per_second=1000)
+    data_dir = os.path.join(workdir, "data")
+    for file in sorted(os.listdir(data_dir)):
+        file_path = os.path.join(data_dir, file)
+        if file.lower().endswith(".csv"):
+            indexer.process_csv(file_path)
+        elif file.lower().endswith(".pdf"):
+            indexer.process_pdf(file_path)
+    enrich_documents(indexer)
+    indexer.save_index(os.path.join(workdir, "bedrock_faiss_index"))
+
+
+def prepare_database() -> None:
+    """Create the tables the API needs in the throwaway database (migrations/)"""
+    from db import setup_database
+
+    setup_database()
+
+
+def replay(app, queries: list, iterations: int, concurrency: int, email: str) -> tuple:
+    """Send every query `iterations` times; returns (samples, wall_seconds)"""
+    from fastapi.testclient import TestClient
+
+    local = threading.local()
+
+    def send(query):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = TestClient(app)
+        start = time.perf_counter()
+        response = client.post("/chat", data={"email": email, "user_query": query})
+        latency_ms = (time.perf_counter() - start) * 1000.0
+        return {
+            "query": query,
+            "status": response.status_code,
+            "latency_ms": latency_ms,
+            "stages": parse_server_timing(response.headers.get("server-timing")),
+        }
+
+    workload = [q for _ in range(iterations) for q in queries]
+    start = time.perf_counter()
+    if concurrency <= 1:
+        samples = [send(q) for q in workload]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(send, workload))
+    return samples, time.perf_counter() - start
+
+
+def build_report(samples: list, wall_seconds: float, config: dict, bedrock_calls: dict,
+                 cache_stats: dict = None, flight_stats: list = None) -> dict:
+    stage_values = {}
+    for sample in samples:
+        for name, value in sample["stages"].items():
+            stage_values.setdefault(name, []).append(value)
+
+    errors = [s for s in samples if s["status"] >= 400]
+    return {
+        "benchmark": "chat",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "config": config,
+        "requests": len(samples),
+        "errors": len(errors),
+        "error_statuses": sorted({s["status"] for s in errors}),
+        "duration_s": round(wall_seconds, 3),
+        "throughput_rps": round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+        "latency_ms": summarize([s["latency_ms"] for s in samples]),
+        "stages": {name: summarize(values) for name, values in sorted(stage_values.items())},
+        "bedrock_calls": bedrock_calls,
+        "semantic_cache": cache_stats,
+        "single_flight": flight_stats,
+    }
+
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    print(f"\n📊 /chat benchmark: {report['requests']} requests, {report['errors']} errors, "
+          f"{report['throughput_rps']} req/s")
+    header = f"{'stage':<18}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}"
+    if baseline:
+        header += f"{'Δp95':>10}"
+    print(header)
+    print("-" * len(header))
+
+    rows = [("request (client)", report["latency_ms"])] + list(report["stages"].items())
+    base_rows = {}
+    if baseline:
+        base_rows = dict([("request (client)", baseline.get("latency_ms", {}))] + list(baseline.get("stages", {}).items()))
+    for name, stats in rows:
+        if not stats.get("count"):
+            continue
+        line = f"{name:<18}{stats['count']:>7}{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['p99']:>10.2f}"
+        base = base_rows.get(name)
+        if base and base.get("p95"):
+            line += f"{(stats['p95'] - base['p95']) / base['p95'] * 100:>+9.1f}%"
+        print(line)
+    print(f"\n🤖 Bedrock calls: {report['bedrock_calls']}")
+    if report.get("semantic_cache"):
+        print(f"🧠 Semantic cache: {report['semantic_cache']}")
+    for flight in report.get("single_flight") or []:
+        print(f"🔀 Coalesced {flight['name']} calls: {flight['calls_saved']} saved, "
+              f"{flight['upstream_calls']} sent")
+
+
+def find_regressions(report: dict, baseline: dict, max_regression_pct: float,
+                     min_regression_ms: float = 1.0) -> list:
+    """
+    Stages whose p95 got worse than the baseline by more than max_regression_pct
+
+    Changes smaller than min_regression_ms are ignored, so sub-millisecond stages
+    do not trip the check on scheduler noise.
+    """
+    regressions = []
+    current = dict(report["stages"], request=report["latency_ms"])
+    previous = dict(baseline.get("stages", {}), request=baseline.get("latency_ms", {}))
+    for name, stats in current.items():
+        base = previous.get(name)
+        if not base or not base.get("p95") or not stats.get("count"):
+            continue
+        change = (stats["p95"] - base["p95"]) / base["p95"] * 100
+        if change > max_regression_pct and stats["p95"] - base["p95"] >= min_regression_ms:
+            regressions.append((name, round(change, 1)))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end /chat latency benchmark")
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL"),
+                        help="DSN of a throwaway PostgreSQL database (or BENCH_DATABASE_URL)")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="Query corpus, one per line")
+    parser.add_argument("--iterations", type=int, default=5, help="Times the corpus is replayed")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed passes over the corpus first")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--email", default="bench@example.com")
+    parser.add_argument("--stub-latency-ms", type=float, default=30.0)
+    parser.add_argument("--stub-jitter-ms", type=float, default=10.0)
+    parser.add_argument("--stub-token-latency-ms", type=float, default=0.5)
+    parser.add_argument("--stub-throttle-rate", type=float, default=0.0)
+    parser.add_argument("--stub-slow-rate", type=float, default=0.0,
+                        help="Fraction of stub calls delayed by --stub-slow-latency-ms (latency tail)")
+    parser.add_argument("--stub-slow-latency-ms", type=float, default=0.0)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/chat-<commit>-<time>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument("--max-regression-pct", type=float, default=20.0,
+                        help="With --baseline, exit non-zero if any stage p95 regresses more than this")
+    parser.add_argument("--min-regression-ms", type=float, default=1.0,
+                        help="Ignore p95 regressions smaller than this many milliseconds")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url (or BENCH_DATABASE_URL) is required; point it at a throwaway database")
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    queries = load_queries(args.queries)
+    print(f"🚀 Benchmarking /chat with {len(queries)} queries x {args.iterations} iterations")
+
+    stub_config = StubConfig(
+        latency_ms=args.stub_latency_ms,
+        jitter_ms=args.stub_jitter_ms,
+        token_latency_ms=args.stub_token_latency_ms,
+        throttle_rate=args.stub_throttle_rate,
+        slow_rate=args.stub_slow_rate,
+        slow_latency_ms=args.stub_slow_latency_ms,
+    )
+    workdir = tempfile.mkdtemp(prefix="chat-bench-")
+    original_cwd = os.getcwd()
+
+    with BedrockStubServer(config=stub_config) as stub:
+        os.environ["BEDROCK_ENDPOINT_URL"] = stub.endpoint_url
+        os.environ["DATABASE_URL"] = args.database_url
+        os.environ["ENABLE_SERVER_TIMING"] = "1"
+        try:
+            shutil.copytree(os.path.join(REPO_DIR, "data"), os.path.join(workdir, "data"))
+            print("📡 Building index through the Bedrock stub...")
+            build_index(workdir)
+            prepare_database()
+
+            # The API resolves data/ and the index relative to the working directory
+            os.chdir(workdir)
+            import fastapi_bedrock
+
+            if args.warmup:
+                replay(fastapi_bedrock.app, queries, args.warmup, args.concurrency, args.email)
+            stub.state.reset_stats()
+            fastapi_bedrock.semantic_cache.reset_stats()
+            fastapi_bedrock.embedding_flight.reset_stats()
+            fastapi_bedrock.generation_flight.reset_stats()
+            samples, wall_seconds = replay(fastapi_bedrock.app, queries, args.iterations,
+                                           args.concurrency, args.email)
+            bedrock_calls = stub.state.snapshot_stats()
+            cache_stats = fastapi_bedrock.semantic_cache.get_stats()
+            flight_stats = [fastapi_bedrock.embedding_flight.get_stats(),
+                            fastapi_bedrock.generation_flight.get_stats()]
+        finally:
+            os.chdir(original_cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    config = {
+        "queries_file": os.path.relpath(args.queries, REPO_DIR),
+        "corpus_size": len(queries),
+        "iterations": args.iterations,
+        "warmup": args.warmup,
+        "concurrency": args.concurrency,
+        "stub": vars(stub_config),
+    }
+    report = build_report(samples, wall_seconds, config, bedrock_calls, cache_stats, flight_stats)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    output = args.output
+    if not output:
+        os.makedirs(DEFAULT_RESULTS_DIR, exist_ok=True)
+        commit = (report["git"]["commit"] or "nogit")[:10]
+        output = os.path.join(DEFAULT_RESULTS_DIR, f"chat-{commit}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if baseline:
+        regressions = find_regressions(report, baseline, args.max_regression_pct, args.min_regression_ms)
+        if regressions:
+            print(f"❌ p95 regressions over {args.max_regression_pct}%: {regressions}")
+            sys.exit(1)
+        print("✅ No p95 regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
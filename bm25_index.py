@@ -0,0 +1,155 @@
+"""
+Compact in-memory BM25 inverted index for lexical retrieval
+
+Postings are stored array-backed (CSR style): for term id t, the documents containing it
+are doc_ids[offsets[t]:offsets[t + 1]] and their precomputed BM25 impacts are in the
+same slice of impacts, so scoring a query is a handful of NumPy gather/add operations.
+Query terms missing from the vocabulary (typos such as "warrenty") are expanded to the
+closest vocabulary terms with difflib.
+"""
+
+import difflib
+import re
+from typing import List, Tuple
+
+import numpy as np
+
+BM25_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did", "it", "its",
+    "i", "me", "my", "we", "you", "your", "of", "to", "in", "on", "for", "and", "or",
+    "what", "how", "can", "which", "who", "this", "that", "with", "please", "there",
+}
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [t for t in _TOKEN_RE.findall(str(text).lower()) if t not in BM25_STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Empty BM25 index; use build() or from_dict() to populate
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization strength
+        """
+        self.k1 = k1
+        self.b = b
+        self.vocab = {}
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.impacts = np.zeros(0, dtype=np.float32)
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.num_docs = 0
+        self._terms = None
+
+    @classmethod
+    def build(cls, texts: List[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """Build the index from document texts (document id = position in texts)"""
+        index = cls(k1=k1, b=b)
+        postings = {}
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[doc_id] = len(tokens)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                postings.setdefault(token, []).append((doc_id, tf))
+
+        index.num_docs = len(texts)
+        avg_length = float(doc_lengths.mean()) if len(texts) and doc_lengths.sum() else 1.0
+        terms = sorted(postings)
+        index.vocab = {term: term_id for term_id, term in enumerate(terms)}
+
+        sizes = np.array([len(postings[t]) for t in terms], dtype=np.int64)
+        index.offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        index.doc_ids = np.fromiter((d for t in terms for d, _ in postings[t]), dtype=np.int32,
+                                    count=int(sizes.sum()))
+        tfs = np.fromiter((tf for t in terms for _, tf in postings[t]), dtype=np.float32,
+                          count=int(sizes.sum()))
+
+        # Okapi BM25 idf (the +1 keeps it positive for very common terms)
+        index.idf = np.log(1.0 + (index.num_docs - sizes + 0.5) / (sizes + 0.5)).astype(np.float32)
+        term_idf = np.repeat(index.idf, sizes)
+        length_norm = k1 * (1.0 - b + b * doc_lengths[index.doc_ids] / avg_length)
+        index.impacts = (term_idf * tfs * (k1 + 1.0) / (tfs + length_norm)).astype(np.float32)
+        return index
+
+    def _query_terms(self, query: str) -> List[Tuple[int, float]]:
+        """Map query tokens to (term id, weight), expanding unknown tokens to close terms"""
+        terms = []
+        for token in tokenize(query):
+            term_id = self.vocab.get(token)
+            if term_id is not None:
+                terms.append((term_id, 1.0))
+                continue
+            if len(token) < 4:
+                continue
+            if self._terms is None:
+                self._terms = list(self.vocab)
+            for match in difflib.get_close_matches(token, self._terms, n=2, cutoff=0.8):
+                similarity = difflib.SequenceMatcher(None, token, match).ratio()
+                terms.append((self.vocab[match], similarity))
+        return terms
+
+    def score(self, query: str) -> np.ndarray:
+        """
+        Normalized lexical score of every document for query
+
+        Scores are divided by the summed idf of the query tokens, so a document that
+        contains every query term about once at average length scores ~1.0, and
+        queries with unmatched terms score proportionally lower. Clipped to [0, 1].
+        """
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        tokens = tokenize(query)
+        if not tokens or self.num_docs == 0:
+            return scores
+
+        for term_id, weight in self._query_terms(query):
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # Each document appears once per posting list, so plain fancy-index add is safe
+            scores[self.doc_ids[start:end]] += weight * self.impacts[start:end]
+
+        max_idf = float(self.idf.max()) if self.idf.size else 1.0
+        normalizer = sum(float(self.idf[self.vocab[t]]) if t in self.vocab else max_idf for t in tokens)
+        return np.clip(scores / normalizer, 0.0, 1.0)
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """Top-k (document id, normalized score) pairs with a non-zero score"""
+        scores = self.score(query)
+        if not scores.size:
+            return []
+        k = min(k, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+    def to_dict(self) -> dict:
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "vocab": self.vocab,
+            "offsets": self.offsets,
+            "doc_ids": self.doc_ids,
+            "impacts": self.impacts,
+            "idf": self.idf,
+            "num_docs": self.num_docs,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BM25Index":
+        index = cls(k1=data["k1"], b=data["b"])
+        index.vocab = data["vocab"]
+        index.offsets = data["offsets"]
+        index.doc_ids = data["doc_ids"]
+        index.impacts = data["impacts"]
+        index.idf = data["idf"]
+        index.num_docs = data["num_docs"]
+        return index
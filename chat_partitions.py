@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Monthly partition maintenance and retention for chat_history
+
+chat_history is range-partitioned by chat_date, one partition per month
+(chat_history_YYYY_MM, migrations/0007_partition_chat_history.sql). This module keeps
+partitions created ahead of time and archives old months: a month past the retention
+window is copied to a gzipped CSV file, then detached and dropped in the same
+transaction, so the live table only ever holds the retained months.
+
+The rollups (chat_daily_counts, query_fingerprint_counts, users.last_chat_at) keep
+counting archived chats; retention only moves the raw rows out of the database.
+Archived months are listed in chat_history_archives with their file.
+
+Usage:
+    python chat_partitions.py --list
+    python chat_partitions.py --maintain                     # create the next months
+    python chat_partitions.py --archive --retain-months 12 --archive-dir archive/
+"""
+
+import argparse
+import gzip
+import os
+import re
+import sys
+from datetime import date
+from typing import List, Optional
+
+from db import create_connection
+
+MONTHS_AHEAD = 3
+
+_PARTITION_RE = re.compile(r"^chat_history_(\d{4})_(\d{2})$")
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def ensure_partitions(conn, months_ahead: int = MONTHS_AHEAD) -> int:
+    """
+    Create the monthly partitions from the current month to months_ahead months ahead
+
+    Returns:
+        Number of partitions created
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT chat_history_ensure_partitions(CURRENT_DATE, %s)",
+                       (_add_months(date.today(), months_ahead),))
+        created = cursor.fetchone()[0]
+        conn.commit()
+        return created
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def list_partitions(conn) -> List[dict]:
+    """Monthly partitions of chat_history, oldest first: name, month, estimated rows"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT c.relname, c.reltuples::bigint
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'chat_history'::regclass
+    """)
+    partitions = []
+    for name, rows in cursor.fetchall():
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions.append({"name": name, "month": date(int(match.group(1)), int(match.group(2)), 1),
+                               "estimated_rows": max(rows, 0)})
+    conn.rollback()
+    return sorted(partitions, key=lambda p: p["month"])
+
+
+def archive_partition(conn, name: str, archive_dir: str) -> int:
+    """
+    Copy one partition to archive_dir/<name>.csv.gz, then detach and drop it
+
+    The partition is locked against writes while it is copied; the file is complete
+    (written to a temporary name and renamed) before the partition is dropped. The
+    archive is recorded in chat_history_archives in the same transaction.
+
+    Returns:
+        Number of rows archived
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'LOCK TABLE "{name}" IN SHARE MODE')
+        cursor.execute(f'SELECT COUNT(*) FROM "{name}"')
+        rows = cursor.fetchone()[0]
+        with gzip.open(path + ".tmp", "wb") as f:
+            cursor.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER true)', f)
+        os.replace(path + ".tmp", path)
+        cursor.execute(f'ALTER TABLE chat_history DETACH PARTITION "{name}"')
+        cursor.execute(f'DROP TABLE "{name}"')
+        match = _PARTITION_RE.match(name)
+        cursor.execute("""
+            INSERT INTO chat_history_archives (partition_name, month, rows, archive_path)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (partition_name) DO UPDATE
+            SET rows = EXCLUDED.rows, archive_path = EXCLUDED.archive_path, archived_at = NOW()
+        """, (name, date(int(match.group(1)), int(match.group(2)), 1), rows, os.path.abspath(path)))
+        conn.commit()
+        return rows
+    except Exception:
+        conn.rollback()
+        if os.path.exists(path + ".tmp"):
+            os.remove(path + ".tmp")
+        raise
+
+
+def archive_old_partitions(conn, retain_months: int, archive_dir: str,
+                           today: Optional[date] = None) -> List[dict]:
+    """
+    Archive every monthly partition older than the last retain_months months
+
+    retain_months counts the current month, so retain_months=12 keeps this month and
+    the 11 before it.
+
+    Returns:
+        name, month and rows of each archived partition
+    """
+    if retain_months < 1:
+        raise ValueError("retain_months must be at least 1")
+    cutoff = _add_months(today or date.today(), 1 - retain_months)
+    archived = []
+    for partition in list_partitions(conn):
+        if partition["month"] >= cutoff:
+            break
+        rows = archive_partition(conn, partition["name"], archive_dir)
+        archived.append({"name": partition["name"], "month": partition["month"], "rows": rows})
+    return archived
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Maintain chat_history partitions")
+    parser.add_argument("--list", action="store_true", help="List monthly partitions")
+    parser.add_argument("--maintain", action="store_true", help="Create partitions for the coming months")
+    parser.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    parser.add_argument("--archive", action="store_true", help="Archive and drop months past retention")
+    parser.add_argument("--retain-months", type=int, default=12, help="Months kept, including the current one")
+    parser.add_argument("--archive-dir", default="archive", help="Where archived months are written")
+    parser.add_argument("--database-url", help="libpq DSN/URI (default: DATABASE_URL or db.DB_CONFIG)")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    if not (args.list or args.maintain or args.archive):
+        parser.print_help()
+        return 1
+
+    conn = create_connection()
+    try:
+        if args.maintain:
+            created = ensure_partitions(conn, args.months_ahead)
+            print(f"✅ {created} partition(s) created")
+        if args.archive:
+            for partition in archive_old_partitions(conn, args.retain_months, args.archive_dir):
+                print(f"📦 {partition['name']}: {partition['rows']} rows archived to {args.archive_dir}")
+        if args.list:
+            for partition in list_partitions(conn):
+                print(f"{partition['name']}  ~{partition['estimated_rows']} rows")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Chat history rollups for the analytics endpoints
+
+chat_daily_counts holds one row per day with its number of chats. Triggers on
+chat_history keep it current (migrations/0003_chat_daily_counts.sql), so the daily,
+7-day and monthly figures are small indexed reads instead of GROUP BY scans over the
+whole history. Monthly totals are summed from the daily rows (at most ~365 per year).
+
+query_fingerprint_counts counts chats per question fingerprint
+(text_utils.query_fingerprint, stored by the chat writer), so /admin/top-questions
+reads the top of an index and merges trivial variants of the same question.
+
+Usage:
+    python chat_rollups.py --backfill    # fingerprint old chats and recount every rollup
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+from typing import List, Tuple
+
+from psycopg2.extras import execute_values
+
+from db import create_connection
+from text_utils import query_fingerprint
+
+FINGERPRINT_BATCH = 5000
+
+
+def daily_counts(cursor, limit: int = 30) -> List[Tuple[date, int]]:
+    """(chat_date, total_chats) for the most recent days with chats, newest first"""
+    cursor.execute("""
+        SELECT chat_date, total_chats
+        FROM chat_daily_counts
+        WHERE total_chats > 0
+        ORDER BY chat_date DESC
+        LIMIT %s
+    """, (limit,))
+    return cursor.fetchall()
+
+
+def total_between(cursor, first: date, last: date) -> int:
+    """Number of chats from first to last (inclusive)"""
+    cursor.execute("""
+        SELECT COALESCE(SUM(total_chats), 0)
+        FROM chat_daily_counts
+        WHERE chat_date >= %s AND chat_date <= %s
+    """, (first, last))
+    return int(cursor.fetchone()[0])
+
+
+def monthly_counts(cursor, limit: int = 12) -> List[Tuple[date, int]]:
+    """(first day of month, total_chats) for the most recent months, newest first"""
+    cursor.execute("""
+        SELECT DATE_TRUNC('month', chat_date)::date AS month_start, SUM(total_chats)::bigint
+        FROM chat_daily_counts
+        GROUP BY month_start
+        HAVING SUM(total_chats) > 0
+        ORDER BY month_start DESC
+        LIMIT %s
+    """, (limit,))
+    return cursor.fetchall()
+
+
+def top_questions(cursor, limit: int = 15) -> List[Tuple[str, str, int]]:
+    """(fingerprint, sample query, total_chats) of the most asked questions"""
+    cursor.execute("""
+        SELECT fingerprint, sample_query, total_chats
+        FROM query_fingerprint_counts
+        WHERE total_chats > 0
+        ORDER BY total_chats DESC, fingerprint
+        LIMIT %s
+    """, (limit,))
+    return cursor.fetchall()
+
+
+def fingerprint_history(conn, batch_size: int = FINGERPRINT_BATCH) -> int:
+    """
+    Store query_fingerprint on chats written before fingerprints existed
+
+    Works through chat_history in id order, one committed batch at a time, so it can
+    run while the API is serving; the update trigger counts every row it fingerprints.
+
+    Returns:
+        Number of chats fingerprinted
+    """
+    cursor = conn.cursor()
+    last_id = 0
+    updated = 0
+    while True:
+        cursor.execute("""
+            SELECT id, user_query FROM chat_history
+            WHERE id > %s AND query_fingerprint IS NULL
+            ORDER BY id
+            LIMIT %s
+        """, (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        execute_values(cursor, """
+            UPDATE chat_history AS h SET query_fingerprint = v.fingerprint
+            FROM (VALUES %s) AS v (id, fingerprint)
+            WHERE h.id = v.id AND h.query_fingerprint IS NULL
+        """, [(row_id, query_fingerprint(query or "")) for row_id, query in rows], page_size=batch_size)
+        updated += cursor.rowcount
+        conn.commit()
+    return updated
+
+
+def backfill_fingerprint_counts(conn) -> int:
+    """
+    Recount query_fingerprint_counts from chat_history in one transaction
+
+    Returns:
+        Number of distinct fingerprints
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("LOCK TABLE chat_history IN SHARE MODE")
+        cursor.execute("DELETE FROM query_fingerprint_counts")
+        cursor.execute("""
+            INSERT INTO query_fingerprint_counts (fingerprint, sample_query, total_chats)
+            SELECT query_fingerprint, MIN(user_query), COUNT(*) FROM chat_history
+            WHERE query_fingerprint IS NOT NULL
+            GROUP BY query_fingerprint
+        """)
+        fingerprints = cursor.rowcount
+        conn.commit()
+        return fingerprints
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def backfill_daily_counts(conn) -> int:
+    """
+    Recount chat_daily_counts from chat_history in one transaction
+
+    Chat writes are blocked (SHARE lock) while counting so none is lost or counted
+    twice; use it after bulk loads with triggers disabled or to repair drift.
+
+    Returns:
+        Number of days in the rollup
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("LOCK TABLE chat_history IN SHARE MODE")
+        cursor.execute("DELETE FROM chat_daily_counts")
+        cursor.execute("""
+            INSERT INTO chat_daily_counts (chat_date, total_chats)
+            SELECT chat_date, COUNT(*) FROM chat_history
+            WHERE chat_date IS NOT NULL
+            GROUP BY chat_date
+        """)
+        days = cursor.rowcount
+        conn.commit()
+        return days
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Maintain the chat history rollup tables")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Fingerprint old chats and recount every rollup from chat_history")
+    parser.add_argument("--database-url", help="libpq DSN/URI (default: DATABASE_URL or db.DB_CONFIG)")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    if not args.backfill:
+        parser.print_help()
+        return 1
+
+    conn = create_connection()
+    try:
+        start = time.perf_counter()
+        fingerprinted = fingerprint_history(conn)
+        print(f"✅ chat_history: {fingerprinted} chats fingerprinted in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        days = backfill_daily_counts(conn)
+        print(f"✅ chat_daily_counts: {days} days recounted in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        fingerprints = backfill_fingerprint_counts(conn)
+        print(f"✅ query_fingerprint_counts: {fingerprints} questions recounted in {time.perf_counter() - start:.1f}s")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
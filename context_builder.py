@@ -0,0 +1,77 @@
+"""
+Token-budgeted context assembly for Titan prompts
+
+Retrieved chunks are packed best-first into a fixed token budget, sentence by
+sentence, skipping sentences that repeat one already packed (overlapping PDF chunks,
+FAQ rows sharing boilerplate). Token counts come from a fast approximation rather
+than the real Titan tokenizer, which is close enough to keep prompts short and of
+predictable size.
+"""
+
+import re
+from typing import List, Sequence, Tuple, Union
+
+DEFAULT_CONTEXT_TOKENS = 400
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"\w+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def approx_token_count(text: str) -> int:
+    """
+    Approximate subword token count: one per punctuation mark, one per word plus
+    one for every further 6 characters of long words
+    """
+    return sum(1 + (len(piece) - 1) // 6 for piece in _PIECE_RE.findall(text))
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text or "") if s.strip()]
+
+
+def _is_redundant(words: set, kept: List[set], max_overlap: float) -> bool:
+    """True when most of a sentence's words already appear in one kept sentence"""
+    if not words:
+        return True
+    return any(len(words & other) / len(words) >= max_overlap for other in kept)
+
+
+def build_context(chunks: Sequence[Union[str, Tuple[str, float]]],
+                  max_tokens: int = DEFAULT_CONTEXT_TOKENS,
+                  max_overlap: float = 0.8) -> str:
+    """
+    Pack retrieved chunks into a prompt context of at most max_tokens (approx.)
+
+    Args:
+        chunks: Texts, or (text, relevance score) pairs; higher scores are packed first
+        max_tokens: Token budget for the whole context
+        max_overlap: Fraction of a sentence's words already covered by one packed
+            sentence at which it is skipped as redundant
+
+    Returns:
+        Packed context, chunks separated by blank lines
+    """
+    ranked = [(c, 0.0) if isinstance(c, str) else c for c in chunks]
+    ranked = sorted(enumerate(ranked), key=lambda item: (-item[1][1], item[0]))
+
+    kept_words = []
+    parts = []
+    remaining = max_tokens
+    for _, (text, _) in ranked:
+        sentences = []
+        for sentence in split_sentences(text):
+            cost = approx_token_count(sentence)
+            if cost > remaining:
+                continue
+            words = set(_WORD_RE.findall(sentence.lower()))
+            if _is_redundant(words, kept_words, max_overlap):
+                continue
+            sentences.append(sentence)
+            kept_words.append(words)
+            remaining -= cost
+        if sentences:
+            parts.append(" ".join(sentences))
+        if remaining <= 0:
+            break
+    return "\n\n".join(parts)
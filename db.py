@@ -1,5 +1,8 @@
+import os
 import psycopg2
 
+from text_utils import query_fingerprint
+
 # PostgreSQL connection config
 DB_CONFIG = {
     'host': 'localhost',
@@ -10,43 +13,49 @@ DB_CONFIG = {
 }
 
 def create_connection():
+    # DATABASE_URL (a libpq DSN/URI) overrides DB_CONFIG, e.g. for a throwaway benchmark database
+    database_url = os.environ.get('DATABASE_URL')
+    if database_url:
+        return psycopg2.connect(database_url)
     return psycopg2.connect(**DB_CONFIG)
 
 def setup_database():
-    conn = create_connection()
-    cursor = conn.cursor()
+    # The schema lives in migrations/; apply whatever this database is missing
+    from db_migrate import migrate
+    from chat_partitions import ensure_partitions
+    migrate()
 
-    # Create users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id SERIAL PRIMARY KEY,
-            email VARCHAR(100),
-            phone VARCHAR(15),
-            country VARCHAR(100)
-        )
-    ''')
-
-    # Create chat_history table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS chat_history (
-            id SERIAL PRIMARY KEY,
-            email VARCHAR(100),
-            user_query TEXT,
-            bot_response TEXT
-        )
-    ''')
+    # Monthly chat_history partitions for the coming months
+    conn = create_connection()
+    try:
+        ensure_partitions(conn)
+    finally:
+        conn.close()
 
+def save_user_info(email, phone, country):
+    conn = create_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO users (email, phone, country) VALUES (%s, %s, %s)
+        ON CONFLICT (email, phone) DO NOTHING
+    """, (email, phone, country))
     conn.commit()
     conn.close()
 
-def save_user_info(email, phone, country):
+def register_user(email, phone, country):
+    # One round trip instead of user_exists + save_user_info, and safe under
+    # concurrent registrations: True if the user was created, False if already known
     conn = create_connection()
     cursor = conn.cursor()
     cursor.execute("""
         INSERT INTO users (email, phone, country) VALUES (%s, %s, %s)
+        ON CONFLICT (email, phone) DO NOTHING
+        RETURNING id
     """, (email, phone, country))
+    created = cursor.fetchone() is not None
     conn.commit()
     conn.close()
+    return created
 
 def get_user_count():
     conn = create_connection()
@@ -60,9 +69,9 @@ def save_interaction(email, user_query, bot_response):
     conn = create_connection()
     cursor = conn.cursor()
     cursor.execute("""
-        INSERT INTO chat_history (email, user_query, bot_response)
-        VALUES (%s, %s, %s)
-    """, (email, user_query, bot_response))
+        INSERT INTO chat_history (email, user_query, bot_response, query_fingerprint)
+        VALUES (%s, %s, %s, %s)
+    """, (email, user_query, bot_response, query_fingerprint(user_query)))
     conn.commit()
     conn.close()
 
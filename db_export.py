@@ -0,0 +1,172 @@
+"""
+Streaming bulk export of chat history and leads
+
+Rows leave PostgreSQL through COPY ... TO STDOUT on a background thread and are handed
+to the HTTP response through a small bounded queue, so memory stays at a few chunks
+whatever the table size and a slow client simply slows the COPY down. CSV comes
+straight from COPY; NDJSON is row_to_json() output copied as raw lines.
+"""
+
+import queue
+import threading
+from datetime import date
+from typing import Iterator, Optional
+
+from db import create_connection
+
+CHUNK_BYTES = 64 * 1024
+QUEUE_CHUNKS = 16  # at most ~1 MB buffered per export
+
+# table -> (columns, date expression the date range applies to)
+EXPORTS = {
+    "chat_history": (
+        ["id", "email", "user_query", "bot_response", "chat_date", "chat_time", "timestamp"],
+        "chat_date",
+    ),
+    "users": (
+        ["id", "email", "phone", "country", "status", "description", "last_chat_at"],
+        "last_chat_at::date",
+    ),
+}
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+_DONE = object()
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class _QueueWriter:
+    """File-like object for copy_expert that batches COPY output into queue chunks"""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event):
+        self.chunks = chunks
+        self.cancelled = cancelled
+        self.buffer = bytearray()
+
+    def write(self, data) -> int:
+        self.buffer += data.encode("utf-8") if isinstance(data, str) else data
+        if len(self.buffer) >= CHUNK_BYTES:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.put(bytes(self.buffer))
+            self.buffer.clear()
+
+    def put(self, item) -> None:
+        while True:
+            if self.cancelled.is_set():
+                raise ExportCancelled()
+            try:
+                self.chunks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+
+def check_export(table: str, fmt: str) -> None:
+    """Raise ValueError for an unknown table (see EXPORTS) or format (see FORMATS)"""
+    if table not in EXPORTS:
+        raise ValueError(f"Unknown export table: {table}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+
+def build_copy_sql(cursor, table: str, fmt: str, date_from: Optional[date] = None,
+                   date_to: Optional[date] = None) -> str:
+    """
+    COPY ... TO STDOUT statement for one export
+
+    Args:
+        cursor: Cursor used to bind the date range (COPY takes no parameters)
+        table: Key of EXPORTS
+        fmt: "csv" (with header) or "ndjson"
+        date_from: First day included (chat_date, or last chat for users)
+        date_to: Last day included
+    """
+    check_export(table, fmt)
+    columns, date_column = EXPORTS[table]
+
+    conditions = []
+    params = []
+    if date_from is not None:
+        conditions.append(f"{date_column} >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append(f"{date_column} <= %s")
+        params.append(date_to)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    select = cursor.mogrify(f"SELECT {', '.join(columns)} FROM {table}{where} ORDER BY id", params).decode("utf-8")
+
+    if fmt == "csv":
+        return f"COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+    # row_to_json escapes control characters, so with these never-occurring quote and
+    # delimiter characters COPY emits each JSON document verbatim, one per line
+    return (f"COPY (SELECT row_to_json(r) FROM ({select}) AS r) TO STDOUT "
+            f"WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')")
+
+
+def stream_export(table: str, fmt: str, date_from: Optional[date] = None,
+                  date_to: Optional[date] = None) -> Iterator[bytes]:
+    """
+    Export rows of table as CSV or NDJSON, in chunks of about CHUNK_BYTES
+
+    Arguments are validated before the first chunk (ValueError), so callers can
+    still answer with an error status. The database connection is only opened once
+    the first chunk is requested, so a response that is never sent holds none.
+    Closing the iterator early (client gone) cancels the COPY on the server.
+    """
+    check_export(table, fmt)
+    return _export_chunks(table, fmt, date_from, date_to)
+
+
+def _export_chunks(table: str, fmt: str, date_from: Optional[date],
+                   date_to: Optional[date]) -> Iterator[bytes]:
+    conn = create_connection()
+    try:
+        sql = build_copy_sql(conn.cursor(), table, fmt, date_from, date_to)
+    except Exception:
+        conn.close()
+        raise
+
+    chunks = queue.Queue(maxsize=QUEUE_CHUNKS)
+    cancelled = threading.Event()
+
+    def produce():
+        writer = _QueueWriter(chunks, cancelled)
+        try:
+            conn.cursor().copy_expert(sql, writer, size=CHUNK_BYTES)
+            writer.flush()
+            writer.put(_DONE)
+        except ExportCancelled:
+            pass
+        except Exception as e:
+            try:
+                writer.put(e)
+            except ExportCancelled:
+                pass
+        finally:
+            conn.close()
+
+    producer = threading.Thread(target=produce, name=f"export-{table}", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        if producer.is_alive():
+            cancelled.set()
+            try:
+                conn.cancel()
+            except Exception:
+                pass
+        producer.join()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for the chat database
+
+Migrations are the numbered SQL files in migrations/ (NNNN_description.sql), applied
+in order and recorded in schema_migrations, so every database - local, benchmark or
+production - ends up with the same tables and indexes. A file whose first line is
+"-- migrate: no-transaction" runs statement by statement in autocommit mode (needed for
+CREATE INDEX CONCURRENTLY); every other file runs in a single transaction.
+
+Concurrent API workers starting at once are serialized with an advisory lock.
+
+Usage:
+    python db_migrate.py                 # apply pending migrations
+    python db_migrate.py --status        # list applied and pending migrations
+    python db_migrate.py --check-plans   # EXPLAIN the hot queries, fail if one misses its index
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from typing import List, Optional, Tuple
+
+from db import create_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_LOCK_ID = 4815162342  # pg_advisory_lock key shared by every worker
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+# Queries on the request path and the index each one must use: (name, SQL, params, index)
+HOT_QUERIES = [
+    ("users_history",
+     "SELECT user_query, bot_response, chat_date, chat_time FROM chat_history "
+     "WHERE email = %s ORDER BY id DESC LIMIT 100",
+     ("someone@example.com",), "idx_chat_history_email_id"),
+    ("users_history_window",
+     "SELECT user_query, bot_response, chat_date, chat_time FROM chat_history "
+     "WHERE email = %s AND chat_date >= CURRENT_DATE - 30 ORDER BY id DESC LIMIT 100",
+     ("someone@example.com",), "idx_chat_history_email_id"),
+    ("chat_counts_window",
+     "SELECT chat_date, COUNT(*) FROM chat_history "
+     "WHERE chat_date >= CURRENT_DATE - 6 AND chat_date <= CURRENT_DATE GROUP BY chat_date",
+     (), "idx_chat_history_chat_date"),
+    ("chatusers_page",
+     "SELECT u.email FROM users u WHERE u.last_chat_at IS NOT NULL "
+     "AND (u.last_chat_at, u.email) < (NOW()::timestamp, %s) "
+     "AND NOT EXISTS (SELECT 1 FROM users d WHERE d.email = u.email AND d.id < u.id) "
+     "ORDER BY u.last_chat_at DESC, u.email DESC LIMIT 101",
+     ("someone@example.com",), "idx_users_last_chat_at"),
+    ("user_by_email",
+     "SELECT id FROM users WHERE LOWER(email) = LOWER(%s)",
+     ("Someone@Example.com",), "idx_users_lower_email"),
+]
+
+
+def list_migrations(directory: str = MIGRATIONS_DIR) -> List[Tuple[int, str, str]]:
+    """(version, name, path) of every migration file, oldest first"""
+    migrations = []
+    for file in sorted(os.listdir(directory)):
+        match = _FILE_RE.match(file)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, file)))
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a migration into statements (on ';' at line ends; no procedural bodies)"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [s.strip() for s in re.split(r";\s*$", "\n".join(lines), flags=re.MULTILINE) if s.strip()]
+
+
+def _ensure_migrations_table(cursor) -> None:
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """)
+
+
+def applied_versions(conn) -> set:
+    cursor = conn.cursor()
+    _ensure_migrations_table(cursor)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _apply(conn, version: int, name: str, path: str) -> None:
+    with open(path, encoding="utf-8") as f:
+        sql = f.read()
+    cursor = conn.cursor()
+    if sql.lstrip().startswith(NO_TRANSACTION_MARKER):
+        # Statements must be idempotent (IF NOT EXISTS): a failure leaves earlier ones applied
+        for statement in split_statements(sql):
+            cursor.execute(statement)
+        cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+    else:
+        cursor.execute("BEGIN")
+        try:
+            cursor.execute(sql)
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
+
+def migrate(conn=None, target: Optional[int] = None, verbose: bool = False) -> List[int]:
+    """
+    Apply pending migrations
+
+    Args:
+        conn: Open psycopg2 connection (a new one is created and closed if None)
+        target: Stop after this version (default: apply everything)
+        verbose: Print each migration as it is applied
+
+    Returns:
+        Versions applied by this call
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = create_connection()
+    previous_autocommit = conn.autocommit
+    conn.autocommit = True
+    cursor = conn.cursor()
+    applied_now = []
+    try:
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        try:
+            done = applied_versions(conn)
+            for version, name, path in list_migrations():
+                if version in done or (target is not None and version > target):
+                    continue
+                if verbose:
+                    print(f"⏳ Applying migration {version:04d}_{name}")
+                _apply(conn, version, name, path)
+                applied_now.append(version)
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+    finally:
+        conn.autocommit = previous_autocommit
+        if own_conn:
+            conn.close()
+    return applied_now
+
+
+def migration_status(conn) -> List[dict]:
+    done = applied_versions(conn)
+    conn.commit()
+    return [{"version": version, "name": name, "applied": version in done}
+            for version, name, _ in list_migrations()]
+
+
+def _plan_indexes(plan: dict) -> List[str]:
+    """Names of the indexes used anywhere in an EXPLAIN (FORMAT JSON) plan"""
+    found = [plan["Index Name"]] if "Index Name" in plan else []
+    for child in plan.get("Plans", []):
+        found.extend(_plan_indexes(child))
+    return found
+
+
+def _parent_indexes(cursor, names: List[str]) -> List[str]:
+    """Map indexes of chat_history partitions to the partitioned index they belong to"""
+    resolved = []
+    for name in names:
+        cursor.execute("""
+            SELECT parent.relname FROM pg_inherits i
+            JOIN pg_class child ON child.oid = i.inhrelid
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            WHERE child.relname = %s AND parent.relkind = 'I'
+        """, (name,))
+        row = cursor.fetchone()
+        resolved.append(row[0] if row else name)
+    return resolved
+
+
+def check_query_plans(conn, force_index: bool = True) -> List[dict]:
+    """
+    EXPLAIN each of HOT_QUERIES and report whether it uses its index
+
+    On a small development table the planner rightly prefers a sequential scan, so by
+    default sequential scans are disabled for the check: it then shows the plan the
+    planner picks once the table holds millions of rows, and fails when no usable
+    index exists. Pass force_index=False to see the plans for the current data.
+
+    Returns:
+        One dict per query: name, expected index, indexes used, ok
+    """
+    cursor = conn.cursor()
+    report = []
+    try:
+        if force_index:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        for name, sql, params, index in HOT_QUERIES:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            used = list(dict.fromkeys(_parent_indexes(cursor, _plan_indexes(plan[0]["Plan"]))))
+            report.append({"query": name, "expected_index": index, "indexes_used": used, "ok": index in used})
+    finally:
+        conn.rollback()
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Apply or inspect database schema migrations")
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations")
+    parser.add_argument("--target", type=int, help="Apply migrations up to this version only")
+    parser.add_argument("--check-plans", action="store_true",
+                        help="EXPLAIN the hot queries and fail if one does not use its index")
+    parser.add_argument("--current-data", action="store_true",
+                        help="With --check-plans: do not disable sequential scans")
+    parser.add_argument("--database-url", help="libpq DSN/URI (default: DATABASE_URL or db.DB_CONFIG)")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    conn = create_connection()
+    try:
+        if args.status:
+            for row in migration_status(conn):
+                print(f"{'✅' if row['applied'] else '⏳'} {row['version']:04d}_{row['name']}")
+            return 0
+        if args.check_plans:
+            report = check_query_plans(conn, force_index=not args.current_data)
+            for row in report:
+                used = ", ".join(row["indexes_used"]) or "sequential scan"
+                print(f"{'✅' if row['ok'] else '❌'} {row['query']}: {used}")
+            return 0 if all(row["ok"] for row in report) else 1
+        applied = migrate(conn, target=args.target, verbose=True)
+        print(f"✅ Applied {len(applied)} migration(s)" if applied else "✅ Database schema is up to date")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,23 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Query
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Optional
-from db import setup_database, save_user_info, get_user_count, save_interaction, user_exists, create_connection
-from bedrock_search import initialize_bedrock_index, get_answer_bedrock, add_pdf_to_bedrock_index, generate_answer_with_bedrock
-from bedrock_faiss_indexer import BedrockFAISSIndexer
-from datetime import datetime, timedelta
+from db import setup_database, register_user, get_user_count, save_interaction, create_connection
+from bedrock_search import initialize_bedrock_index, index_generation, generation_flight, get_answer_bedrock, add_pdf_to_bedrock_index, generate_answer_with_bedrock, invoke_generation, stream_answer_with_bedrock
+from bedrock_faiss_indexer import BedrockFAISSIndexer, normalize_question, embedding_flight
+from perf_stages import stage, start_collection, stop_collection, format_server_timing
+from context_builder import build_context
+from text_utils import trim_to_tokens, is_list_like, format_points, trim_short_answer, needs_generation, query_fingerprint
+from answer_enrichment import enrich_documents
+from semantic_cache import SemanticCache
+from response_cache import ResponseCache, etag_matches
+from session_store import SESSION_TIMEOUT_MINUTES, create_session, get_session, delete_session
+from chat_rollups import daily_counts, total_between, monthly_counts, top_questions
+from db_export import stream_export, FORMATS as EXPORT_FORMATS
+from bedrock_client import CircuitOpenError, get_resilience_stats
+from datetime import date, datetime, timedelta
+from collections import OrderedDict
+from contextvars import ContextVar
 import os
 import glob
 import shutil
@@ -22,6 +34,8 @@ import boto3
 import json
 import re
 import urllib.parse
+import base64
+import threading
 
 app = FastAPI()
 
@@ -36,22 +50,54 @@ app.add_middleware(
 
 setup_database()
 
-# In-memory session state (for demo; use a real session store in production)
-session_state = {
-    "admin_authenticated": False,
-    "admin_password_attempts": 0,
-    "admin_login_step": None,
-    "admin_email_attempt": "",
-    "admin_password_attempt": "",
-    "show_admin_login": False,
-    "bedrock_indexer": None,
-    "role": None,
-    "last_activity": None,  # Track last activity for session timeout
-    "session_id": None,  # Add session ID for better tracking
-}
-
-# Session timeout configuration
-SESSION_TIMEOUT_MINUTES = 20  # 20 minutes
+# Per-stage timings in a Server-Timing response header (used by benchmark_chat.py)
+SERVER_TIMING_ENABLED = os.environ.get("ENABLE_SERVER_TIMING") == "1"
+
+@app.middleware("http")
+async def server_timing_middleware(request, call_next):
+    if not SERVER_TIMING_ENABLED:
+        return await call_next(request)
+    token = start_collection()
+    try:
+        response = await call_next(request)
+    finally:
+        durations = stop_collection(token)
+    response.headers["Server-Timing"] = format_server_timing(durations)
+    return response
+
+# Admin/sales sessions live in the database (see session_store.py). The token comes
+# from the session cookie set at login or an "Authorization: Bearer" header, and is
+# only looked up when an endpoint checks authentication.
+SESSION_COOKIE = "admin_session"
+
+class RequestSession:
+    def __init__(self, token):
+        self.token = token
+        self.loaded = False
+        self.session = None
+
+    def get(self):
+        if not self.loaded:
+            self.session = get_session(self.token)
+            self.loaded = True
+        return self.session
+
+_request_session = ContextVar("request_session", default=None)
+
+@app.middleware("http")
+async def session_token_middleware(request, call_next):
+    authorization = request.headers.get("authorization", "")
+    token = authorization[7:].strip() if authorization.lower().startswith("bearer ") else None
+    reset = _request_session.set(RequestSession(token or request.cookies.get(SESSION_COOKIE)))
+    try:
+        return await call_next(request)
+    finally:
+        _request_session.reset(reset)
+
+def current_session():
+    """Session of the current request (email, role, ...), or None if not logged in"""
+    request_session = _request_session.get()
+    return request_session.get() if request_session else None
 
 def list_data_files():
     data_dir = "data"
@@ -76,17 +122,19 @@ def list_data_files():
     return [f for f in os.listdir(data_dir) if os.path.isfile(os.path.join(data_dir, f))]
 
 def save_interaction(email, user_query, bot_response):
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        INSERT INTO chat_history (email, user_query, bot_response, timestamp)
-        VALUES (%s, %s, %s, NOW())
-        """,
-        (email, user_query, bot_response)
-    )
-    conn.commit()
-    conn.close()
+    with stage("db_insert"):
+        conn = create_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO chat_history (email, user_query, bot_response, timestamp, query_fingerprint)
+            VALUES (%s, %s, %s, NOW(), %s)
+            """,
+            (email, user_query, bot_response, query_fingerprint(user_query))
+        )
+        conn.commit()
+        conn.close()
+    analytics_cache.invalidate("chat_counts", "top_questions")
 
 
 
@@ -95,43 +143,6 @@ def extract_main_word(filename):
     main_word = name.split('_')[0].split(' ')[0]
     return main_word.capitalize()
 
-def trim_to_tokens(text, max_tokens=100):
-    tokens = re.findall(r'\b\w+\b', text)
-    if len(tokens) <= max_tokens:
-        return text
-    count = 0
-    for match in re.finditer(r'\b\w+\b', text):
-        count += 1
-        if count == max_tokens:
-            end_pos = match.end()
-            return text[:end_pos] + '...'
-    return text
-
-def is_list_like(text):
-    if '\n' in text:
-        return True
-    if re.search(r'\d+\.', text):
-        return True
-    if ';' in text:
-        return True
-    return False
-
-def format_points(text, max_tokens=100):
-    points = re.split(r'\n|;|\d+\.', text)
-    points = [p.strip() for p in points if p.strip()]
-    result = []
-    used_tokens = 0
-    for p in points:
-        p_trimmed = trim_to_tokens(p, max_tokens - used_tokens)
-        p_tokens = len(re.findall(r'\b\w+\b', p_trimmed))
-        if used_tokens + p_tokens > max_tokens:
-            break
-        result.append(f'- {p_trimmed}')
-        used_tokens += p_tokens
-        if used_tokens >= max_tokens:
-            break
-    return '\n'.join(result)
-
 # Helper: Reprocess all files in data folder and reload index
 def reprocess_and_reload_index():
     data_dir = "data"
@@ -144,40 +155,21 @@ def reprocess_and_reload_index():
             indexer.process_csv(file_path)
         elif file.lower().endswith(".pdf"):
             indexer.process_pdf(file_path)
+    enrich_documents(indexer)
     indexer.save_index(index_path)
     return initialize_bedrock_index()
 
 def is_privileged_authenticated():
-    if not session_state.get("admin_authenticated"):
-        return False
-    if session_state.get("role", "").lower() not in ["admin", "sales"]:  # Fixed: use lowercase
-        return False
-    
-    last = session_state.get("last_activity")
-    if not last:
-        # No last activity recorded, session is invalid
-        session_state["admin_authenticated"] = False
-        return False
-    
-    # Check if session has expired
-    if (datetime.now() - last > timedelta(minutes=SESSION_TIMEOUT_MINUTES)):
-        # Session expired
-        session_state["admin_authenticated"] = False
-        session_state["role"] = None
-        session_state["last_activity"] = None
-        session_state["session_id"] = None
-        return False
-    
-    # Session is valid, update last activity (but not on every call to reduce overhead)
-    # Only update if more than 5 minutes have passed since last update
-    if (datetime.now() - last > timedelta(minutes=20)):
-        session_state["last_activity"] = datetime.now()
-    
-    return True
+    return has_role("admin", "sales")
+
+def has_role(*roles):
+    """Whether the current request has a live session with one of roles"""
+    session = current_session()
+    return session is not None and (session["role"] or "").lower() in roles
 
 # --- Admin Endpoints ---
 @app.post("/admin/login")
-def admin_login(email: str, password: str):
+def admin_login(email: str, password: str, response: Response):
     # Query the sales_persons_data table for this email and password
     conn = create_connection()
     cursor = conn.cursor()
@@ -193,28 +185,23 @@ def admin_login(email: str, password: str):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     role = result[0]
-    session_state["admin_authenticated"] = True
-    session_state["role"] = role
-    session_state["last_activity"] = datetime.now()
+    token = create_session(email, role)
+    response.set_cookie(SESSION_COOKIE, token, max_age=SESSION_TIMEOUT_MINUTES * 60,
+                        httponly=True, samesite="lax")
 
     if role.lower() == "admin":
-        return {"success": True, "message": "Admin authenticated!", "role": "admin"}
+        return {"success": True, "message": "Admin authenticated!", "role": "admin", "token": token}
     elif role.lower() == "sales":
-        return {"success": True, "message": "Sales person authenticated!", "role": "sales"}
+        return {"success": True, "message": "Sales person authenticated!", "role": "sales", "token": token}
     else:
-        return {"success": True, "message": f"{role} authenticated!", "role": role}
+        return {"success": True, "message": f"{role} authenticated!", "role": role, "token": token}
 
 @app.post("/admin/logout")
-def admin_logout():
-    session_state["admin_authenticated"] = False
-    session_state["admin_password_attempts"] = 0
-    session_state["admin_login_step"] = None
-    session_state["admin_email_attempt"] = ""
-    session_state["admin_password_attempt"] = ""
-    session_state["show_admin_login"] = False
-    session_state["last_activity"] = None
-    session_state["role"] = None
-    session_state["session_id"] = None
+def admin_logout(response: Response):
+    request_session = _request_session.get()
+    if request_session:
+        delete_session(request_session.token)
+    response.delete_cookie(SESSION_COOKIE)
     return {"success": True, "message": "Logged out successfully."}
 
 @app.get("/admin/files")
@@ -226,7 +213,7 @@ def get_files():
 
 @app.post("/admin/upload")
 def upload_file(file: UploadFile = File(...)):
-    if not is_privileged_authenticated() or session_state.get("role", "").lower() != "admin":  # Fixed: use lowercase
+    if not has_role("admin"):
         raise HTTPException(status_code=403, detail="Only admin can upload files.")
 
     allowed_exts = ('.csv', '.pdf', '.ppt', '.pptx', '.doc', '.docx')
@@ -270,13 +257,12 @@ def upload_file(file: UploadFile = File(...)):
         message = f"File uploaded successfully! "
     
     reprocess_and_reload_index()
-    session_state["bedrock_indexer"] = None
     return {"success": True, "message": message}
 
 
 @app.delete("/admin/delete/{filename}")
 def delete_file(filename: str):
-    if not is_privileged_authenticated() or session_state.get("role", "").lower() != "admin":  # Fixed: use lowercase
+    if not has_role("admin"):
         raise HTTPException(status_code=403, detail="Only admin can delete files.")
 
     file_path = os.path.join("data", filename)
@@ -286,54 +272,75 @@ def delete_file(filename: str):
         # Rebuild index ONLY from current files
         reprocess_and_reload_index()
 
-        # Clear in-memory cached index
-        session_state["bedrock_indexer"] = None
-
         return {"success": True, "message": "File deleted and index reloaded successfully"}
     else:
         raise HTTPException(status_code=404, detail="File not found.")
 
 
 
+def encode_page_cursor(*key):
+    """Opaque keyset cursor for the last row of a page"""
+    raw = json.dumps(key, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_page_cursor(cursor, size):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(key, list) or len(key) != size:
+            raise ValueError(cursor)
+        return key
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid page cursor")
+
 @app.get("/chatusers/list")
-def get_users_list():
+def get_users_list(cursor: Optional[str] = Query(None), limit: int = Query(100, ge=1, le=500)):
     if not is_privileged_authenticated():
         raise HTTPException(status_code=401, detail="Not authenticated.")
     
     conn = create_connection()
-    cursor = conn.cursor()
-
-    # Get recent users with extracted date and time (not full timestamp)
-    cursor.execute('''
-        SELECT DISTINCT ON (u.email)
-            u.email,
-            u.phone,
-            c.chat_date,
-            c.chat_time,
-            u.status,
-            u.description
-          
+    db_cursor = conn.cursor()
+
+    # Users who have chatted, most recent first, one row per email. Keyset pagination on
+    # (last_chat_at, email), kept up to date by a trigger on chat_history.
+    if cursor:
+        last_chat_at, email = decode_page_cursor(cursor, 2)
+        after = "AND (u.last_chat_at, u.email) < (%s::timestamp, %s)"
+        params = (last_chat_at, email, limit + 1)
+    else:
+        after = ""
+        params = (limit + 1,)
+    db_cursor.execute(f'''
+        SELECT u.email, u.phone, u.last_chat_at, u.status, u.description,
+               u.interest_score, u.interest_level, u.interest_topics
         FROM users u
-        JOIN chat_history c ON u.email = c.email
-        ORDER BY u.email DESC ,c.chat_date DESC,c.chat_time DESC
-        LIMIT 100
-    ''')
-    users = cursor.fetchall()
+        WHERE u.last_chat_at IS NOT NULL {after}
+          AND NOT EXISTS (SELECT 1 FROM users d WHERE d.email = u.email AND d.id < u.id)
+        ORDER BY u.last_chat_at DESC, u.email DESC
+        LIMIT %s
+    ''', params)
+    users = db_cursor.fetchall()
     conn.close()
 
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_page_cursor(users[-1][2].isoformat(), users[-1][0])
+
     return {
         "users": [
             {
                 "email": u[0],
                 "phone": u[1],
-                "chat_date": datetime.strptime(str(u[2]), "%Y-%m-%d").strftime("%d/%m/%Y") if u[2] else None,
-                "chat_time": datetime.strptime(str(u[3]), "%H:%M:%S.%f").strftime("%H:%M") if u[3] else None,
-               # "chat_date": u[2],
-               # "chat_time": u[3],
-                "status": u[4],
-                "description": u[5]
+                "chat_date": u[2].strftime("%d/%m/%Y"),
+                "chat_time": u[2].strftime("%H:%M"),
+                "status": u[3],
+                "description": u[4],
+                "interest_score": u[5],
+                "interest_level": u[6],
+                "interest_topics": u[7]
             } for u in users
-        ]
+        ],
+        "next_cursor": next_cursor
     }
 
 
@@ -378,21 +385,42 @@ def get_users_list():
 
 
 @app.get("/users/history")
-def get_user_history(email: str = Query(...)):
+def get_user_history(email: str = Query(...), cursor: Optional[str] = Query(None),
+                     limit: int = Query(100, ge=1, le=500),
+                     date_from: Optional[date] = Query(None), date_to: Optional[date] = Query(None)):
     if not is_privileged_authenticated():
         raise HTTPException(status_code=401, detail="Not authenticated.")
+    # Newest first; pages continue below the last id seen (index on (email, id DESC)).
+    # A date range only reads the monthly chat_history partitions it covers.
+    before_id = int(decode_page_cursor(cursor, 1)[0]) if cursor else None
+    conditions = ["email = %s"]
+    params = [email]
+    if before_id is not None:
+        conditions.append("id < %s")
+        params.append(before_id)
+    if date_from is not None:
+        conditions.append("chat_date >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("chat_date <= %s")
+        params.append(date_to)
     conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT user_query, bot_response,chat_date,chat_time FROM chat_history
-        WHERE email = %s
+    db_cursor = conn.cursor()
+    db_cursor.execute(f"""
+        SELECT id, user_query, bot_response, chat_date, chat_time FROM chat_history
+        WHERE {' AND '.join(conditions)}
         ORDER BY id DESC
-        LIMIT 100
-    """, (email,))
-    history = cursor.fetchall()
+        LIMIT %s
+    """, (*params, limit + 1))
+    history = db_cursor.fetchall()
     conn.close()
+    next_cursor = encode_page_cursor(history[limit - 1][0]) if len(history) > limit else None
     # Return as list of dicts
-    return {"history": [{"user_query": h[0], "bot_response": h[1], "chat_date": h[2], "chat_time": h[3]} for h in history]}
+    return {
+        "history": [{"user_query": h[1], "bot_response": h[2], "chat_date": h[3], "chat_time": h[4]}
+                    for h in history[:limit]],
+        "next_cursor": next_cursor
+    }
 
 # --- User Endpoints ---
 @app.post("/user/register")
@@ -401,8 +429,8 @@ def user_register(
     phone: str = Form(...),
     country: str = Form('India')
 ):
-    if not user_exists(email, phone):
-        save_user_info(email, phone, country)
+    if register_user(email, phone, country):
+        analytics_cache.invalidate("user_count")
     return {"success": True, "message": "User registered."}
 
 # @app.post("/chat")
@@ -477,7 +505,7 @@ def user_register(
         }
 
     else:
-        topics_str = ", ".join([extract_main_word(f) for f in all_files])
+        topics_str = ", ".join([extract_main_word(f) for f in list_data_files()])
         msg = f"Sorry, I couldn't find an answer to that. I have data only on: {topics_str}"
         save_interaction(email, user_query, msg)
         return {
@@ -541,8 +569,9 @@ def search_branch_in_data(location, query):
             
         print(f"Found CSV files: {csv_files}")
         
-        # Load all branch data
+        # Load all branch data (the same branch can appear in several overlapping CSVs)
         all_branches = []
+        seen_branches = set()
         for csv_file in csv_files:
             csv_path = os.path.join(data_dir, csv_file)
             try:
@@ -560,7 +589,9 @@ def search_branch_in_data(location, query):
                         email = str(row.get('email', '')).strip()
                         country = str(row.get('country', '')).strip()
                         
-                        if city and city != 'nan':
+                        branch_key = (city.lower(), re.sub(r'\W+', '', address.lower()))
+                        if city and city != 'nan' and branch_key not in seen_branches:
+                            seen_branches.add(branch_key)
                             all_branches.append({
                                 'country': country,
                                 'city': city,
@@ -636,18 +667,136 @@ def search_branch_in_data(location, query):
 
 
 
-@app.post("/chat")
-def chat(email: str = Form(...), user_query: str = Form(...)):
+def answer_parts(results):
+    """
+    Short answer, document-only long answer and generation context for retrieval results
+
+    Returns:
+        Tuple of (trimmed_short, trimmed_long, context); trimmed_long is built without
+        any Bedrock call and may be empty or just repeat the short answer. context is
+        None when the long answer was precomputed at index time (nothing to generate).
+    """
+    best_doc, _ = results[0]
+    if best_doc.get('source') == 'csv':
+        if 'long_answer' in best_doc:
+            # Enriched at index time (answer_enrichment.py): no trimming or Titan call here
+            return best_doc['short_answer'], best_doc['long_answer'], None
+        context = build_context([
+            (doc.get('details') or doc.get('answer') or doc.get('text') or "", score)
+            for doc, score in results
+        ])
+        short_ans = best_doc.get('answer') or best_doc.get('text') or ""
+        long_ans = best_doc.get('details') or best_doc.get('text') or ""
+    else:
+        # Best chunks first, overlapping sentences dropped, within the prompt token budget
+        context = build_context([(doc.get('text', ''), score) for doc, score in results])
+        short_ans = best_doc.get('text', '')
+        long_ans = context
+    trimmed_short = trim_short_answer(short_ans)
+    trimmed_long = trim_to_tokens(long_ans, 200)
+    return trimmed_short, trimmed_long, context or trimmed_short
+
+def has_more_answer(exact_hit, trimmed_short, trimmed_long, context):
+    """Whether "Tell me more" has anything to add (exact FAQ hits are never sent to Titan)"""
+    return not ((exact_hit or context is None) and needs_generation(trimmed_short, trimmed_long))
+
+def build_long_answer(user_query, exact_hit, trimmed_short, trimmed_long, context):
+    """
+    The "Tell me more" answer, generated with Titan when the documents have no details
+
+    Returns None when generation fails (throttling, circuit open, timeout); the caller
+    then answers from the documents alone and must not cache that as the answer.
+    """
+    if not needs_generation(trimmed_short, trimmed_long):
+        return trimmed_long
+    if exact_hit or context is None:
+        # Exact FAQ hit or precomputed answer: answer from the row alone, no generation call
+        return ""
+    try:
+        return trim_to_tokens(invoke_generation(user_query, context), 300)
+    except Exception as e:
+        logging.error(f"Long answer generation failed: {e}")
+        return None
+
+def full_long_answer(results, trimmed_short, long_part):
+    """
+    The long_desc clients get after "Tell me more" (/chat/stream's "done", /chat/more)
+
+    CSV FAQ answers repeat the short answer before the details, as /chat always did.
+    """
+    best_doc, _ = results[0]
+    return trimmed_short + long_part if best_doc.get('source') == 'csv' else long_part
+
+# Retrieval results reused for paraphrased questions (see semantic_cache.py)
+semantic_cache = SemanticCache(
+    threshold=float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+    max_entries=int(os.environ.get("SEMANTIC_CACHE_SIZE", "1000")),
+)
+
+# "Tell me more" answers built by /chat/more, most recently used last
+LONG_ANSWER_CACHE_SIZE = 512
+long_answer_cache = OrderedDict()
+long_answer_cache_lock = threading.Lock()
+
+# Dashboard analytics polled by the admin UI; invalidated by the chat and user writers
+analytics_cache = ResponseCache(ttl_seconds=float(os.environ.get("ANALYTICS_CACHE_TTL", "30")),
+                                name="analytics")
+
+def cached_json(request, key, compute):
+    """
+    JSON response for key from analytics_cache, with an ETag
+
+    Clients that send the current ETag in If-None-Match get an empty 304 instead.
+    """
+    payload, etag = analytics_cache.get(key, compute)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
+
+def encode_continuation_token(user_query, exact_hit, results):
+    """
+    Self-contained /chat/more token: the question, the index generation and the ids
+    of the retrieved documents, so the long answer can be built without re-searching
+    """
+    doc_ids = [doc.get('row_index') for doc, _ in results]
+    payload = {
+        "q": user_query,
+        "g": index_generation(),
+        "d": doc_ids if None not in doc_ids else [],
+        "x": bool(exact_hit),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_continuation_token(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        return str(payload["q"]), int(payload["g"]), [int(i) for i in payload["d"]], bool(payload.get("x"))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid continuation token")
+
+def answer_without_retrieval(email, user_query):
+    """
+    Replies that need no document retrieval: branch lookups, greetings and the
+    no-files message. Saves the interaction and returns the /chat response dict,
+    or None when the query should go through retrieval.
+    """
     user_query_lower = user_query.lower()
     # Check for branch queries first
-    if any(keyword in user_query_lower for keyword in ["branch", "branches", "location", "locations", "office", "offices"]):
+    with stage("intent_routing"):
+        is_branch_query = any(keyword in user_query_lower for keyword in ["branch", "branches", "location", "locations", "office", "offices"])
+    if is_branch_query:
         print(f"Branch query detected: {user_query}")
-        location = extract_location_from_query(user_query)
+        with stage("intent_routing"):
+            location = extract_location_from_query(user_query)
         print(f"Extracted location: {location}")
         
         if location:
             # Search for branch information in uploaded data
-            branch_info = search_branch_in_data(location, user_query)
+            with stage("branch_lookup"):
+                branch_info = search_branch_in_data(location, user_query)
             print(f"Branch info result: {branch_info}")
             if branch_info:
                 save_interaction(email, user_query, branch_info)
@@ -657,7 +806,8 @@ def chat(email: str = Form(...), user_query: str = Form(...)):
                 }
         else:
             # General branch query
-            branch_info = search_branch_in_data(None, user_query)
+            with stage("branch_lookup"):
+                branch_info = search_branch_in_data(None, user_query)
             print(f"General branch info result: {branch_info}")
             if branch_info:
                 save_interaction(email, user_query, branch_info)
@@ -684,9 +834,10 @@ def chat(email: str = Form(...), user_query: str = Form(...)):
         "thank you so much for your help": "You're welcome! How can I help you today?"
     }
 
-    normalized_query = user_query.strip().lower()
-    if normalized_query in greetings:
-        polite_reply = greetings[normalized_query]
+    with stage("intent_routing"):
+        normalized_query = user_query.strip().lower()
+        polite_reply = greetings.get(normalized_query)
+    if polite_reply:
         save_interaction(email, user_query, polite_reply)
         return {
             #"short_desc": polite_reply,
@@ -696,7 +847,8 @@ def chat(email: str = Form(...), user_query: str = Form(...)):
 
     # Check if files exist
     data_dir = "data"
-    all_files = [f for f in os.listdir(data_dir) if os.path.isfile(os.path.join(data_dir, f))]
+    with stage("intent_routing"):
+        all_files = [f for f in os.listdir(data_dir) if os.path.isfile(os.path.join(data_dir, f))]
     if not all_files:
         msg = "No files available. Please upload documents for me to assist you."
         save_interaction(email, user_query, msg)
@@ -706,220 +858,229 @@ def chat(email: str = Form(...), user_query: str = Form(...)):
             "more_available": False
         }
 
-    # Always reinitialize index based on current data
-    bedrock_indexer = initialize_bedrock_index()
-    results = bedrock_indexer.search(user_query, k=3, threshold=0.15)
+    return None
 
-    if results:
-        best_doc, _ = results[0]
-        short_ans = best_doc.get('answer') or best_doc.get('text') or ""
-        long_ans = best_doc.get('details') or best_doc.get('text') or ""
+def retrieve_for_chat(user_query, bedrock_indexer=None):
+    """
+    Exact FAQ hit (or None) and the retrieval results used to answer user_query
 
-        trimmed_short = format_points(short_ans, 60) if is_list_like(short_ans) else trim_to_tokens(short_ans, 60)
-        trimmed_long = trim_to_tokens(long_ans, 200)
+    Queries that need an embedding reuse the results of a recent similar query from
+    semantic_cache instead of searching again.
+    """
+    with stage("index_load"):
+        generation = index_generation()
+        if bedrock_indexer is None:
+            # Always reinitialize index based on current data
+            bedrock_indexer = initialize_bedrock_index()
+    # Near-verbatim FAQ questions are answered without any Bedrock call
+    with stage("exact_match"):
+        exact_hit = bedrock_indexer.lookup_exact(user_query)
+    if exact_hit:
+        return exact_hit, [exact_hit]
+    results = bedrock_indexer.lexical_shortcut(user_query, k=3)
+    if results is not None:
+        return None, results
+    try:
+        # The embedding is needed anyway: check it against past queries first
+        query_vector = bedrock_indexer.embed_query(user_query)
+    except CircuitOpenError:
+        # Bedrock keeps throttling: answer from keywords until the circuit closes
+        return None, bedrock_indexer.lexical_search(user_query, k=3)
+    with stage("semantic_cache"):
+        cached = semantic_cache.lookup(query_vector, generation)
+    if cached is not None:
+        return None, cached
+    results = bedrock_indexer.hybrid_search(user_query, k=3, query_embedding=query_vector,
+                                           mmr=True, range_search=True)
+    semantic_cache.store(query_vector, results, generation)
+    return None, results
 
+@app.post("/chat")
+def chat(email: str = Form(...), user_query: str = Form(...)):
+    immediate = answer_without_retrieval(email, user_query)
+    if immediate is not None:
+        return immediate
 
-        if results:
-
-            best_doc, _ = results[0]
-            if best_doc.get('source') == 'csv':
-                # --- CSV logic (keep as is) ---
-                short_ans = best_doc.get('answer') or best_doc.get('text') or ""
-                long_ans = best_doc.get('details') or best_doc.get('text') or ""
-                trimmed_short = format_points(short_ans, 60) if is_list_like(short_ans) else trim_to_tokens(short_ans, 60)
-                trimmed_long = trim_to_tokens(long_ans, 200)
-                if not trimmed_long or trimmed_long.lower() == trimmed_short.lower():
-                    context = "\n\n".join([
-                        doc.get('details') or doc.get('answer') or doc.get('text') or ""
-                        for doc, _ in results
-                    ]) or trimmed_short
-                    try:
-                        generated_long = generate_answer_with_bedrock(user_query, context)
-                        trimmed_long = trim_to_tokens(generated_long, 300)
-                    except:
-                        trimmed_long = None
-                save_interaction(email, user_query, trimmed_short)
-                return {
-                    #"short_desc": trimmed_short,
-                    "long_desc": trimmed_short+trimmed_long,
+    exact_hit, results = retrieve_for_chat(user_query)
+    if results:
+        with stage("post_processing"):
+            trimmed_short, trimmed_long, context = answer_parts(results)
+            more_available = has_more_answer(exact_hit, trimmed_short, trimmed_long, context)
+            token = encode_continuation_token(user_query, exact_hit, results) if more_available else None
+        save_interaction(email, user_query, trimmed_short)
+        # The long answer (and any Titan call it needs) is only built by /chat/more
+        return {
+            "long_desc": trimmed_short,
+            "more_available": more_available,
+            "continuation_token": token
+        }
 
-                    "more_available": bool(trimmed_long)
-                }
-            else:
-                # --- PDF logic (improved) ---
-                seen = set()
-                context_chunks = []
-                for doc, _ in results:
-                    txt = doc.get('text', '')
-                    if txt not in seen and len(context_chunks) < 3:
-                        context_chunks.append(txt)
-                        seen.add(txt)
-                context = "\n\n".join(context_chunks)
-                short_ans = context_chunks[0] if context_chunks else ""
-                trimmed_short = format_points(short_ans, 60) if is_list_like(short_ans) else trim_to_tokens(short_ans, 60)
-                trimmed_long = trim_to_tokens(context, 200)
-                if not trimmed_long or trimmed_long.lower() == trimmed_short.lower():
-                    try:
-                        generated_long = generate_answer_with_bedrock(user_query, context)
-                        trimmed_long = trim_to_tokens(generated_long, 300)
-                    except:
-                        trimmed_long = None
-                save_interaction(email, user_query, trimmed_short)
-                return {
-                    #"short_desc":None,
-                    "long_desc": trimmed_long,
-                    "more_available": bool(trimmed_long)
-                }
+    topics_str = ", ".join([extract_main_word(f) for f in list_data_files()])
+    msg = f"Sorry, I couldn't find an answer to that."# I have data only on: {topics_str}"
+    save_interaction(email, user_query, msg)
+    return {
+        #"short_desc": None,
+        "long_desc": msg,
+        "more_available": False
+    }
 
-    else:
-        topics_str = ", ".join([extract_main_word(f) for f in all_files])
-        msg = f"Sorry, I couldn't find an answer to that."# I have data only on: {topics_str}"
+def sse_event(event, data):
+    """Format one Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_chat_events(email, user_query):
+    """
+    Generate the SSE events of /chat/stream
+
+    Event order: "short" (retrieved short answer, sent as soon as retrieval finishes),
+    zero or more "token" events with pieces of the long answer (streamed from Titan when
+    it has to be generated), then "done" with the complete answer in "long_desc".
+    Replies that need no retrieval are sent as a single "done" event.
+    """
+    immediate = answer_without_retrieval(email, user_query)
+    if immediate is not None:
+        yield sse_event("done", immediate)
+        return
+
+    exact_hit, results = retrieve_for_chat(user_query)
+    if not results:
+        msg = "Sorry, I couldn't find an answer to that."
         save_interaction(email, user_query, msg)
-        return {
-            #"short_desc": None,
-            "long_desc": msg,
-            "more_available": False
-        }
+        yield sse_event("done", {"long_desc": msg, "more_available": False})
+        return
 
-    # --- Automatic summary update logic ---
-    # 1. Count the number of questions for this user
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM chat_history WHERE email = %s", (email,))
-    question_count = cursor.fetchone()[0]
-    conn.close()
+    trimmed_short, trimmed_long, context = answer_parts(results)
+    pieces = []
+    long_part = None  # the long answer, once it is complete
+    try:
+        yield sse_event("short", {"text": trimmed_short})
 
-    # 2. If 4 or more, update summary
-    if question_count >= 1:
-        # Try to get phone from the chat request, or fetch from users table if not provided
-        user_phone = None
-        if 'phone' in locals() and phone:
-            user_phone = phone
+        if not has_more_answer(exact_hit, trimmed_short, trimmed_long, context):
+            long_part = ""
+        elif needs_generation(trimmed_short, trimmed_long):
+            try:
+                with stage("generation"):
+                    for piece in stream_answer_with_bedrock(user_query, context):
+                        pieces.append(piece)
+                        yield sse_event("token", {"text": piece})
+            except Exception as e:
+                logging.error(f"Streaming generation failed: {e}")
+                yield sse_event("error", {"detail": "Answer generation failed"})
+            long_part = trim_to_tokens("".join(pieces), 300)
         else:
-            conn = create_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT phone FROM users WHERE email = %s", (email,))
-            result = cursor.fetchone()
-            conn.close()
-            user_phone = result[0] if result else None
-        if user_phone:
-            update_user_interest_summary(email)
+            long_part = trimmed_long
+            yield sse_event("token", {"text": trimmed_long})
+    finally:
+        # Also runs when the client disconnects mid-stream: save what was produced so far
+        if long_part is None:
+            long_part = trim_to_tokens("".join(pieces), 300)
+        save_interaction(email, user_query, full_long_answer(results, trimmed_short, long_part) or trimmed_short)
+
+    yield sse_event("done", {"long_desc": full_long_answer(results, trimmed_short, long_part),
+                             "more_available": bool(long_part)})
+
+@app.post("/chat/stream")
+def chat_stream(email: str = Form(...), user_query: str = Form(...)):
+    """Same answers as /chat, delivered as Server-Sent Events while they are produced"""
+    return StreamingResponse(
+        stream_chat_events(email, user_query),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/chat/more")
+def chat_more(continuation_token: str = Form(...)):
+    """Long ("Tell me more") answer for a /chat response, built on demand and cached"""
+    user_query, generation, doc_ids, exact = decode_continuation_token(continuation_token)
+    cache_key = (generation, normalize_question(user_query), tuple(doc_ids))
+    with long_answer_cache_lock:
+        long_desc = long_answer_cache.get(cache_key)
+        if long_desc is not None:
+            long_answer_cache.move_to_end(cache_key)
+    if long_desc is not None:
+        return {"long_desc": long_desc, "more_available": False}
+
+    with stage("index_load"):
+        bedrock_indexer = initialize_bedrock_index()
+    documents = bedrock_indexer.documents
+    if doc_ids and generation == index_generation() and all(0 <= i < len(documents) for i in doc_ids):
+        results = [(documents[i], 0.0) for i in doc_ids]
+        exact_hit = results[0] if exact else None
+    else:
+        # The index changed since the token was issued: search again
+        exact_hit, results = retrieve_for_chat(user_query, bedrock_indexer)
+
+    long_desc = ""
+    if results:
+        with stage("post_processing"):
+            trimmed_short, trimmed_long, context = answer_parts(results)
+        long_part = build_long_answer(user_query, exact_hit, trimmed_short, trimmed_long, context)
+        if long_part is None:
+            # Generation failed: answer from the documents and try again next time
+            return {"long_desc": full_long_answer(results, trimmed_short, trimmed_long or ""),
+                    "more_available": False}
+        long_desc = full_long_answer(results, trimmed_short, long_part)
+
+    with long_answer_cache_lock:
+        long_answer_cache[cache_key] = long_desc
+        long_answer_cache.move_to_end(cache_key)
+        while len(long_answer_cache) > LONG_ANSWER_CACHE_SIZE:
+            long_answer_cache.popitem(last=False)
+    return {"long_desc": long_desc, "more_available": False}
 
 @app.get("/user/count")
-def user_count():
-    return {"count": get_user_count()} 
+def user_count(request: Request):
+    return cached_json(request, "user_count", lambda: {"count": get_user_count()})
 
 
 
 
 # New API: Chat analytics (total chats per day, week, month)
-@app.get("/analytics/chat_counts")
-def chat_counts():
+def compute_chat_counts():
+    conn = create_connection()
     try:
-        conn = create_connection()
         cursor = conn.cursor()
 
-        # Total chats per day
-        cursor.execute("""
-            SELECT chat_date, COUNT(*) as total_chats
-            FROM chat_history
-            GROUP BY chat_date
-            ORDER BY chat_date DESC
-            LIMIT 30
-        """)
-        daily = cursor.fetchall()
+        # Counts come from the chat_daily_counts rollup (see chat_rollups.py)
+        daily = daily_counts(cursor, 30)
 
         # Last 7 days aggregation (rolling week)
         today = datetime.now().date()
         seven_days_ago = today - timedelta(days=6)
-        
-        # Get chats for each day in the last 7 days
-        cursor.execute("""
-            SELECT chat_date, COUNT(*) as total_chats
-            FROM chat_history
-            WHERE chat_date >= %s AND chat_date <= %s
-            GROUP BY chat_date
-            ORDER BY chat_date DESC
-        """, (seven_days_ago, today))
-        
-        daily_chats = cursor.fetchall()
-        
-        # Create a complete 7-day list with 0 for days with no chats
-        total_chats_7_days = 0
-        for i in range(7):
-            current_date = today - timedelta(days=i)
-            current_date_str = current_date.strftime('%Y-%m-%d')
-            # Find if this date has chat data
-            chat_count = 0
-            for row in daily_chats:
-                if str(row[0]) == current_date_str:
-                    chat_count = row[1]
-                    break
-            total_chats_7_days += chat_count
         # Format date range as dd/mm/yyyy-dd/mm/yyyy
         date_range = f"{seven_days_ago.strftime('%d/%m/%Y')}-{today.strftime('%d/%m/%Y')}"
         weekly = {
             "date_range": date_range,
-            "total_chats": total_chats_7_days
+            "total_chats": total_between(cursor, seven_days_ago, today)
         }
 
         # Monthly aggregation
-        try:
-            cursor.execute("""
-                SELECT DATE_TRUNC('month', chat_date) as month_start, COUNT(*) as total_chats
-                FROM chat_history
-                GROUP BY month_start
-                ORDER BY month_start DESC
-                LIMIT 12
-            """)
-            monthly_raw = cursor.fetchall()
-            monthly = []
-            for row in monthly_raw:
-                month_start = row[0]
-                if isinstance(month_start, str):
-                    month_start_dt = datetime.strptime(month_start, "%Y-%m-%d")
-                else:
-                    month_start_dt = month_start
-                # Calculate last day of the month
-                if month_start_dt.month == 12:
-                    next_month = month_start_dt.replace(year=month_start_dt.year+1, month=1, day=1)
-                else:
-                    next_month = month_start_dt.replace(month=month_start_dt.month+1, day=1)
-                month_end_dt = next_month - timedelta(days=1)
-                month_range = f"{month_start_dt.strftime('%d-%m-%Y')} -- {month_end_dt.strftime('%d-%m-%Y')}"
-                monthly.append({"month_range": month_range, "total_chats": row[1]})
-        except Exception:
-            # Fallback for SQLite
-            cursor.execute("""
-                SELECT strftime('%Y-%m', chat_date) as month_start, COUNT(*) as total_chats
-                FROM chat_history
-                GROUP BY month_start
-                ORDER BY month_start DESC
-                LIMIT 12
-            """)
-            monthly_raw = cursor.fetchall()
-            monthly = []
-            for row in monthly_raw:
-                year, month = row[0].split('-')
-                month_start_dt = datetime.strptime(f'{year}-{month}-01', "%Y-%m-%d")
-                if int(month) == 12:
-                    next_month = month_start_dt.replace(year=month_start_dt.year+1, month=1, day=1)
-                else:
-                    next_month = month_start_dt.replace(month=month_start_dt.month+1, day=1)
-                month_end_dt = next_month - timedelta(days=1)
-                month_range = f"{month_start_dt.strftime('%d-%m-%Y')} -- {month_end_dt.strftime('%d-%m-%Y')}"
-                monthly.append({"month_range": month_range, "total_chats": row[1]})
-
-        conn.close()
+        monthly = []
+        for month_start_dt, total_chats in monthly_counts(cursor, 12):
+            # Calculate last day of the month
+            if month_start_dt.month == 12:
+                next_month = month_start_dt.replace(year=month_start_dt.year+1, month=1, day=1)
+            else:
+                next_month = month_start_dt.replace(month=month_start_dt.month+1, day=1)
+            month_end_dt = next_month - timedelta(days=1)
+            month_range = f"{month_start_dt.strftime('%d-%m-%Y')} -- {month_end_dt.strftime('%d-%m-%Y')}"
+            monthly.append({"month_range": month_range, "total_chats": total_chats})
 
         return {
             "daily": [{"date": str(row[0]), "total_chats": row[1]} for row in daily],
             "weekly": weekly,
             "monthly": monthly,
         }
+    finally:
+        conn.close()
+
+@app.get("/analytics/chat_counts")
+def chat_counts(request: Request):
+    try:
+        return cached_json(request, "chat_counts", compute_chat_counts)
     except Exception as e:
         print("Analytics error:", e)
-        return {"error": str(e)} 
+        return {"error": str(e)}
 
 @app.post("/user/create")
 def create_sales_person(
@@ -928,7 +1089,7 @@ def create_sales_person(
     password: str = Form(...),
     role: str = Form(...)
 ):
-    if not is_privileged_authenticated() or session_state.get("role", "").lower() != "admin":
+    if not has_role("admin"):
         raise HTTPException(status_code=403, detail="Only admin can create sales persons.")
     conn = create_connection()
     cursor = conn.cursor()
@@ -953,7 +1114,7 @@ def update_sales_person(
     password: str = Form(None),
     role: str = Form(None)
 ):
-    if not is_privileged_authenticated() or session_state.get("role", "").lower() != "admin":
+    if not has_role("admin"):
         raise HTTPException(status_code=403, detail="Only admin can update sales persons.")
     conn = create_connection()
     cursor = conn.cursor()
@@ -987,7 +1148,7 @@ def update_sales_person(
 
 @app.delete("/user/delete")
 def delete_sales_person(email: str = Form(...)):
-    if not is_privileged_authenticated() or session_state.get("role", "").lower() != "admin":
+    if not has_role("admin"):
         raise HTTPException(status_code=403, detail="Only admin can delete sales persons.")
     conn = create_connection()
     cursor = conn.cursor()
@@ -1005,63 +1166,100 @@ def delete_sales_person(email: str = Form(...)):
         return {"success": False, "message": f"Error: {str(e)}"}
     finally:
         conn.close() 
-@app.get("/admin/top-questions")
-def get_top_questions():
-    if not is_privileged_authenticated():  # Allow both admin and sales to view
-        raise HTTPException(status_code=401, detail="Not authenticated.")
+def compute_top_questions():
     conn = create_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("""
-            SELECT user_query, COUNT(*) as count
-            FROM chat_history
-            GROUP BY user_query
-            ORDER BY count DESC
-            LIMIT 15
-        """)
-        results = cursor.fetchall()
+        # Variants of a question are counted together (see chat_rollups.py)
+        results = top_questions(cursor, 15)
         return {
             "top_questions": [
-                {"question": row[0], "count": row[1]}
-                for row in results
+                {"question": sample_query, "count": count}
+                for _, sample_query, count in results
             ]
         }
     finally:
         conn.close()
 
+@app.get("/admin/top-questions")
+def get_top_questions(request: Request):
+    if not is_privileged_authenticated():  # Allow both admin and sales to view
+        raise HTTPException(status_code=401, detail="Not authenticated.")
+    return cached_json(request, "top_questions", compute_top_questions)
+
+@app.get("/admin/cache-stats")
+def get_cache_stats():
+    """Hit rates and sizes of the in-process response caches, and coalesced Bedrock calls"""
+    if not is_privileged_authenticated():
+        raise HTTPException(status_code=401, detail="Not authenticated.")
+    with long_answer_cache_lock:
+        long_answer_entries = len(long_answer_cache)
+    return {
+        "semantic_cache": semantic_cache.get_stats(),
+        "long_answer_cache": {
+            "entries": long_answer_entries,
+            "max_entries": LONG_ANSWER_CACHE_SIZE
+        },
+        "analytics_cache": analytics_cache.get_stats(),
+        "single_flight": [embedding_flight.get_stats(), generation_flight.get_stats()]
+    }
+
+@app.get("/admin/bedrock-stats")
+def get_bedrock_stats():
+    """Bedrock latency histograms, hedged requests and circuit breaker state"""
+    if not is_privileged_authenticated():
+        raise HTTPException(status_code=401, detail="Not authenticated.")
+    return {"clients": get_resilience_stats()}
+
+@app.get("/admin/export")
+def export_data(
+    table: str = Query("chat_history"),
+    export_format: str = Query("csv", alias="format"),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None)
+):
+    """
+    Stream a full dump of chat_history or users (leads) as CSV or NDJSON
+
+    date_from/date_to (inclusive) filter chats by chat_date and leads by their last chat.
+    """
+    if not is_privileged_authenticated():
+        raise HTTPException(status_code=401, detail="Not authenticated.")
+    try:
+        chunks = stream_export(table, export_format, date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    extension = "csv" if export_format == "csv" else "ndjson"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{extension}"'}
+    )
+
 @app.get("/admin/session-status")
 def get_session_status():
     """Check current session status for debugging"""
-    if not session_state.get("admin_authenticated"):
+    session = current_session()
+    if session is None:
         return {
             "authenticated": False,
             "message": "Not authenticated",
             "last_activity": None,
             "session_id": None
         }
-    
-    last_activity = session_state.get("last_activity")
-    if last_activity:
-        time_remaining = SESSION_TIMEOUT_MINUTES - ((datetime.now() - last_activity).total_seconds() / 60)
-        return {
-            "authenticated": True,
-            "role": session_state.get("role"),
-            "session_id": session_state.get("session_id"),
-            "last_activity": last_activity.isoformat(),
-            "time_remaining_minutes": round(max(0, time_remaining), 1),
-            "session_timeout_minutes": SESSION_TIMEOUT_MINUTES
-        }
-    else:
-        return {
-            "authenticated": False,
-            "message": "Session has no last activity",
-            "last_activity": None,
-            "session_id": None
-        }
+    return {
+        "authenticated": True,
+        "role": session["role"],
+        "session_id": session["session_id"],
+        "last_activity": session["last_activity"].isoformat(),
+        "time_remaining_minutes": round(max(0, session["remaining_minutes"]), 1),
+        "session_timeout_minutes": SESSION_TIMEOUT_MINUTES
+    }
+
 @app.post("/admin/estimate-memory")
 def estimate_pdf_memory(file: UploadFile = File(...)):
     """Estimate memory usage for processing a PDF file"""
-    if not is_privileged_authenticated() or session_state.get("role", "").lower() != "admin":  # Fixed: use lowercase
+    if not has_role("admin"):
         raise HTTPException(status_code=403, detail="Only admin can estimate memory usage.")
 
     if not file.filename.lower().endswith('.pdf'):
@@ -1096,7 +1294,7 @@ def update_users(
     status: str = Form(None),
     description: str = Form(None)
 ):
-    if not is_privileged_authenticated() or session_state.get("role", "").lower() not in ["admin", "sales"]:
+    if not is_privileged_authenticated():
         raise HTTPException(status_code=403, detail="Only admin or sales can update user status and description.")
     conn = create_connection()
     cursor = conn.cursor()
@@ -1127,31 +1325,3 @@ def update_users(
         return {"success": False, "message": f"Error: {str(e)}"}
     finally:
         conn.close()
-
-# def update_user_interest_summary(email):
-#     print(f"[DEBUG] Updating summary for: {email}")
-#     conn = create_connection()
-#     cursor = conn.cursor()
-#     cursor.execute("SELECT user_query FROM chat_history WHERE email = %s", (email,))
-#     queries = [row[0] for row in cursor.fetchall()]
-#     conn.close()
-
-#     print(f"[DEBUG] Found {len(queries)} queries for {email}")
-
-#     if not queries:
-#         summary_final = "Not Interested"
-#     else:
-#         # TEMP: Hardcode summary for debugging
-#         summary_final = "Interested"
-#         print(f"[DEBUG] (TEMP) Setting summary_final to: {summary_final}")
-
-#     conn = create_connection()
-#     cursor = conn.cursor()
-#     print(f"[DEBUG] Executing update for {email} with summary: {summary_final}")
-#     cursor.execute(
-#         "UPDATE users SET summary = %s WHERE email = %s",
-#         (summary_final, email)
-#     )
-#     print(f"[DEBUG] Update executed, rows affected: {cursor.rowcount}")
-#     conn.commit()
-#     conn.close()
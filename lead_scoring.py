@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Batch lead-interest scoring
+
+Reads the chats added since the last run (a watermark on chat_history.id in
+job_watermarks), scores each chat, and adds the points to the lead's
+users.interest_score in one batched UPDATE per batch, together with the FAQ topics
+the lead asked about and an interest_level label. Results and watermark are committed
+together, so every chat is scored exactly once. Nothing runs on the request path:
+schedule this from cron, e.g. every five minutes.
+
+A chat scores CHAT_POINTS, plus INTENT_POINTS when it shows buying intent (price,
+installation, site visit, ...). Topics come from the FAQ index without any Bedrock
+call: each distinct question fingerprint is matched once per run, by exact FAQ lookup
+or else BM25, so popular questions cost one lookup however often they are asked.
+
+A rescore also replays the months chat_partitions.py --archive has removed from
+chat_history, from the archive files listed in chat_history_archives; it refuses to
+start when one of them is missing, since their points would otherwise be lost.
+
+Usage:
+    python lead_scoring.py                 # score chats added since the last run
+    python lead_scoring.py --rescore       # reset all scores and score the whole history
+    python lead_scoring.py --rescore --archive-dir /backups/chat_history   # archives were moved
+"""
+
+import argparse
+import csv
+import gzip
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from db import create_connection
+from text_utils import normalize_question, query_fingerprint
+
+JOB_NAME = "lead_scoring"
+BATCH_SIZE = 5000
+# Chats younger than this are left for the next run: a chat that got a lower id but
+# commits later than its neighbours must not fall behind the watermark
+SETTLE_SECONDS = 60
+
+CHAT_POINTS = 1.0
+INTENT_POINTS = 3.0
+INTERESTED_SCORE = 5.0
+HOT_SCORE = 15.0
+MAX_TOPICS = 5
+TOPIC_MIN_SCORE = 0.3  # normalized BM25 score for a chat to count towards an FAQ topic
+
+# Words (after normalize_question) that show a lead is moving towards a purchase
+INTENT_TERMS = {"price", "prices", "pricing", "cost", "costs", "quote", "quotation", "buy",
+                "purchase", "order", "emi", "finance", "install", "installation", "installed",
+                "visit", "demo", "dealer", "showroom", "delivery", "booking", "book",
+                "discount", "offer", "payment", "warranty", "contact", "call"}
+
+
+class TopicMatcher:
+    """Classifies question fingerprints (FAQ topic, buying intent), once per fingerprint"""
+
+    def __init__(self, indexer=None):
+        """
+        Args:
+            indexer: Loaded BedrockFAISSIndexer, or None to score without topics
+        """
+        self.indexer = indexer
+        self.classes = {}  # fingerprint -> (FAQ question or file name or None, intent)
+        self.lookups = 0
+
+    def _topic(self, query: str) -> Optional[str]:
+        if self.indexer is None:
+            return None
+        self.lookups += 1
+        hit = self.indexer.lookup_exact(query)
+        if hit is None:
+            hits = self.indexer.lexical_search(query, k=1, threshold=TOPIC_MIN_SCORE)
+            hit = hits[0] if hits else None
+        doc = hit[0] if hit else {}
+        question = doc.get("question")
+        return question if question and question != "nan" else doc.get("file_name")
+
+    def classify(self, query: str, fingerprint: str) -> Tuple[Optional[str], bool]:
+        """(FAQ topic or None, whether the question or its topic shows buying intent)"""
+        if fingerprint not in self.classes:
+            topic = self._topic(query)
+            self.classes[fingerprint] = (topic, has_intent(fingerprint, topic))
+        return self.classes[fingerprint]
+
+
+def load_topic_matcher(index_path: str = "bedrock_faiss_index") -> TopicMatcher:
+    """TopicMatcher over the FAQ index on disk, or one without topics if there is none"""
+    if not os.path.exists(f"{index_path}.faiss"):
+        print(f"⚠️ No FAQ index at {index_path}, scoring without topics")
+        return TopicMatcher()
+    from bedrock_faiss_indexer import BedrockFAISSIndexer
+    indexer = BedrockFAISSIndexer()
+    indexer.load_index(index_path)
+    return TopicMatcher(indexer)
+
+
+def has_intent(*texts: Optional[str]) -> bool:
+    return any(text and not INTENT_TERMS.isdisjoint(normalize_question(text).split()) for text in texts)
+
+
+def score_chats(chats: List[tuple], matcher: TopicMatcher) -> Dict[str, dict]:
+    """
+    Score a batch of chats per lead
+
+    Args:
+        chats: (email, user_query, query_fingerprint) rows
+        matcher: Classifies questions by FAQ topic and intent
+
+    Returns:
+        email -> {"points": float, "topics": FAQ topics, most asked first}
+    """
+    points = defaultdict(float)
+    topics = defaultdict(Counter)
+    for email, user_query, fingerprint in chats:
+        if not email or not user_query:
+            continue
+        fingerprint = fingerprint or query_fingerprint(user_query)
+        topic, intent = matcher.classify(user_query, fingerprint)
+        points[email] += CHAT_POINTS + (INTENT_POINTS if intent else 0.0)
+        if topic:
+            topics[email][topic] += 1
+    return {email: {"points": points[email],
+                    "topics": [t for t, _ in topics[email].most_common(MAX_TOPICS)]}
+            for email in points}
+
+
+def _read_watermark(cursor) -> int:
+    cursor.execute("INSERT INTO job_watermarks (job) VALUES (%s) ON CONFLICT (job) DO NOTHING", (JOB_NAME,))
+    # Row lock: a second run started meanwhile waits instead of scoring the same chats
+    cursor.execute("SELECT last_chat_id FROM job_watermarks WHERE job = %s FOR UPDATE", (JOB_NAME,))
+    return cursor.fetchone()[0]
+
+
+def _apply_scores(cursor, scores: Dict[str, dict]) -> int:
+    """Add one batch of score_chats results to the leads; returns the rows updated"""
+    if not scores:
+        return 0
+    execute_values(cursor, f"""
+        UPDATE users u SET
+            interest_score = u.interest_score + v.points,
+            interest_topics = ARRAY(
+                SELECT t FROM unnest(v.topics || u.interest_topics) WITH ORDINALITY AS x(t, n)
+                GROUP BY t ORDER BY MIN(n) LIMIT {MAX_TOPICS}),
+            interest_level = CASE
+                WHEN u.interest_score + v.points >= {HOT_SCORE} THEN 'Hot'
+                WHEN u.interest_score + v.points >= {INTERESTED_SCORE} THEN 'Interested'
+                ELSE 'Not Interested' END,
+            interest_scored_at = NOW()
+        FROM (VALUES %s) AS v(email, points, topics)
+        WHERE u.email = v.email
+    """, [(email, s["points"], s["topics"]) for email, s in scores.items()],
+        template="(%s, %s::real, %s::text[])", page_size=len(scores))
+    return cursor.rowcount
+
+
+def score_batch(conn, matcher: TopicMatcher, batch_size: int = BATCH_SIZE,
+                settle_seconds: int = SETTLE_SECONDS) -> Tuple[int, int]:
+    """
+    Score the next batch of chats after the watermark and move the watermark past them
+
+    Returns:
+        (chats scored, leads updated); (0, 0) when no settled chats are left
+    """
+    cursor = conn.cursor()
+    try:
+        watermark = _read_watermark(cursor)
+        cursor.execute("""
+            SELECT id, email, user_query, query_fingerprint,
+                   timestamp > NOW()::timestamp - %s * INTERVAL '1 second' AS unsettled
+            FROM chat_history
+            WHERE id > %s
+            ORDER BY id
+            LIMIT %s
+        """, (settle_seconds, watermark, batch_size))
+        rows = cursor.fetchall()
+        # Stop at the first recent chat so the watermark never passes an unsettled id
+        settled = []
+        for row in rows:
+            if row[4]:
+                break
+            settled.append(row)
+        if not settled:
+            conn.rollback()
+            return 0, 0
+
+        scores = score_chats([(email, query, fp) for _, email, query, fp, _ in settled], matcher)
+        updated = _apply_scores(cursor, scores)
+        cursor.execute("UPDATE job_watermarks SET last_chat_id = %s, updated_at = NOW() WHERE job = %s",
+                       (settled[-1][0], JOB_NAME))
+        conn.commit()
+        return len(settled), updated
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def score_pending(conn, matcher: TopicMatcher, batch_size: int = BATCH_SIZE,
+                  settle_seconds: int = SETTLE_SECONDS, verbose: bool = False) -> Tuple[int, int]:
+    """
+    Score every settled chat after the watermark, batch by batch
+
+    Returns:
+        (chats scored, lead updates) over all batches
+    """
+    total_chats = total_updates = 0
+    while True:
+        chats, updates = score_batch(conn, matcher, batch_size, settle_seconds)
+        if not chats:
+            return total_chats, total_updates
+        total_chats += chats
+        total_updates += updates
+        if verbose:
+            print(f"🎯 Scored {total_chats:,} chats ({total_updates:,} lead updates)")
+        if chats < batch_size:
+            return total_chats, total_updates
+
+
+def archive_files(conn, archive_dir: Optional[str] = None) -> List[str]:
+    """
+    Archive files of the months dropped from chat_history, oldest first
+
+    Args:
+        archive_dir: Where the files are now (default: where they were written)
+
+    Raises:
+        FileNotFoundError: An archived month's file is missing
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT partition_name, archive_path FROM chat_history_archives ORDER BY month")
+    rows = cursor.fetchall()
+    conn.rollback()
+    paths = [os.path.join(archive_dir, os.path.basename(path)) if archive_dir else path for _, path in rows]
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(
+            f"{len(missing)} archived month(s) of chats not found (first: {missing[0]}); a rescore "
+            f"without them would lose their points - pass --archive-dir with their location")
+    return paths
+
+
+def _score_archive(cursor, path: str, matcher: TopicMatcher, batch_size: int) -> Tuple[int, int]:
+    """Score the chats of one archive file (chat_partitions.py CSV) in batches"""
+    chats = updates = 0
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        batch = []
+        for row in csv.DictReader(f):
+            batch.append((row["email"], row["user_query"], row.get("query_fingerprint") or None))
+            if len(batch) >= batch_size:
+                updates += _apply_scores(cursor, score_chats(batch, matcher))
+                chats += len(batch)
+                batch = []
+        if batch:
+            updates += _apply_scores(cursor, score_chats(batch, matcher))
+            chats += len(batch)
+    return chats, updates
+
+
+def reset_scores(conn, matcher: Optional[TopicMatcher] = None, archives: Optional[List[str]] = None,
+                 batch_size: int = BATCH_SIZE) -> Tuple[int, int]:
+    """
+    Clear every lead's score and rewind the watermark, e.g. after changing the rules
+
+    The chats in archives (see archive_files) are scored again in the same transaction,
+    so a failure leaves the previous scores in place; score_pending then covers the
+    chats still in chat_history.
+
+    Returns:
+        (archived chats scored, lead updates)
+    """
+    cursor = conn.cursor()
+    try:
+        _read_watermark(cursor)
+        cursor.execute("""
+            UPDATE users SET interest_score = 0, interest_topics = '{}',
+                             interest_level = NULL, interest_scored_at = NULL
+            WHERE interest_scored_at IS NOT NULL
+        """)
+        chats = updates = 0
+        for path in archives or []:
+            archive_chats, archive_updates = _score_archive(cursor, path, matcher or TopicMatcher(), batch_size)
+            chats += archive_chats
+            updates += archive_updates
+            print(f"📦 Rescored {archive_chats:,} archived chats from {os.path.basename(path)}")
+        cursor.execute("UPDATE job_watermarks SET last_chat_id = 0, updated_at = NOW() WHERE job = %s",
+                       (JOB_NAME,))
+        conn.commit()
+        return chats, updates
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Score lead interest from new chats")
+    parser.add_argument("--rescore", action="store_true",
+                        help="Reset all scores and rescore the whole history, including months archived by "
+                             "chat_partitions.py (refuses to run if their files are missing)")
+    parser.add_argument("--archive-dir", help="With --rescore: where the archived months are now "
+                                              "(default: where chat_partitions.py wrote them)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--settle-seconds", type=int, default=SETTLE_SECONDS,
+                        help="Leave chats younger than this for the next run")
+    parser.add_argument("--index-path", default="bedrock_faiss_index", help="FAQ index used for topics")
+    parser.add_argument("--database-url", help="libpq DSN/URI (default: DATABASE_URL or db.DB_CONFIG)")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    matcher = load_topic_matcher(args.index_path)
+    conn = create_connection()
+    try:
+        if args.rescore:
+            try:
+                archives = archive_files(conn, args.archive_dir)
+            except FileNotFoundError as e:
+                print(f"❌ {e}")
+                return 1
+            reset_scores(conn, matcher, archives, args.batch_size)
+            print("♻️ Lead scores reset")
+        start = time.perf_counter()
+        chats, updates = score_pending(conn, matcher, args.batch_size, args.settle_seconds, verbose=True)
+        print(f"✅ Scored {chats:,} chats, {updates:,} lead updates, {matcher.lookups:,} topic lookups "
+              f"in {time.perf_counter() - start:.1f}s")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+-- Tables the API reads and writes. Columns are added with IF NOT EXISTS so databases
+-- created by the old db.setup_database() (users/chat_history without the later
+-- columns) are brought up to date instead of failing.
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    email VARCHAR(100),
+    phone VARCHAR(15),
+    country VARCHAR(100)
+);
+ALTER TABLE users ADD COLUMN IF NOT EXISTS status VARCHAR(50);
+ALTER TABLE users ADD COLUMN IF NOT EXISTS description TEXT;
+
+CREATE TABLE IF NOT EXISTS chat_history (
+    id SERIAL PRIMARY KEY,
+    email VARCHAR(100),
+    user_query TEXT,
+    bot_response TEXT
+);
+-- Added without defaults so existing rows are not all dated to the day of the migration:
+-- chat_date/chat_time come from each row's own timestamp, then new rows get the defaults
+ALTER TABLE chat_history ADD COLUMN IF NOT EXISTS timestamp TIMESTAMP;
+ALTER TABLE chat_history ADD COLUMN IF NOT EXISTS chat_date DATE;
+ALTER TABLE chat_history ADD COLUMN IF NOT EXISTS chat_time TIME;
+UPDATE chat_history SET chat_date = COALESCE(chat_date, timestamp::date),
+                        chat_time = COALESCE(chat_time, timestamp::time)
+WHERE timestamp IS NOT NULL AND (chat_date IS NULL OR chat_time IS NULL);
+ALTER TABLE chat_history ALTER COLUMN timestamp SET DEFAULT NOW();
+ALTER TABLE chat_history ALTER COLUMN chat_date SET DEFAULT CURRENT_DATE;
+ALTER TABLE chat_history ALTER COLUMN chat_time SET DEFAULT LOCALTIME;
+
+CREATE TABLE IF NOT EXISTS sales_persons_data (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100),
+    email VARCHAR(100) UNIQUE NOT NULL,
+    password VARCHAR(255) NOT NULL,
+    role VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
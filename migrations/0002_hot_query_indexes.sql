@@ -0,0 +1,11 @@
+-- migrate: no-transaction
+-- Built CONCURRENTLY so chat writes are not blocked while indexing a large table.
+
+-- /users/history: WHERE email = ? ORDER BY id DESC LIMIT n
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chat_history_email_id ON chat_history (email, id DESC);
+
+-- /analytics/chat_counts: chat_date windows and per-day grouping
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chat_history_chat_date ON chat_history (chat_date);
+
+-- Case-insensitive user lookups (UPDATE users ... WHERE LOWER(email) = LOWER(?))
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_lower_email ON users (lower(email));
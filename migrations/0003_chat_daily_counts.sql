@@ -0,0 +1,45 @@
+-- Per-day chat counts for /analytics/chat_counts, kept current by statement-level
+-- triggers on chat_history (one upsert per day touched by a statement, so bulk
+-- inserts and deletes cost a handful of rollup writes, not one per row).
+
+CREATE TABLE IF NOT EXISTS chat_daily_counts (
+    chat_date DATE PRIMARY KEY,
+    total_chats BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION chat_daily_counts_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO chat_daily_counts AS c (chat_date, total_chats)
+        SELECT chat_date, -COUNT(*) FROM old_rows WHERE chat_date IS NOT NULL GROUP BY chat_date
+        ON CONFLICT (chat_date) DO UPDATE SET total_chats = c.total_chats + EXCLUDED.total_chats;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO chat_daily_counts AS c (chat_date, total_chats)
+        SELECT chat_date, COUNT(*) FROM new_rows WHERE chat_date IS NOT NULL GROUP BY chat_date
+        ON CONFLICT (chat_date) DO UPDATE SET total_chats = c.total_chats + EXCLUDED.total_chats;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS chat_daily_counts_insert ON chat_history;
+CREATE TRIGGER chat_daily_counts_insert AFTER INSERT ON chat_history
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION chat_daily_counts_apply();
+
+DROP TRIGGER IF EXISTS chat_daily_counts_update ON chat_history;
+CREATE TRIGGER chat_daily_counts_update AFTER UPDATE ON chat_history
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION chat_daily_counts_apply();
+
+DROP TRIGGER IF EXISTS chat_daily_counts_delete ON chat_history;
+CREATE TRIGGER chat_daily_counts_delete AFTER DELETE ON chat_history
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION chat_daily_counts_apply();
+
+-- Count the history that existed before the triggers (blocks chat writes meanwhile)
+LOCK TABLE chat_history IN SHARE MODE;
+DELETE FROM chat_daily_counts;
+INSERT INTO chat_daily_counts (chat_date, total_chats)
+SELECT chat_date, COUNT(*) FROM chat_history WHERE chat_date IS NOT NULL GROUP BY chat_date;
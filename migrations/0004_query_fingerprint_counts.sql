@@ -0,0 +1,50 @@
+-- Counts per question fingerprint for /admin/top-questions. The writer stores
+-- text_utils.query_fingerprint(user_query) with each chat, so "What is the warranty?"
+-- and "what's the warranty" count as one question; statement-level triggers keep the
+-- counts current, and top-N is a scan of the (total_chats DESC) index.
+-- Rows written before this migration have no fingerprint yet:
+-- run `python chat_rollups.py --backfill` once to fingerprint and count them.
+
+ALTER TABLE chat_history ADD COLUMN IF NOT EXISTS query_fingerprint TEXT;
+
+CREATE TABLE IF NOT EXISTS query_fingerprint_counts (
+    fingerprint TEXT PRIMARY KEY,
+    sample_query TEXT NOT NULL,
+    total_chats BIGINT NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_query_fingerprint_counts_total
+    ON query_fingerprint_counts (total_chats DESC);
+
+CREATE OR REPLACE FUNCTION query_fingerprint_counts_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO query_fingerprint_counts AS c (fingerprint, sample_query, total_chats)
+        SELECT query_fingerprint, MIN(user_query), -COUNT(*) FROM old_rows
+        WHERE query_fingerprint IS NOT NULL GROUP BY query_fingerprint
+        ON CONFLICT (fingerprint) DO UPDATE SET total_chats = c.total_chats + EXCLUDED.total_chats;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        -- sample_query is set once, when a fingerprint is first counted
+        INSERT INTO query_fingerprint_counts AS c (fingerprint, sample_query, total_chats)
+        SELECT query_fingerprint, MIN(user_query), COUNT(*) FROM new_rows
+        WHERE query_fingerprint IS NOT NULL GROUP BY query_fingerprint
+        ON CONFLICT (fingerprint) DO UPDATE SET total_chats = c.total_chats + EXCLUDED.total_chats;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS query_fingerprint_counts_insert ON chat_history;
+CREATE TRIGGER query_fingerprint_counts_insert AFTER INSERT ON chat_history
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION query_fingerprint_counts_apply();
+
+DROP TRIGGER IF EXISTS query_fingerprint_counts_update ON chat_history;
+CREATE TRIGGER query_fingerprint_counts_update AFTER UPDATE ON chat_history
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION query_fingerprint_counts_apply();
+
+DROP TRIGGER IF EXISTS query_fingerprint_counts_delete ON chat_history;
+CREATE TRIGGER query_fingerprint_counts_delete AFTER DELETE ON chat_history
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION query_fingerprint_counts_apply();
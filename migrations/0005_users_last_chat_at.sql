@@ -0,0 +1,48 @@
+-- users.last_chat_at, the time of each user's latest chat, so /chatusers/list can page
+-- through leads by recency with an index scan instead of joining all of chat_history.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS last_chat_at TIMESTAMP;
+
+-- (email, id): duplicate registrations of an email are listed once, as the oldest row
+CREATE INDEX IF NOT EXISTS idx_users_email_id ON users (email, id);
+CREATE INDEX IF NOT EXISTS idx_users_last_chat_at ON users (last_chat_at, email)
+    WHERE last_chat_at IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION users_last_chat_at_apply() RETURNS trigger AS $$
+BEGIN
+    UPDATE users AS u SET last_chat_at = n.last_chat_at
+    FROM (
+        SELECT email, MAX(COALESCE(timestamp, chat_date + chat_time, NOW())) AS last_chat_at
+        FROM new_rows WHERE email IS NOT NULL GROUP BY email
+    ) AS n
+    WHERE u.email = n.email AND (u.last_chat_at IS NULL OR u.last_chat_at < n.last_chat_at);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_last_chat_at_insert ON chat_history;
+CREATE TRIGGER users_last_chat_at_insert AFTER INSERT ON chat_history
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION users_last_chat_at_apply();
+
+-- Users who register after chatting start with their latest chat
+CREATE OR REPLACE FUNCTION users_last_chat_at_init() RETURNS trigger AS $$
+BEGIN
+    IF NEW.last_chat_at IS NULL THEN
+        SELECT COALESCE(timestamp, chat_date + chat_time) INTO NEW.last_chat_at
+        FROM chat_history WHERE email = NEW.email ORDER BY id DESC LIMIT 1;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_last_chat_at_init ON users;
+CREATE TRIGGER users_last_chat_at_init BEFORE INSERT ON users
+    FOR EACH ROW EXECUTE FUNCTION users_last_chat_at_init();
+
+UPDATE users AS u SET last_chat_at = m.last_chat_at
+FROM (
+    SELECT email, MAX(COALESCE(timestamp, chat_date + chat_time)) AS last_chat_at
+    FROM chat_history GROUP BY email
+) AS m
+WHERE u.email = m.email;
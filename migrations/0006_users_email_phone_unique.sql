@@ -0,0 +1,25 @@
+-- One users row per (email, phone), so /user/register can insert with
+-- ON CONFLICT DO NOTHING instead of check-then-insert (which raced into duplicates).
+-- Existing duplicates are merged into their oldest row first.
+
+UPDATE users AS u
+SET status = COALESCE(u.status, d.status),
+    description = COALESCE(u.description, d.description),
+    last_chat_at = GREATEST(u.last_chat_at, d.last_chat_at)
+FROM (
+    SELECT MIN(id) AS keep_id,
+           (ARRAY_AGG(status ORDER BY id DESC) FILTER (WHERE status IS NOT NULL))[1] AS status,
+           (ARRAY_AGG(description ORDER BY id DESC) FILTER (WHERE description IS NOT NULL))[1] AS description,
+           MAX(last_chat_at) AS last_chat_at
+    FROM users
+    WHERE email IS NOT NULL AND phone IS NOT NULL
+    GROUP BY email, phone
+    HAVING COUNT(*) > 1
+) AS d
+WHERE u.id = d.keep_id;
+
+DELETE FROM users AS u
+USING users AS k
+WHERE k.email = u.email AND k.phone = u.phone AND k.id < u.id;
+
+ALTER TABLE users ADD CONSTRAINT users_email_phone_key UNIQUE (email, phone);
@@ -0,0 +1,105 @@
+-- Monthly range partitions of chat_history on chat_date, so retention can detach whole
+-- months and date-bounded reads (exports, history windows) only touch their months.
+-- The table is rebuilt as a partitioned table: rows are copied in this transaction,
+-- which takes a while on a large history and blocks chat writes meanwhile. Far
+-- past/future dates (outside the created months) land in chat_history_default.
+-- chat_partitions.py creates future months and archives old ones afterwards.
+
+-- The partition key cannot be NULL outside the default partition
+UPDATE chat_history SET chat_date = COALESCE(timestamp::date, CURRENT_DATE) WHERE chat_date IS NULL;
+
+ALTER TABLE chat_history RENAME TO chat_history_unpartitioned;
+ALTER TABLE chat_history_unpartitioned RENAME CONSTRAINT chat_history_pkey TO chat_history_unpartitioned_pkey;
+
+CREATE TABLE chat_history (
+    id INTEGER NOT NULL DEFAULT nextval('chat_history_id_seq'),
+    email VARCHAR(100),
+    user_query TEXT,
+    bot_response TEXT,
+    timestamp TIMESTAMP DEFAULT NOW(),
+    chat_date DATE NOT NULL DEFAULT CURRENT_DATE,
+    chat_time TIME DEFAULT LOCALTIME,
+    query_fingerprint TEXT,
+    PRIMARY KEY (id, chat_date)
+) PARTITION BY RANGE (chat_date);
+
+-- Catches dates no monthly partition covers yet; normally empty
+CREATE TABLE chat_history_default PARTITION OF chat_history DEFAULT;
+
+-- Create the monthly partitions for first_month .. last_month (any day in the month).
+-- Rows already sitting in the default partition for a new month are moved into it
+-- directly (partition to partition, so the rollup triggers on chat_history do not fire).
+CREATE OR REPLACE FUNCTION chat_history_ensure_partitions(first_month DATE, last_month DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := DATE_TRUNC('month', first_month)::date;
+    month_end DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    -- API workers run this at startup; only one creates partitions at a time
+    PERFORM pg_advisory_xact_lock(HASHTEXT('chat_history_ensure_partitions'));
+    WHILE month_start <= last_month LOOP
+        month_end := (month_start + INTERVAL '1 month')::date;
+        partition_name := 'chat_history_' || TO_CHAR(month_start, 'YYYY_MM');
+        IF TO_REGCLASS(partition_name) IS NULL THEN
+            EXECUTE FORMAT('CREATE TEMP TABLE chat_history_moving ON COMMIT DROP AS '
+                           'WITH moved AS (DELETE FROM chat_history_default '
+                           'WHERE chat_date >= %L AND chat_date < %L RETURNING *) SELECT * FROM moved',
+                           month_start, month_end);
+            EXECUTE FORMAT('CREATE TABLE %I PARTITION OF chat_history FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, month_start, month_end);
+            EXECUTE FORMAT('INSERT INTO %I SELECT * FROM chat_history_moving', partition_name);
+            DROP TABLE chat_history_moving;
+            created := created + 1;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Existing history from its first month, plus three months ahead
+SELECT chat_history_ensure_partitions(
+    LEAST(COALESCE((SELECT MIN(chat_date) FROM chat_history_unpartitioned), CURRENT_DATE), CURRENT_DATE),
+    (CURRENT_DATE + INTERVAL '3 months')::date
+);
+
+-- Copied before the indexes and triggers exist: faster, and the rollups already count these rows
+INSERT INTO chat_history (id, email, user_query, bot_response, timestamp, chat_date, chat_time, query_fingerprint)
+SELECT id, email, user_query, bot_response, timestamp, chat_date, chat_time, query_fingerprint
+FROM chat_history_unpartitioned;
+
+-- The sequence must outlive the old table
+ALTER SEQUENCE chat_history_id_seq OWNED BY NONE;
+DROP TABLE chat_history_unpartitioned;
+ALTER SEQUENCE chat_history_id_seq OWNED BY chat_history.id;
+
+-- Indexes of 0002, now partitioned (one per partition, same names on the parent)
+CREATE INDEX idx_chat_history_email_id ON chat_history (email, id DESC);
+CREATE INDEX idx_chat_history_chat_date ON chat_history (chat_date);
+
+-- Rollup triggers of 0003-0005, recreated on the partitioned table
+CREATE TRIGGER chat_daily_counts_insert AFTER INSERT ON chat_history
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION chat_daily_counts_apply();
+CREATE TRIGGER chat_daily_counts_update AFTER UPDATE ON chat_history
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION chat_daily_counts_apply();
+CREATE TRIGGER chat_daily_counts_delete AFTER DELETE ON chat_history
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION chat_daily_counts_apply();
+
+CREATE TRIGGER query_fingerprint_counts_insert AFTER INSERT ON chat_history
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION query_fingerprint_counts_apply();
+CREATE TRIGGER query_fingerprint_counts_update AFTER UPDATE ON chat_history
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION query_fingerprint_counts_apply();
+CREATE TRIGGER query_fingerprint_counts_delete AFTER DELETE ON chat_history
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION query_fingerprint_counts_apply();
+
+CREATE TRIGGER users_last_chat_at_insert AFTER INSERT ON chat_history
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION users_last_chat_at_apply();
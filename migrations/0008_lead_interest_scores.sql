@@ -0,0 +1,17 @@
+-- Lead interest scores, written in bulk by lead_scoring.py (never on the request path).
+-- interest_score accumulates over all chats, interest_topics holds the FAQ topics the
+-- lead asked about most recently, interest_level is the label sales filters on.
+ALTER TABLE users ADD COLUMN IF NOT EXISTS interest_score REAL NOT NULL DEFAULT 0;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS interest_topics TEXT[] NOT NULL DEFAULT '{}';
+ALTER TABLE users ADD COLUMN IF NOT EXISTS interest_level VARCHAR(20);
+ALTER TABLE users ADD COLUMN IF NOT EXISTS interest_scored_at TIMESTAMP;
+
+-- How far each batch job has read chat_history; moved in the same transaction as its
+-- results, so a chat is scored exactly once even when a run fails halfway
+CREATE TABLE IF NOT EXISTS job_watermarks (
+    job VARCHAR(50) PRIMARY KEY,
+    last_chat_id BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO job_watermarks (job) VALUES ('lead_scoring') ON CONFLICT (job) DO NOTHING;
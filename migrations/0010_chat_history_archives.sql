@@ -0,0 +1,10 @@
+-- Months of chat_history archived and dropped by chat_partitions.py --archive, so jobs
+-- that rebuild state from the whole history (lead_scoring.py --rescore) can find the
+-- archived chats or refuse to run without them
+CREATE TABLE IF NOT EXISTS chat_history_archives (
+    partition_name VARCHAR(63) PRIMARY KEY,
+    month DATE NOT NULL,
+    rows BIGINT NOT NULL,
+    archive_path TEXT NOT NULL,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,88 @@
+"""
+Near-duplicate text detection with 64-bit SimHash
+
+Used by the indexer to skip texts that are (nearly) identical to one already indexed
+before paying for a Bedrock embedding. Fingerprints are split into 4 bands of 16 bits;
+two fingerprints within Hamming distance 3 must share at least one band exactly, so
+candidates come from 4 dict lookups instead of a scan over everything indexed.
+"""
+
+import hashlib
+import re
+from typing import Any, List, Optional
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+")
+_BIT_SHIFTS = np.arange(64, dtype=np.uint64)
+
+
+def _features(text: str, shingle_size: int = 3) -> List[str]:
+    tokens = _TOKEN_RE.findall(str(text).lower())
+    if len(tokens) < shingle_size:
+        return tokens
+    return [" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)]
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of the word 3-shingles of text"""
+    features = _features(text)
+    if not features:
+        return 0
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "little") for f in features),
+        dtype=np.uint64, count=len(features),
+    )
+    bits = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).astype(np.int32)
+    votes = (2 * bits - 1).sum(axis=0)
+    return int(sum(1 << i for i in range(64) if votes[i] > 0))
+
+
+class NearDuplicateFilter:
+    def __init__(self, max_distance: int = 3):
+        """
+        Remember fingerprints of kept texts and detect near-duplicates of them
+
+        Args:
+            max_distance: Maximum Hamming distance (out of 64 bits) that counts as a
+                near-duplicate; at most 3 so the 4-band lookup stays exact
+        """
+        if not 0 <= max_distance <= 3:
+            raise ValueError("max_distance must be between 0 and 3 for 4 x 16-bit bands")
+        self.max_distance = max_distance
+        self.fingerprints = []
+        self.payloads = []
+        self.bands = [dict() for _ in range(4)]
+        self.checked = 0
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    @staticmethod
+    def _band_keys(fingerprint: int):
+        return [(fingerprint >> (16 * i)) & 0xFFFF for i in range(4)]
+
+    def find(self, text: str) -> Optional[Any]:
+        """Payload of an already kept near-duplicate of text, or None"""
+        self.checked += 1
+        fingerprint = simhash(text)
+        seen = set()
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            for candidate in band.get(key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                if bin(fingerprint ^ self.fingerprints[candidate]).count("1") <= self.max_distance:
+                    self.duplicates += 1
+                    return self.payloads[candidate]
+        return None
+
+    def add(self, text: str, payload: Any = None) -> None:
+        """Remember text as kept, returning payload from later find() matches"""
+        fingerprint = simhash(text)
+        position = len(self.fingerprints)
+        self.fingerprints.append(fingerprint)
+        self.payloads.append(payload)
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            band.setdefault(key, []).append(position)
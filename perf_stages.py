@@ -0,0 +1,84 @@
+"""
+Per-request stage timing for the chat pipeline
+
+Code wraps work in `with stage("embedding"):` blocks. Timings are only collected while
+a collection is active for the current request (see start_collection), otherwise the
+blocks cost a single context variable lookup. Nested stages are exclusive: time spent
+in an inner stage is not counted again in the outer one.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_collector = ContextVar("perf_stages_collector", default=None)
+
+
+class StageCollector:
+    def __init__(self):
+        self.durations = {}
+        self._stack = []
+        self.started = time.perf_counter()
+
+    def add(self, name: str, elapsed: float):
+        self.durations[name] = self.durations.get(name, 0.0) + elapsed
+
+    def as_milliseconds(self) -> dict:
+        """Stage durations in milliseconds, plus 'total' since collection started"""
+        result = {name: value * 1000.0 for name, value in self.durations.items()}
+        result["total"] = (time.perf_counter() - self.started) * 1000.0
+        return result
+
+
+def start_collection():
+    """Start collecting stage timings for the current context; returns a reset token"""
+    return _collector.set(StageCollector())
+
+
+def stop_collection(token) -> dict:
+    """Stop collecting and return {stage: milliseconds}"""
+    collector = _collector.get()
+    _collector.reset(token)
+    return collector.as_milliseconds() if collector else {}
+
+
+def current_collector():
+    return _collector.get()
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block of work as the named stage (no-op when nothing is collecting)"""
+    collector = _collector.get()
+    if collector is None:
+        yield
+        return
+
+    collector._stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = collector._stack.pop()
+        collector.add(name, elapsed - nested)
+        if collector._stack:
+            collector._stack[-1] += elapsed
+
+
+def format_server_timing(durations: dict) -> str:
+    """Render stage durations as a Server-Timing header value"""
+    return ", ".join(f"{name};dur={value:.3f}" for name, value in durations.items())
+
+
+def parse_server_timing(header: str) -> dict:
+    """Parse a Server-Timing header value back into {stage: milliseconds}"""
+    durations = {}
+    for entry in (header or "").split(","):
+        parts = [p.strip() for p in entry.split(";")]
+        if not parts[0]:
+            continue
+        for part in parts[1:]:
+            if part.startswith("dur="):
+                durations[parts[0]] = float(part[4:])
+    return durations
@@ -6,6 +6,7 @@ Process both CSV and PDF files and store in FAISS using AWS Bedrock
 import logging
 import os
 from bedrock_faiss_indexer import BedrockFAISSIndexer
+from answer_enrichment import enrich_documents
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -36,6 +37,12 @@ def process_documents_to_faiss(index_path: str = "bedrock_faiss_index"):
                 indexer.process_pdf(file_path)
                 print("✅ PDF file processed successfully!")
 
+        # Pre-generate FAQ long answers so /chat never generates them per query
+        print("✨ Precomputing FAQ answers...")
+        enrichment = enrich_documents(indexer)
+        print(f"✅ {enrichment['enriched']} answers stored "
+              f"({enrichment['generated']} generated with Titan, {enrichment['failed']} failed)")
+
         # Save the combined index
         print(f"💾 Saving combined index to: {index_path}")
         indexer.save_index(index_path)
@@ -47,6 +54,11 @@ def process_documents_to_faiss(index_path: str = "bedrock_faiss_index"):
         print(f"   Index Size: {stats['index_size']}")
         print(f"   Dimension: {stats['dimension']}")
         print(f"   Sources: {stats['sources']}")
+        dedup = stats.get('dedup', {})
+        if dedup.get('enabled'):
+            print(f"   Near-duplicates skipped: {dedup['near_duplicates_skipped']} "
+                  f"(embedding calls saved: {dedup['embedding_calls_saved']}, "
+                  f"index bytes saved: {dedup['index_bytes_saved']})")
 
         print("\n🎉 Document processing completed successfully!")
         print("✅ Your FAISS index is ready for use with Streamlit!")
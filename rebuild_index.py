@@ -10,6 +10,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from bedrock_faiss_indexer import BedrockFAISSIndexer
+from answer_enrichment import enrich_documents
 
 def rebuild_index():
     print("Rebuilding FAISS index...")
@@ -37,6 +38,10 @@ def rebuild_index():
         except Exception as e:
             print(f"✗ Error processing {csv_file}: {e}")
     
+    # Precompute short/long answers for the FAQ rows
+    print("Precomputing answers...")
+    enrich_documents(indexer)
+    
     # Save the index
     print("Saving index...")
     indexer.save_index(index_path)
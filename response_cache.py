@@ -0,0 +1,105 @@
+"""
+Short-lived cache for read-mostly JSON responses (dashboard analytics)
+
+Each entry holds a JSON payload and its ETag for ttl_seconds. Writers invalidate the
+keys their change affects, so a worker never serves its own stale figures; other
+workers see the change within the TTL. Concurrent misses for one key share a single
+computation. Invalidation bumps a per-key version, so a computation that started
+before the write cannot store its result afterwards.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from single_flight import SingleFlight
+
+
+def json_etag(payload: Any) -> str:
+    """Strong ETag of a JSON payload (equal payloads give equal tags)"""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha1(body.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches etag (weak comparison, as for GET)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    def __init__(self, ttl_seconds: float = 30.0, name: str = "response"):
+        """
+        Args:
+            ttl_seconds: How long a payload is served before it is recomputed
+            name: Label used in stats
+        """
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self.entries = {}  # key -> (payload, etag, expires_at)
+        self.versions = {}  # key -> number of invalidations
+        self.lock = threading.Lock()
+        self.flight = SingleFlight(name)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Tuple[Any, str]:
+        """
+        (payload, etag) for key, from the cache or from compute()
+
+        Args:
+            key: Identity of the response (endpoint and arguments)
+            compute: Zero-argument function building the JSON payload; exceptions
+                propagate and nothing is cached
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[2] > now:
+                self.hits += 1
+                return entry[0], entry[1]
+            self.misses += 1
+            version = self.versions.get(key, 0)
+
+        def refresh():
+            payload = compute()
+            etag = json_etag(payload)
+            with self.lock:
+                if self.versions.get(key, 0) == version:
+                    self.entries[key] = (payload, etag, time.monotonic() + self.ttl_seconds)
+            return payload, etag
+
+        return self.flight.do(key, refresh)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """Drop keys (all entries when none are given); called by writers after commit"""
+        with self.lock:
+            for key in keys or list(self.entries):
+                self.versions[key] = self.versions.get(key, 0) + 1
+                if self.entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.hits = self.misses = self.invalidations = 0
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self.entries),
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
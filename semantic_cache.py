@@ -0,0 +1,111 @@
+"""
+Semantic response cache keyed on query embeddings
+
+Past query embeddings live in a small FAISS inner-product index (IndexIDMap so entries
+can be removed on eviction). A new query whose nearest cached query has a cosine
+similarity at or above the threshold reuses what was stored for that query (the chat
+endpoints store their retrieval results), so paraphrases such as "how long is warranty"
+and "warranty period?" share one search. Entries belong to
+one document-index generation and are dropped as soon as a different one is seen.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+import faiss
+import numpy as np
+
+
+class SemanticCache:
+    def __init__(self, threshold: float = 0.92, max_entries: int = 1000):
+        """
+        Empty cache; the embedding dimension is taken from the first stored vector
+
+        Args:
+            threshold: Minimum cosine similarity between queries to reuse a response
+            max_entries: Maximum cached queries; least recently used ones are evicted
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.index = None
+        self.entries = OrderedDict()  # entry id -> response, least recently used first
+        self.generation = None
+        self.next_id = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_generation(self, generation) -> None:
+        if generation != self.generation:
+            if self.entries:
+                self.invalidations += 1
+            self.index = None
+            self.entries.clear()
+            self.generation = generation
+
+    def lookup(self, query_vector: np.ndarray, generation) -> Optional[Any]:
+        """
+        Cached response for a query similar enough to query_vector, or None
+
+        Args:
+            query_vector: L2-normalized query embedding, shape (1, d)
+            generation: Current document-index generation
+        """
+        with self.lock:
+            self._check_generation(generation)
+            if self.index is None or self.index.ntotal == 0:
+                self.misses += 1
+                return None
+            scores, ids = self.index.search(np.asarray(query_vector, dtype=np.float32), 1)
+            entry_id = int(ids[0][0])
+            if entry_id < 0 or float(scores[0][0]) < self.threshold:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(entry_id)
+            self.hits += 1
+            return self.entries[entry_id]
+
+    def store(self, query_vector: np.ndarray, response: Any, generation) -> None:
+        """Remember response for query_vector, evicting the least recently used entries"""
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        with self.lock:
+            self._check_generation(generation)
+            if self.index is None:
+                self.index = faiss.IndexIDMap(faiss.IndexFlatIP(query_vector.shape[1]))
+            entry_id = self.next_id
+            self.next_id += 1
+            self.index.add_with_ids(query_vector, np.array([entry_id], dtype=np.int64))
+            self.entries[entry_id] = response
+
+            if len(self.entries) > self.max_entries:
+                evicted = []
+                while len(self.entries) > self.max_entries:
+                    evicted.append(self.entries.popitem(last=False)[0])
+                self.index.remove_ids(np.array(evicted, dtype=np.int64))
+                self.evictions += len(evicted)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.index = None
+            self.entries.clear()
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,100 @@
+"""
+Admin and sales login sessions shared by every API worker
+
+A login creates a random bearer token. The database keeps only its SHA-256, in
+admin_sessions (migrations/0009_admin_sessions.sql), with the role and an expiry, so
+any worker or node on the same database accepts the token and a login never affects
+anyone else's session. Lookups are a primary-key read. The expiry slides with
+activity, but is only rewritten once less than half of the TTL is left, so most
+authenticated requests do not write.
+"""
+
+import hashlib
+import os
+import secrets
+from typing import Optional
+
+from db import create_connection
+
+SESSION_TIMEOUT_MINUTES = int(os.environ.get("SESSION_TIMEOUT_MINUTES", "20"))
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def create_session(email: str, role: str) -> str:
+    """
+    Start a session for email with role, and drop expired ones
+
+    Returns:
+        The session token to hand to the client
+    """
+    token = secrets.token_urlsafe(32)
+    conn = create_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM admin_sessions WHERE expires_at <= NOW()")
+        cursor.execute("""
+            INSERT INTO admin_sessions (token_hash, email, role, expires_at)
+            VALUES (%s, %s, %s, NOW() + %s * INTERVAL '1 minute')
+        """, (_token_hash(token), email, role, SESSION_TIMEOUT_MINUTES))
+        conn.commit()
+    finally:
+        conn.close()
+    return token
+
+
+def get_session(token: Optional[str]) -> Optional[dict]:
+    """
+    The live session for token, or None if there is none or it has expired
+
+    Returns:
+        email, role, session_id (a short prefix of the token hash, safe to show),
+        last_activity and remaining_minutes
+    """
+    if not token:
+        return None
+    token_hash = _token_hash(token)
+    conn = create_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT email, role, last_activity, EXTRACT(EPOCH FROM expires_at - NOW()) / 60
+            FROM admin_sessions
+            WHERE token_hash = %s AND expires_at > NOW()
+        """, (token_hash,))
+        row = cursor.fetchone()
+        if row is None:
+            conn.rollback()
+            return None
+        email, role, last_activity, remaining = row[0], row[1], row[2], float(row[3])
+        if remaining < SESSION_TIMEOUT_MINUTES / 2:
+            cursor.execute("""
+                UPDATE admin_sessions
+                SET last_activity = NOW(), expires_at = NOW() + %s * INTERVAL '1 minute'
+                WHERE token_hash = %s
+                RETURNING last_activity
+            """, (SESSION_TIMEOUT_MINUTES, token_hash))
+            last_activity = cursor.fetchone()[0]
+            remaining = float(SESSION_TIMEOUT_MINUTES)
+        conn.commit()
+    finally:
+        conn.close()
+    return {"email": email, "role": role, "session_id": token_hash[:16],
+            "last_activity": last_activity, "remaining_minutes": remaining}
+
+
+def delete_session(token: Optional[str]) -> bool:
+    """End the session for token; False if there was none"""
+    if not token:
+        return False
+    conn = create_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM admin_sessions WHERE token_hash = %s", (_token_hash(token),))
+        deleted = cursor.rowcount > 0
+        conn.commit()
+    finally:
+        conn.close()
+    return deleted
@@ -0,0 +1,87 @@
+"""
+Request coalescing ("single-flight") for identical concurrent upstream calls
+
+When several threads ask for the same key at the same time, only the first one (the
+leader) runs the call; the others wait for it and receive the same result or
+exception. Nothing is cached: once the call finishes the next request for the key
+starts a new call.
+"""
+
+import threading
+from typing import Any, Callable, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Label used in stats (e.g. "embedding")
+        """
+        self.name = name
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn() for key, or wait for the identical call already in flight
+
+        Args:
+            key: Identity of the call (e.g. model id and request text)
+            fn: Zero-argument function performing the upstream call
+
+        Returns:
+            fn's result, shared by every caller that joined the call
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self.calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.executed = self.coalesced = 0
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            requested = self.executed + self.coalesced
+            return {
+                "name": self.name,
+                "upstream_calls": self.executed,
+                "calls_saved": self.coalesced,
+                "in_flight": len(self.calls),
+                "saved_ratio": round(self.coalesced / requested, 4) if requested else 0.0,
+            }
@@ -1,7 +1,7 @@
 import streamlit as st
 from w1 import load_faq
 from w3 import get_answer, compute_question_embeddings
-from db import setup_database, save_user_info, get_user_count, save_interaction, user_exists
+from db import setup_database, register_user, get_user_count, save_interaction
 from datetime import datetime, timedelta
 from streamlit_autorefresh import st_autorefresh
 import time
@@ -41,14 +41,12 @@ if "phone" not in st.session_state or not st.session_state.phone:
         if phone.isdigit() and len(phone) == 10:
             st.session_state.phone = phone.strip()
 
-            # Check if user already exists
-            if user_exists(st.session_state.email, st.session_state.phone):
-                st.success("👋 Welcome back, good to see you!")
-            else:
-                # Save user to DB with intent as "N/A"
-                st.session_state.intent = "N/A"
-                save_user_info(st.session_state.email, st.session_state.phone, st.session_state.intent)
+            # Save user to DB with intent as "N/A", unless they already exist
+            st.session_state.intent = "N/A"
+            if register_user(st.session_state.email, st.session_state.phone, st.session_state.intent):
                 st.success("✅ You're now connected with the assistant.")
+            else:
+                st.success("👋 Welcome back, good to see you!")
 
             # Show user count
             st.info(f"👥 Total unique users interacted: {get_user_count()}")
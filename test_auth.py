@@ -10,12 +10,15 @@ import json
 # Configuration
 BASE_URL = "http://localhost:8000"  # Change if your server runs on different port
 
+# Keeps the session cookie set by /admin/login for the later requests
+session = requests.Session()
+
 def test_login(email, password):
     """Test login functionality"""
     print(f"🔐 Testing login for {email}...")
     
     try:
-        response = requests.post(f"{BASE_URL}/admin/login", data={
+        response = session.post(f"{BASE_URL}/admin/login", params={
             "email": email,
             "password": password
         })
@@ -37,7 +40,7 @@ def test_session_status():
     print("📊 Checking session status...")
     
     try:
-        response = requests.get(f"{BASE_URL}/admin/session-status")
+        response = session.get(f"{BASE_URL}/admin/session-status")
         
         if response.status_code == 200:
             data = response.json()
@@ -56,7 +59,7 @@ def test_authenticated_endpoint():
     print("🔒 Testing authenticated endpoint...")
     
     try:
-        response = requests.get(f"{BASE_URL}/admin/files")
+        response = session.get(f"{BASE_URL}/admin/files")
         
         if response.status_code == 200:
             data = response.json()
@@ -75,7 +78,7 @@ def test_session_refresh():
     print("🔄 Testing session refresh...")
     
     try:
-        response = requests.post(f"{BASE_URL}/admin/refresh-session")
+        response = session.post(f"{BASE_URL}/admin/refresh-session")
         
         if response.status_code == 200:
             data = response.json()
@@ -20,8 +20,13 @@ def test_bedrock_access():
     # Try to get credentials from environment
     access_key = os.environ.get('AWS_ACCESS_KEY_ID')
     secret_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
+    endpoint_url = os.environ.get('BEDROCK_ENDPOINT_URL')
     
-    if not access_key or not secret_key:
+    if endpoint_url and not (access_key and secret_key):
+        # Local stub (bedrock_stub.py) does not verify signatures
+        access_key, secret_key = "stub", "stub"
+        print(f"✅ Using Bedrock endpoint override: {endpoint_url}")
+    elif not access_key or not secret_key:
         print("❌ AWS credentials not found in environment variables")
         print("   Please set AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY")
         return False
@@ -34,6 +39,7 @@ def test_bedrock_access():
         bedrock = boto3.client(
             service_name='bedrock-runtime',
             region_name='ap-south-1',
+            endpoint_url=endpoint_url,
             aws_access_key_id=access_key,
             aws_secret_access_key=secret_key
         )
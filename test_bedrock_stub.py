@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test the indexer and text generation against the local Bedrock stub (no AWS needed)
+"""
+
+import os
+import logging
+import tempfile
+import time
+from bedrock_stub import BedrockStubServer, StubConfig
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def test_indexer_against_stub(endpoint_url):
+    """Build an index from the FAQ CSV and search it through the stub"""
+    print("\n📊 Indexing data/Nibav.csv through the stub...")
+    os.environ["BEDROCK_ENDPOINT_URL"] = endpoint_url
+
+    from bedrock_faiss_indexer import BedrockFAISSIndexer
+    indexer = BedrockFAISSIndexer(max_requests_per_second=1000)
+    indexer.process_csv("data/Nibav.csv")
+    print(f"📊 Index Stats: {indexer.get_stats()}")
+
+    query = indexer.documents[0]['question']
+    results = indexer.search(query, k=3, threshold=0.1)
+    if not results or results[0][0]['question'] != query:
+        print(f"❌ Expected '{query}' as the top hit, got {results[:1]}")
+        return False
+    print(f"✅ Top hit for '{query}': score {results[0][1]:.3f}")
+
+    # Embeddings must be deterministic across calls
+    if indexer.get_embedding(query) != indexer.get_embedding(query):
+        print("❌ Stub embeddings are not deterministic")
+        return False
+    print("✅ Stub embeddings are deterministic")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = os.path.join(tmp, "stub_index")
+        indexer.save_index(index_path)
+        reloaded = BedrockFAISSIndexer()
+        reloaded.load_index(index_path)
+        if reloaded.index.ntotal != indexer.index.ntotal:
+            print("❌ Reloaded index size mismatch")
+            return False
+    print("✅ Index save/load round trip works")
+    return True
+
+def test_generation_against_stub(endpoint_url):
+    """Generate an answer through the stub"""
+    print("\n🤖 Generating answer through the stub...")
+    os.environ["BEDROCK_ENDPOINT_URL"] = endpoint_url
+
+    from bedrock_search import generate_answer_with_bedrock
+    answer = generate_answer_with_bedrock("What about warranty?", "Warranty is 3 years on all parts.")
+    if "Warranty is 3 years" not in answer:
+        print(f"❌ Unexpected generated answer: {answer}")
+        return False
+    print(f"✅ Generated answer: {answer}")
+    return True
+
+def test_throttling():
+    """Every request is throttled when throttle_rate is 1.0"""
+    print("\n🚦 Testing throttling...")
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+    import boto3
+
+    with BedrockStubServer(config=StubConfig(throttle_rate=1.0)) as stub:
+        client = boto3.client(
+            service_name='bedrock-runtime',
+            region_name='ap-south-1',
+            endpoint_url=stub.endpoint_url,
+            aws_access_key_id="stub",
+            aws_secret_access_key="stub",
+            config=Config(retries={"max_attempts": 1, "mode": "standard"})
+        )
+        try:
+            client.invoke_model(
+                body='{"inputText": "test"}',
+                modelId="amazon.titan-embed-text-v2:0",
+                accept="application/json",
+                contentType="application/json"
+            )
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            if code == 'ThrottlingException':
+                print("✅ ThrottlingException raised as expected")
+                return True
+            print(f"❌ Unexpected error code: {code}")
+            return False
+    print("❌ Request was not throttled")
+    return False
+
+def test_half_open_timeout():
+    """A half-open trial that times out reopens the circuit instead of wedging it"""
+    print("\n🔌 Testing a timed-out half-open trial...")
+    from botocore.config import Config
+    from botocore.exceptions import ReadTimeoutError
+    import boto3
+    from bedrock_client import CircuitBreaker, CircuitOpenError, ResilientBedrockClient
+
+    with BedrockStubServer(config=StubConfig(latency_ms=1000)) as stub:
+        breaker = CircuitBreaker(failure_threshold=1, cooldown_s=0.1)
+        client = ResilientBedrockClient(boto3.client(
+            service_name='bedrock-runtime',
+            region_name='ap-south-1',
+            endpoint_url=stub.endpoint_url,
+            aws_access_key_id="stub",
+            aws_secret_access_key="stub",
+            config=Config(read_timeout=0.2, retries={"max_attempts": 1, "mode": "standard"})
+        ), hedging=False, breaker=breaker)
+        request = dict(body='{"inputText": "test"}', modelId="amazon.titan-embed-text-v2:0",
+                       accept="application/json", contentType="application/json")
+
+        breaker.record_failure()  # opened, as after repeated throttling
+        time.sleep(0.15)
+        try:
+            client.invoke_model(**request)
+            print("❌ Half-open trial did not time out")
+            return False
+        except ReadTimeoutError:
+            pass
+        if breaker.state != "open":
+            print(f"❌ Circuit is {breaker.state} after a failed trial, expected open")
+            return False
+        try:
+            client.invoke_model(**request)
+            print("❌ Call allowed during the new cooldown")
+            return False
+        except CircuitOpenError:
+            pass
+
+        stub.state.config.latency_ms = 0
+        time.sleep(0.15)
+        client.invoke_model(**request)
+        if breaker.state != "closed":
+            print(f"❌ Circuit is {breaker.state} after a successful trial, expected closed")
+            return False
+    print("✅ Timed-out trial reopened the circuit, the next trial closed it")
+    return True
+
+def test_interrupted_throttling():
+    """Throttled calls separated by another error are not consecutive"""
+    print("\n🔌 Testing throttling interrupted by other errors...")
+    from bedrock_client import CircuitBreaker
+
+    breaker = CircuitBreaker(failure_threshold=3)
+    for throttled in (True, True, False, True, True):
+        breaker.record_error(throttled)
+    if breaker.state != "closed" or breaker.consecutive_failures != 2:
+        print(f"❌ Circuit is {breaker.state} with {breaker.consecutive_failures} consecutive failures")
+        return False
+    breaker.record_error(True)
+    if breaker.state != "open":
+        print(f"❌ Circuit is {breaker.state} after 3 consecutive throttles, expected open")
+        return False
+    print("✅ Only consecutive throttles opened the circuit")
+    return True
+
+if __name__ == "__main__":
+    print("🧪 Bedrock Stub Testing Suite")
+    print("=" * 50)
+
+    with BedrockStubServer(config=StubConfig(latency_ms=5)) as stub:
+        print(f"🧪 Stub running at {stub.endpoint_url}")
+        results = [
+            test_indexer_against_stub(stub.endpoint_url),
+            test_generation_against_stub(stub.endpoint_url),
+        ]
+        print(f"\n📈 Stub stats: {stub.state.snapshot_stats()}")
+    results.append(test_throttling())
+    results.append(test_half_open_timeout())
+    results.append(test_interrupted_throttling())
+
+    if all(results):
+        print("\n🎉 All stub tests passed!")
+    else:
+        print("\n❌ Some stub tests failed")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test the BM25 inverted index (no AWS or database needed)
+"""
+
+from bm25_index import BM25Index, tokenize
+
+TEXTS = [
+    "What is the warranty on a Nibav lift? Standard warranty is 1 year on parts and labour.",
+    "How much does a Nibav lift cost? Prices start at 18 lakh including installation.",
+    "How long does installation take? Installation takes 2 to 3 days on site.",
+    "Is the lift noisy? The vacuum pump is about as loud as an air conditioner.",
+]
+
+def test_tokenize():
+    """Tokens are lowercase words without stopwords"""
+    print("\n🔤 Testing tokenize...")
+    tokens = tokenize("What is the WARRANTY on my lift?")
+    if tokens != ["warranty", "lift"]:
+        print(f"❌ Unexpected tokens: {tokens}")
+        return False
+    print(f"✅ Tokens: {tokens}")
+    return True
+
+def test_ranking():
+    """The document sharing the rare query terms ranks first, with a normalized score"""
+    print("\n📊 Testing BM25 ranking...")
+    index = BM25Index.build(TEXTS)
+    results = index.search("how long is the warranty", k=3)
+    if not results or results[0][0] != 0:
+        print(f"❌ Expected document 0 first, got {results}")
+        return False
+    if not all(0.0 < score <= 1.0 for _, score in results):
+        print(f"❌ Scores outside (0, 1]: {results}")
+        return False
+    if index.search("elevator shaft") != []:
+        print("❌ A query with no known terms returned results")
+        return False
+    print(f"✅ Ranking: {results}")
+    return True
+
+def test_typo_expansion():
+    """Unknown query terms are expanded to close vocabulary terms"""
+    print("\n✏️ Testing typo expansion...")
+    index = BM25Index.build(TEXTS)
+    results = index.search("warrenty", k=1)
+    if not results or results[0][0] != 0:
+        print(f"❌ 'warrenty' did not match the warranty row: {results}")
+        return False
+    print(f"✅ 'warrenty' matched document {results[0][0]} (score {results[0][1]:.3f})")
+    return True
+
+def test_round_trip():
+    """to_dict/from_dict preserve the scores"""
+    print("\n💾 Testing to_dict/from_dict...")
+    index = BM25Index.build(TEXTS)
+    reloaded = BM25Index.from_dict(index.to_dict())
+    query = "installation cost"
+    if not (reloaded.score(query) == index.score(query)).all():
+        print("❌ Scores changed after the round trip")
+        return False
+    print("✅ Round trip keeps the scores")
+    return True
+
+if __name__ == "__main__":
+    print("🧪 BM25 Index Testing Suite")
+    print("=" * 50)
+
+    results = [
+        test_tokenize(),
+        test_ranking(),
+        test_typo_expansion(),
+        test_round_trip(),
+    ]
+
+    if all(results):
+        print("\n🎉 All BM25 tests passed!")
+    else:
+        print("\n❌ Some BM25 tests failed")
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Test API helpers and endpoints in-process (FastAPI TestClient, no server or AWS needed)
+
+Needs the chat database (DATABASE_URL or db.DB_CONFIG); migrations are applied on import.
+"""
+
+import json
+import uuid
+
+import numpy as np
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import db_export
+import fastapi_bedrock
+from db import create_connection, save_interaction
+from session_store import create_session, delete_session
+
+client = TestClient(fastapi_bedrock.app)
+
+def admin_client():
+    """TestClient logged in with a fresh admin session; returns (client, token)"""
+    token = create_session("test-admin@example.com", "admin")
+    admin = TestClient(fastapi_bedrock.app)
+    admin.cookies.set(fastapi_bedrock.SESSION_COOKIE, token)
+    return admin, token
+
+def delete_chats(email):
+    conn = create_connection()
+    try:
+        conn.cursor().execute("DELETE FROM chat_history WHERE email = %s", (email,))
+        conn.commit()
+    finally:
+        conn.close()
+
+def test_continuation_token():
+    """/chat/more tokens carry the question, index generation and document ids"""
+    print("\n🎫 Testing continuation tokens...")
+    results = [({'row_index': 4}, 0.9), ({'row_index': 7}, 0.5)]
+    token = fastapi_bedrock.encode_continuation_token("How long is the warranty?", results[0], results)
+    query, generation, doc_ids, exact = fastapi_bedrock.decode_continuation_token(token)
+    if (query, doc_ids, exact) != ("How long is the warranty?", [4, 7], True):
+        print(f"❌ Round trip gave {query!r}, {doc_ids}, {exact}")
+        return False
+    if generation != fastapi_bedrock.index_generation():
+        print(f"❌ Token generation {generation} is not the current index generation")
+        return False
+
+    # Documents without row_index (indexes saved before it existed) mean "search again"
+    token = fastapi_bedrock.encode_continuation_token("warranty", None, [({}, 0.5)])
+    if fastapi_bedrock.decode_continuation_token(token)[2] != []:
+        print("❌ Token without row_index kept document ids")
+        return False
+
+    response = client.post("/chat/more", data={"continuation_token": "not-a-token"})
+    if response.status_code != 400:
+        print(f"❌ Invalid token answered {response.status_code}, expected 400")
+        return False
+    print("✅ Tokens round-trip, invalid ones are rejected with 400")
+    return True
+
+def test_full_long_answer():
+    """CSV FAQ answers repeat the short answer before the details, PDF answers do not"""
+    print("\n📝 Testing full_long_answer...")
+    csv_answer = fastapi_bedrock.full_long_answer([({'source': 'csv'}, 1.0)], "Short. ", "Details.")
+    pdf_answer = fastapi_bedrock.full_long_answer([({'source': 'pdf'}, 1.0)], "Short. ", "Details.")
+    if (csv_answer, pdf_answer) != ("Short. Details.", "Details."):
+        print(f"❌ Got {csv_answer!r} and {pdf_answer!r}")
+        return False
+    print("✅ Long answers match /chat/stream's done event")
+    return True
+
+class FakeIndexer:
+    """Indexer stand-in that records the searches retrieve_for_chat runs"""
+
+    def __init__(self):
+        self.searches = 0
+
+    def lookup_exact(self, query):
+        return None
+
+    def lexical_shortcut(self, query, k=5):
+        return None
+
+    def embed_query(self, query):
+        return np.array([[1.0, 0.0]], dtype=np.float32)
+
+    def hybrid_search(self, query, k=5, **kwargs):
+        self.searches += 1
+        return [({'source': 'csv', 'question': query}, 0.8)]
+
+def test_retrieval_semantic_cache():
+    """retrieve_for_chat (behind /chat, /chat/stream and /chat/more) reuses cached results"""
+    print("\n🧠 Testing the semantic cache in retrieve_for_chat...")
+    fastapi_bedrock.semantic_cache.clear()
+    indexer = FakeIndexer()
+    first = fastapi_bedrock.retrieve_for_chat("how long is the warranty", indexer)
+    second = fastapi_bedrock.retrieve_for_chat("warranty period?", indexer)
+    fastapi_bedrock.semantic_cache.clear()
+    if indexer.searches != 1 or second != first:
+        print(f"❌ {indexer.searches} searches, results {first} and {second}")
+        return False
+    print("✅ Second query answered from the semantic cache")
+    return True
+
+def test_page_cursor():
+    """Keyset cursors round-trip their key and reject anything else with 400"""
+    print("\n📑 Testing page cursors...")
+    cursor = fastapi_bedrock.encode_page_cursor("2026-10-19T07:00:00", "a@x.com")
+    if fastapi_bedrock.decode_page_cursor(cursor, 2) != ["2026-10-19T07:00:00", "a@x.com"]:
+        print("❌ Cursor did not round-trip")
+        return False
+    for bad, size in (("garbage", 2), (cursor, 1)):
+        try:
+            fastapi_bedrock.decode_page_cursor(bad, size)
+            print(f"❌ Cursor {bad!r} accepted for a key of {size}")
+            return False
+        except HTTPException as e:
+            if e.status_code != 400:
+                print(f"❌ Cursor {bad!r} answered {e.status_code}, expected 400")
+                return False
+    print("✅ Cursors round-trip, invalid ones are rejected with 400")
+    return True
+
+def test_history_pagination():
+    """Paging /users/history with next_cursor returns every chat once, newest first"""
+    print("\n📜 Testing /users/history pagination...")
+    email = f"pagination-{uuid.uuid4().hex[:8]}@example.com"
+    admin, token = admin_client()
+    try:
+        for i in range(5):
+            save_interaction(email, f"question {i}", f"answer {i}")
+        queries = []
+        cursor = None
+        for _ in range(5):
+            params = {"email": email, "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            page = admin.get("/users/history", params=params).json()
+            queries += [h["user_query"] for h in page["history"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+    finally:
+        delete_chats(email)
+        delete_session(token)
+    if queries != [f"question {i}" for i in reversed(range(5))]:
+        print(f"❌ Pages returned {queries}")
+        return False
+    print("✅ 3 pages of at most 2 chats, each chat once")
+    return True
+
+def test_etag_not_modified():
+    """Analytics responses carry an ETag; sending it back yields an empty 304"""
+    print("\n🏷️ Testing ETag / If-None-Match...")
+    first = client.get("/user/count")
+    etag = first.headers.get("etag")
+    again = client.get("/user/count", headers={"If-None-Match": etag or ""})
+    if first.status_code != 200 or not etag or again.status_code != 304 or again.content:
+        print(f"❌ Got {first.status_code} with ETag {etag}, then {again.status_code}")
+        return False
+    if again.headers.get("etag") != etag:
+        print("❌ 304 response did not repeat the ETag")
+        return False
+    print(f"✅ 200 with ETag {etag}, then 304")
+    return True
+
+def test_export():
+    """Exports reject unknown formats with 400 and open no connection until iterated"""
+    print("\n📦 Testing /admin/export...")
+    admin, token = admin_client()
+    try:
+        bad = admin.get("/admin/export", params={"format": "xml"})
+        dump = admin.get("/admin/export", params={"table": "users", "format": "ndjson"})
+    finally:
+        delete_session(token)
+    if bad.status_code != 400 or dump.status_code != 200:
+        print(f"❌ Bad format answered {bad.status_code}, NDJSON export {dump.status_code}")
+        return False
+    if not all("email" in json.loads(line) for line in dump.text.splitlines()):
+        print("❌ NDJSON export is not one JSON document per line")
+        return False
+
+    opened = []
+    real_create_connection = db_export.create_connection
+    db_export.create_connection = lambda: opened.append(1) or real_create_connection()
+    try:
+        db_export.stream_export("chat_history", "csv")  # response never sent
+    finally:
+        db_export.create_connection = real_create_connection
+    if opened:
+        print("❌ An export that was never iterated opened a connection")
+        return False
+    print("✅ Bad format rejected, NDJSON streamed, no connection before the first chunk")
+    return True
+
+if __name__ == "__main__":
+    print("🧪 Chat API Testing Suite")
+    print("=" * 50)
+
+    results = [
+        test_continuation_token(),
+        test_full_long_answer(),
+        test_retrieval_semantic_cache(),
+        test_page_cursor(),
+        test_history_pagination(),
+        test_etag_not_modified(),
+        test_export(),
+    ]
+
+    if all(results):
+        print("\n🎉 All API tests passed!")
+    else:
+        print("\n❌ Some API tests failed")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test token-budgeted context assembly (no AWS or database needed)
+"""
+
+from context_builder import approx_token_count, build_context, split_sentences
+
+def test_token_count():
+    """Words and punctuation count one token each, long words more"""
+    print("\n🔢 Testing approx_token_count...")
+    counts = (approx_token_count("Is it noisy?"), approx_token_count("installation"))
+    if counts != (4, 2):
+        print(f"❌ Unexpected counts: {counts}")
+        return False
+    print(f"✅ Counts: {counts}")
+    return True
+
+def test_best_first():
+    """Higher-scored chunks are packed first, whatever their order"""
+    print("\n🥇 Testing relevance order...")
+    context = build_context([("Low relevance chunk.", 0.2), ("High relevance chunk.", 0.9)])
+    if context != "High relevance chunk.\n\nLow relevance chunk.":
+        print(f"❌ Unexpected context: {context!r}")
+        return False
+    print("✅ Best chunk first")
+    return True
+
+def test_redundant_sentences():
+    """Sentences repeated by overlapping chunks are packed once"""
+    print("\n♻️ Testing redundant sentence removal...")
+    shared = "The lift runs on air pressure and needs no pit."
+    context = build_context([(f"{shared} It fits in 2 square feet.", 0.9),
+                             (f"{shared} Installation takes 2 days.", 0.8)])
+    if context.count(shared) != 1 or "Installation takes 2 days." not in context:
+        print(f"❌ Unexpected context: {context!r}")
+        return False
+    print("✅ Shared sentence packed once")
+    return True
+
+def test_budget():
+    """The packed context never exceeds the token budget"""
+    print("\n📏 Testing the token budget...")
+    chunks = [(" ".join(f"Sentence {i} about lift model {j}." for j in range(20)), 1.0 - i / 10)
+              for i in range(5)]
+    context = build_context(chunks, max_tokens=50)
+    tokens = sum(approx_token_count(s) for s in split_sentences(context))
+    if not 0 < tokens <= 50:
+        print(f"❌ Context has {tokens} tokens for a budget of 50")
+        return False
+    print(f"✅ {tokens} tokens within a budget of 50")
+    return True
+
+if __name__ == "__main__":
+    print("🧪 Context Builder Testing Suite")
+    print("=" * 50)
+
+    results = [
+        test_token_count(),
+        test_best_first(),
+        test_redundant_sentences(),
+        test_budget(),
+    ]
+
+    if all(results):
+        print("\n🎉 All context builder tests passed!")
+    else:
+        print("\n❌ Some context builder tests failed")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test the indexer's search modes on hand-made vectors (no AWS or database needed)
+
+Queries pass query_embedding, so no embedding call is made.
+"""
+
+import os
+import tempfile
+
+import faiss
+import numpy as np
+
+from bedrock_faiss_indexer import BedrockFAISSIndexer, MAX_CALIBRATED_THRESHOLD, MIN_CALIBRATED_THRESHOLD
+
+def unit(*values):
+    vector = np.array([values], dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def make_indexer(items):
+    """Indexer over (document, vector) pairs"""
+    indexer = BedrockFAISSIndexer(dedup=False)
+    indexer.index = faiss.IndexFlatIP(len(items[0][1]))
+    for doc_id, (doc, vector) in enumerate(items):
+        indexer.documents.append(dict(doc, row_index=doc_id))
+        indexer.index.add(unit(*vector))
+    return indexer
+
+# Three overlapping chunks of one PDF page and one chunk about something else
+CHUNKS = [
+    ({'source': 'pdf', 'text': 'pump chunk 1', 'page': 1}, (1.0, 0.02, 0.0)),
+    ({'source': 'pdf', 'text': 'pump chunk 2', 'page': 1}, (1.0, 0.0, 0.02)),
+    ({'source': 'pdf', 'text': 'pump chunk 3', 'page': 1}, (1.0, 0.01, 0.01)),
+    ({'source': 'pdf', 'text': 'safety brake', 'page': 2}, (0.7, 0.7, 0.0)),
+]
+FAQ = ({'source': 'csv', 'question': 'How does the pump work?', 'answer': 'With air.',
+        'details': 'A vacuum pump moves the cabin.', 'text': 'pump faq'}, (1.0, 0.0, 0.0))
+
+def test_mmr():
+    """MMR swaps near-identical chunks for a relevant but different one"""
+    print("\n🎲 Testing MMR selection...")
+    indexer = make_indexer(CHUNKS)
+    query = unit(1.0, 0.3, 0.0)
+    plain = [doc['text'] for doc, _ in indexer.search("q", k=2, threshold=0.0, query_embedding=query)]
+    diverse = [doc['text'] for doc, _ in indexer.search("q", k=2, threshold=0.0, query_embedding=query,
+                                                       mmr=True)]
+    if 'safety brake' in plain or 'safety brake' not in diverse:
+        print(f"❌ Plain {plain}, MMR {diverse}")
+        return False
+    print(f"✅ Plain top-2 {plain}, MMR {diverse}")
+    return True
+
+def test_filtered_search():
+    """Filters are applied inside FAISS, so k hits of the filtered set come back"""
+    print("\n🔎 Testing filtered search...")
+    indexer = make_indexer(CHUNKS + [FAQ])
+    query = unit(1.0, 0.0, 0.0)
+    pages = [doc['page'] for doc, _ in indexer.search("q", k=2, threshold=0.0, query_embedding=query,
+                                                      filters={"source": "pdf", "pages": (2, 5)})]
+    csv_only = [doc['source'] for doc, _ in indexer.search("q", k=3, threshold=0.0, query_embedding=query,
+                                                           filters={"source": "csv"})]
+    if pages != [2] or csv_only != ['csv']:
+        print(f"❌ Page filter gave pages {pages}, source filter gave {csv_only}")
+        return False
+    try:
+        indexer.filter_ids({"author": "x"})
+        print("❌ Unknown filter accepted")
+        return False
+    except ValueError:
+        pass
+    print("✅ Filtered searches only return matching documents")
+    return True
+
+def test_filtered_exact_match():
+    """Exact FAQ hits are filtered by document id, also without row_index"""
+    print("\n🎯 Testing filters on exact FAQ hits...")
+    import bedrock_search
+    indexer = make_indexer(CHUNKS + [FAQ])
+    for doc in indexer.documents:
+        del doc['row_index']  # as in indexes saved before row_index existed
+    indexer._build_faq_lookup()
+    bedrock_search.bedrock_indexer = indexer
+    try:
+        answer, _ = bedrock_search.get_answer_bedrock("how does the pump work", filters={"source": "csv"})
+    finally:
+        bedrock_search.bedrock_indexer = None
+    if answer != 'With air.':
+        print(f"❌ Exact hit dropped by the filter, got {answer!r}")
+        return False
+    print("✅ Exact hit kept by a matching filter")
+    return True
+
+def test_range_search():
+    """Range search returns every hit above the threshold (up to k), not a fixed number"""
+    print("\n📡 Testing range search...")
+    indexer = make_indexer(CHUNKS)
+    query = unit(1.0, 0.0, 0.0)
+    hits = indexer.search("q", k=10, threshold=0.9, query_embedding=query, range_search=True)
+    capped = indexer.search("q", k=2, threshold=0.9, query_embedding=query, range_search=True)
+    if sorted(doc['text'] for doc, _ in hits) != ['pump chunk 1', 'pump chunk 2', 'pump chunk 3'] \
+            or len(capped) != 2 or not all(score >= 0.9 for _, score in hits):
+        print(f"❌ Range search gave {[(d['text'], s) for d, s in hits]}, capped {len(capped)}")
+        return False
+    print(f"✅ {len(hits)} hits above 0.9, capped to 2 with k=2")
+    return True
+
+def test_calibrated_thresholds():
+    """Thresholds are calibrated within bounds at save time and loaded, not recomputed"""
+    print("\n🎚️ Testing calibrated thresholds...")
+    rng = np.random.default_rng(1)
+    items = [({'source': 'pdf', 'text': f'chunk {i}'}, tuple(rng.normal(size=8))) for i in range(20)]
+    indexer = make_indexer(items)
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = os.path.join(tmp, "index")
+        indexer.save_index(index_path)
+        if not os.path.exists(f"{index_path}_thresholds.pkl"):
+            print("❌ Thresholds were not saved with the index")
+            return False
+        reloaded = BedrockFAISSIndexer(dedup=False)
+        reloaded._calibrate = lambda count: {}  # must not be needed after loading
+        reloaded.load_index(index_path)
+        thresholds = reloaded.source_thresholds()
+    if thresholds != indexer.source_thresholds():
+        print(f"❌ Loaded {thresholds}, saved {indexer.source_thresholds()}")
+        return False
+    if not MIN_CALIBRATED_THRESHOLD <= thresholds['pdf'] <= MAX_CALIBRATED_THRESHOLD:
+        print(f"❌ Threshold {thresholds['pdf']} outside the calibration bounds")
+        return False
+    print(f"✅ Saved and loaded thresholds: {thresholds}")
+    return True
+
+if __name__ == "__main__":
+    print("🧪 Indexer Search Testing Suite")
+    print("=" * 50)
+
+    results = [
+        test_mmr(),
+        test_filtered_search(),
+        test_filtered_exact_match(),
+        test_range_search(),
+        test_calibrated_thresholds(),
+    ]
+
+    if all(results):
+        print("\n🎉 All search tests passed!")
+    else:
+        print("\n❌ Some search tests failed")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test SimHash near-duplicate detection (no AWS or database needed)
+"""
+
+from near_dedup import NearDuplicateFilter, simhash
+
+ORIGINAL = ("Nibav lifts are air driven pneumatic elevators that travel inside a self "
+            "supporting tube and need no pit, machine room or headroom above the top floor.")
+# Same words, different formatting (as in re-exported FAQ rows)
+NEAR_COPY = ORIGINAL.replace(",", "").replace(" ", "  ").upper() + "!"
+UNRELATED = "Standard warranty is one year on parts and labour, extendable to five years."
+
+def test_simhash():
+    """Reformatted copies stay within the duplicate distance, unrelated texts do not"""
+    print("\n🔑 Testing simhash...")
+    near = bin(simhash(ORIGINAL) ^ simhash(NEAR_COPY)).count("1")
+    far = bin(simhash(ORIGINAL) ^ simhash(UNRELATED)).count("1")
+    if not near <= 3 < far:
+        print(f"❌ Hamming distance near copy {near}, unrelated text {far}")
+        return False
+    print(f"✅ Hamming distance near copy {near}, unrelated text {far}")
+    return True
+
+def test_filter():
+    """find() returns the payload of a kept near-duplicate and counts what it saw"""
+    print("\n♻️ Testing NearDuplicateFilter...")
+    dedup = NearDuplicateFilter()
+    dedup.add(ORIGINAL, {"id": 0})
+    if dedup.find(NEAR_COPY) != {"id": 0}:
+        print("❌ Near copy not detected")
+        return False
+    if dedup.find(UNRELATED) is not None:
+        print("❌ Unrelated text reported as a duplicate")
+        return False
+    if (dedup.checked, dedup.duplicates, len(dedup)) != (2, 1, 1):
+        print(f"❌ Unexpected counters: checked {dedup.checked}, duplicates {dedup.duplicates}")
+        return False
+    print("✅ Near copy detected, unrelated text kept")
+    return True
+
+def test_max_distance():
+    """Distances above 3 are refused: the 4-band lookup would miss candidates"""
+    print("\n📏 Testing max_distance validation...")
+    try:
+        NearDuplicateFilter(max_distance=4)
+    except ValueError:
+        print("✅ max_distance=4 rejected")
+        return True
+    print("❌ max_distance=4 accepted")
+    return False
+
+def test_duplicate_faq_questions():
+    """FAQ rows dropped as near-duplicates keep their exact-match lookup"""
+    print("\n🎯 Testing exact matches for dropped FAQ rows...")
+    from bedrock_faiss_indexer import BedrockFAISSIndexer
+    indexer = BedrockFAISSIndexer()
+    indexer._keep_unique(
+        [ORIGINAL, NEAR_COPY],
+        [{'question': "What is a Nibav lift?", 'text': ORIGINAL, 'source': 'csv'},
+         {'question': "Tell me about Nibav home lifts", 'text': NEAR_COPY, 'source': 'csv'}])
+    indexer._build_faq_lookup()
+    hit = indexer.lookup_exact("tell me about nibav home lifts")
+    if len(indexer.documents) != 1 or hit is None or hit[0] is not indexer.documents[0]:
+        print(f"❌ Dropped row's question not mapped to the kept row: {indexer.faq_lookup}")
+        return False
+    print("✅ Dropped row's question maps to the kept row")
+    return True
+
+if __name__ == "__main__":
+    print("🧪 Near-Duplicate Filter Testing Suite")
+    print("=" * 50)
+
+    results = [
+        test_simhash(),
+        test_filter(),
+        test_max_distance(),
+        test_duplicate_faq_questions(),
+    ]
+
+    if all(results):
+        print("\n🎉 All near-duplicate tests passed!")
+    else:
+        print("\n❌ Some near-duplicate tests failed")
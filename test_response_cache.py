@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test the analytics response cache and ETag helpers (no AWS or database needed)
+"""
+
+import time
+
+from response_cache import ResponseCache, etag_matches, json_etag
+
+def test_etags():
+    """Equal payloads share a strong ETag; If-None-Match uses weak comparison"""
+    print("\n🏷️ Testing ETags...")
+    etag = json_etag({"b": 2, "a": 1})
+    if etag != json_etag({"a": 1, "b": 2}) or etag == json_etag({"a": 1, "b": 3}):
+        print("❌ ETags do not follow the payload")
+        return False
+    checks = [
+        etag_matches(etag, etag),
+        etag_matches(f'"other", W/{etag}', etag),
+        etag_matches("*", etag),
+        not etag_matches('"other"', etag),
+        not etag_matches(None, etag),
+    ]
+    if not all(checks):
+        print(f"❌ If-None-Match checks: {checks}")
+        return False
+    print(f"✅ ETag {etag} and If-None-Match matching")
+    return True
+
+def test_ttl_and_invalidation():
+    """Payloads are reused until they expire or are invalidated"""
+    print("\n⏱️ Testing TTL and invalidation...")
+    cache = ResponseCache(ttl_seconds=0.2, name="test")
+    computed = []
+
+    def compute():
+        computed.append(1)
+        return {"count": len(computed)}
+
+    first = cache.get("user_count", compute)
+    second = cache.get("user_count", compute)
+    cache.invalidate("user_count")
+    third = cache.get("user_count", compute)
+    time.sleep(0.25)
+    fourth = cache.get("user_count", compute)
+    counts = [payload["count"] for payload, _ in (first, second, third, fourth)]
+    if counts != [1, 1, 2, 3] or first[1] != second[1]:
+        print(f"❌ Computations seen: {counts}")
+        return False
+    print(f"✅ Computations seen: {counts}, stats {cache.get_stats()}")
+    return True
+
+def test_stale_computation():
+    """A computation that started before an invalidation does not store its result"""
+    print("\n🏁 Testing invalidation during a computation...")
+    cache = ResponseCache(ttl_seconds=60, name="test")
+
+    def compute_while_written():
+        cache.invalidate("chat_counts")  # a chat is saved while the figures are computed
+        return {"total": 1}
+
+    cache.get("chat_counts", compute_while_written)
+    payload, _ = cache.get("chat_counts", lambda: {"total": 2})
+    if payload != {"total": 2}:
+        print(f"❌ Stale payload served: {payload}")
+        return False
+    print("✅ Stale result was not cached")
+    return True
+
+if __name__ == "__main__":
+    print("🧪 Response Cache Testing Suite")
+    print("=" * 50)
+
+    results = [
+        test_etags(),
+        test_ttl_and_invalidation(),
+        test_stale_computation(),
+    ]
+
+    if all(results):
+        print("\n🎉 All response cache tests passed!")
+    else:
+        print("\n❌ Some response cache tests failed")
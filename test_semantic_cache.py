@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test the semantic response cache (no AWS or database needed)
+"""
+
+import numpy as np
+
+from semantic_cache import SemanticCache
+
+def unit(*values):
+    vector = np.array([values], dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_paraphrase_hit():
+    """A query close enough to a cached one reuses its value, a different one misses"""
+    print("\n🧠 Testing lookups...")
+    cache = SemanticCache(threshold=0.9)
+    cache.store(unit(1, 0, 0), "warranty results", generation=1)
+    if cache.lookup(unit(1, 0.1, 0), generation=1) != "warranty results":
+        print("❌ Paraphrase missed the cache")
+        return False
+    if cache.lookup(unit(0, 1, 0), generation=1) is not None:
+        print("❌ Unrelated query hit the cache")
+        return False
+    stats = cache.get_stats()
+    if (stats["hits"], stats["misses"]) != (1, 1):
+        print(f"❌ Unexpected stats: {stats}")
+        return False
+    print(f"✅ Paraphrase hit, unrelated query missed: {stats}")
+    return True
+
+def test_generation_change():
+    """A new index generation empties the cache"""
+    print("\n🔄 Testing index generation changes...")
+    cache = SemanticCache(threshold=0.9)
+    cache.store(unit(1, 0, 0), "old results", generation=1)
+    if cache.lookup(unit(1, 0, 0), generation=2) is not None:
+        print("❌ Entry from the previous index generation was served")
+        return False
+    if cache.get_stats()["invalidations"] != 1 or cache.get_stats()["entries"] != 0:
+        print(f"❌ Unexpected stats: {cache.get_stats()}")
+        return False
+    print("✅ Cache emptied on a new generation")
+    return True
+
+def test_lru_eviction():
+    """Beyond max_entries the least recently used query is evicted"""
+    print("\n🧹 Testing eviction...")
+    cache = SemanticCache(threshold=0.99, max_entries=2)
+    cache.store(unit(1, 0, 0), "a", generation=1)
+    cache.store(unit(0, 1, 0), "b", generation=1)
+    cache.lookup(unit(1, 0, 0), generation=1)  # "a" is now the most recently used
+    cache.store(unit(0, 0, 1), "c", generation=1)
+    kept = [cache.lookup(unit(*v), generation=1) for v in ((1, 0, 0), (0, 1, 0), (0, 0, 1))]
+    if kept != ["a", None, "c"] or cache.get_stats()["evictions"] != 1:
+        print(f"❌ Expected 'b' evicted, lookups gave {kept}")
+        return False
+    print("✅ Least recently used entry evicted")
+    return True
+
+if __name__ == "__main__":
+    print("🧪 Semantic Cache Testing Suite")
+    print("=" * 50)
+
+    results = [
+        test_paraphrase_hit(),
+        test_generation_change(),
+        test_lru_eviction(),
+    ]
+
+    if all(results):
+        print("\n🎉 All semantic cache tests passed!")
+    else:
+        print("\n❌ Some semantic cache tests failed")
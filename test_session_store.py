@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test database-backed login sessions
+
+Needs the chat database (DATABASE_URL or db.DB_CONFIG); setup_database() applies migrations.
+"""
+
+from db import create_connection, setup_database
+from session_store import SESSION_TIMEOUT_MINUTES, _token_hash, create_session, delete_session, get_session
+
+EMAIL = "session-test@example.com"
+
+def set_remaining_minutes(token, minutes):
+    """Move a session's expiry to minutes from now"""
+    conn = create_connection()
+    try:
+        conn.cursor().execute(
+            "UPDATE admin_sessions SET expires_at = NOW() + %s * INTERVAL '1 minute' WHERE token_hash = %s",
+            (minutes, _token_hash(token)))
+        conn.commit()
+    finally:
+        conn.close()
+
+def test_lifecycle():
+    """A created session is found until it is deleted; unknown tokens find nothing"""
+    print("\n🔑 Testing create, get and delete...")
+    token = create_session(EMAIL, "sales")
+    session = get_session(token)
+    if not session or (session["email"], session["role"]) != (EMAIL, "sales"):
+        print(f"❌ New session looked up as {session}")
+        return False
+    if get_session("not-a-token") is not None or get_session(None) is not None:
+        print("❌ Unknown token accepted")
+        return False
+    if not delete_session(token) or get_session(token) is not None or delete_session(token):
+        print("❌ Session survived delete_session")
+        return False
+    print(f"✅ Session {session['session_id']} created, found and deleted")
+    return True
+
+def test_sliding_expiry():
+    """Expiry is pushed back once less than half the TTL is left, and expired sessions are gone"""
+    print("\n⏳ Testing sliding expiry...")
+    token = create_session(EMAIL, "admin")
+    try:
+        set_remaining_minutes(token, SESSION_TIMEOUT_MINUTES / 4)
+        refreshed = get_session(token)["remaining_minutes"]
+        set_remaining_minutes(token, -1)
+        expired = get_session(token)
+    finally:
+        delete_session(token)
+    if refreshed != SESSION_TIMEOUT_MINUTES or expired is not None:
+        print(f"❌ Remaining after refresh {refreshed}, expired session {expired}")
+        return False
+    print(f"✅ Expiry slid back to {refreshed} minutes, expired session rejected")
+    return True
+
+if __name__ == "__main__":
+    print("🧪 Session Store Testing Suite")
+    print("=" * 50)
+
+    setup_database()
+    results = [
+        test_lifecycle(),
+        test_sliding_expiry(),
+    ]
+
+    if all(results):
+        print("\n🎉 All session tests passed!")
+    else:
+        print("\n❌ Some session tests failed")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test request coalescing (no AWS or database needed)
+"""
+
+import threading
+import time
+
+from single_flight import SingleFlight
+
+def run_concurrently(flight, key, fn, callers=5):
+    """Call flight.do(key, fn) from several threads at once; returns results or exceptions"""
+    outcomes = [None] * callers
+    start = threading.Barrier(callers)
+
+    def call(i):
+        start.wait()
+        try:
+            outcomes[i] = flight.do(key, fn)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+def test_coalescing():
+    """Concurrent identical calls run once and share the result"""
+    print("\n🔀 Testing concurrent identical calls...")
+    flight = SingleFlight("test")
+    calls = []
+
+    def slow_call():
+        calls.append(1)
+        time.sleep(0.2)
+        return "embedding"
+
+    outcomes = run_concurrently(flight, "same question", slow_call)
+    if outcomes != ["embedding"] * 5 or len(calls) != 1:
+        print(f"❌ {len(calls)} upstream calls, results {outcomes}")
+        return False
+    stats = flight.get_stats()
+    if (stats["upstream_calls"], stats["calls_saved"], stats["in_flight"]) != (1, 4, 0):
+        print(f"❌ Unexpected stats: {stats}")
+        return False
+    print(f"✅ One upstream call for 5 callers: {stats}")
+    return True
+
+def test_shared_error():
+    """Waiters receive the leader's exception, and the next call starts afresh"""
+    print("\n💥 Testing a failing call...")
+    flight = SingleFlight("test")
+
+    def failing_call():
+        time.sleep(0.2)
+        raise RuntimeError("throttled")
+
+    outcomes = run_concurrently(flight, "key", failing_call)
+    if not all(isinstance(o, RuntimeError) for o in outcomes):
+        print(f"❌ Not every caller got the error: {outcomes}")
+        return False
+    if flight.do("key", lambda: "recovered") != "recovered":
+        print("❌ The failed call was cached")
+        return False
+    print("✅ Error shared with every waiter, nothing cached")
+    return True
+
+if __name__ == "__main__":
+    print("🧪 Single-Flight Testing Suite")
+    print("=" * 50)
+
+    results = [
+        test_coalescing(),
+        test_shared_error(),
+    ]
+
+    if all(results):
+        print("\n🎉 All single-flight tests passed!")
+    else:
+        print("\n❌ Some single-flight tests failed")
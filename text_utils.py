@@ -0,0 +1,76 @@
+"""
+Answer text helpers shared by the API and the indexing pipeline
+"""
+
+import re
+import unicodedata
+
+# Words dropped when normalizing FAQ questions for exact matching. Deliberately short:
+# question words (what/how/where) are kept because they change the meaning.
+FAQ_STOPWORDS = {"a", "an", "the", "is", "are", "was", "do", "does", "it", "its",
+                 "i", "me", "my", "you", "your", "please", "of"}
+
+def normalize_question(text: str) -> str:
+    """
+    Normalize a question for exact-match lookup
+
+    Casefolds, strips punctuation and drops a light stopword list, so
+    "How long is the warranty?" and "how long warranty" map to the same key.
+    """
+    text = unicodedata.normalize("NFKC", str(text)).casefold()
+    words = re.findall(r"\w+", text)
+    return " ".join(w for w in words if w not in FAQ_STOPWORDS)
+
+def query_fingerprint(text: str) -> str:
+    """
+    Key under which variants of the same question are counted together
+
+    normalize_question(text), or the casefolded text itself when nothing is left
+    after dropping stopwords (e.g. "is it?").
+    """
+    return normalize_question(text) or " ".join(str(text).casefold().split())
+
+def trim_to_tokens(text, max_tokens=100):
+    tokens = re.findall(r'\b\w+\b', text)
+    if len(tokens) <= max_tokens:
+        return text
+    count = 0
+    for match in re.finditer(r'\b\w+\b', text):
+        count += 1
+        if count == max_tokens:
+            end_pos = match.end()
+            return text[:end_pos] + '...'
+    return text
+
+def is_list_like(text):
+    if '\n' in text:
+        return True
+    if re.search(r'\d+\.', text):
+        return True
+    if ';' in text:
+        return True
+    return False
+
+def format_points(text, max_tokens=100):
+    points = re.split(r'\n|;|\d+\.', text)
+    points = [p.strip() for p in points if p.strip()]
+    result = []
+    used_tokens = 0
+    for p in points:
+        p_trimmed = trim_to_tokens(p, max_tokens - used_tokens)
+        p_tokens = len(re.findall(r'\b\w+\b', p_trimmed))
+        if used_tokens + p_tokens > max_tokens:
+            break
+        result.append(f'- {p_trimmed}')
+        used_tokens += p_tokens
+        if used_tokens >= max_tokens:
+            break
+    return '\n'.join(result)
+
+def trim_short_answer(text):
+    """Short answer as shown in chat: bullet points for list-like text, else 60 tokens"""
+    return format_points(text, 60) if is_list_like(text) else trim_to_tokens(text, 60)
+
+def needs_generation(trimmed_short, trimmed_long):
+    """True when the documents offer no long answer beyond the short one"""
+    return not trimmed_long or trimmed_long.lower() == trimmed_short.lower()